@@ -0,0 +1,334 @@
+"""Benchmarks of installing, looking up, searching and rendering synthetic
+translations 1x, 10x and 100x the size of a Bible, and of CLI startup.
+
+Nothing is downloaded, and nothing is read from or written to the app data
+directory. Results are written as JSON, and compared to a baseline from an
+earlier run to flag regressions, eg.
+
+    python -m benchmarks.run --output baseline.json
+    python -m benchmarks.run --baseline baseline.json
+"""
+import argparse
+import itertools
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+from benchmarks.synthetic import COMMON_TERM, PREFIX_TERM, RARE_TERM, make_raw_bible
+from berea.bible import BibleClient
+from berea.cli import __version__
+from berea.render import render_passages, render_search_results
+
+
+SCALES = [1, 10, 100]
+
+# Timed runs of each benchmark after a warm-up run, unless they take
+# longer than TIME_BUDGET seconds in all. Installs run once.
+REPEAT = 20
+TIME_BUDGET = 10
+
+# A benchmark regresses when its median is this much slower than the
+# baseline's, and by at least MIN_REGRESSION seconds, which is noise
+THRESHOLD = 0.25
+MIN_REGRESSION = 0.001
+
+REFERENCES = {
+    'verse': 'John 3:16',
+    'passages': 'Gen 1:1-3; Matt 5:3-12; John 3:16',
+    'chapter': 'Gen 1',
+    'book': 'Jude',
+}
+
+SEARCH_TERMS = {
+    'rare': RARE_TERM,
+    'common': COMMON_TERM,
+    'prefix': PREFIX_TERM,
+}
+
+# Matches on a page of search results
+SEARCH_PAGE = 100
+
+
+def get_stats(durations):
+    return {
+        'median': statistics.median(durations),
+        'min': min(durations),
+        'runs': len(durations),
+    }
+
+
+def measure(function, repeat=REPEAT):
+    """Time `function` after a warm-up run.
+
+    Slow benchmarks, eg. on a 100x translation, run fewer than `repeat`
+    times, and at least once.
+
+    Returns:
+        dict: The `median` and `min` durations in seconds, and the `runs`.
+    """
+    function()
+    durations = []
+
+    while len(durations) < repeat and (not durations or sum(durations) < TIME_BUDGET):
+        start = time.perf_counter()
+        function()
+        durations.append(time.perf_counter() - start)
+
+    return get_stats(durations)
+
+
+def get_translation(scale):
+    return f'SYN{scale}X'
+
+
+def install(bible, raw_path):
+    """Install a raw DB the way a download is, and time everything after the download.
+    """
+    os.makedirs(os.path.dirname(bible.database), exist_ok=True)
+
+    if os.path.exists(bible.database):
+        bible.delete_translation()
+
+    shutil.copyfile(raw_path, bible.download_path)
+    start = time.perf_counter()
+
+    bible.stage_download()
+    bible.build_bible_db(bible.build_path)
+    bible.install_build()
+
+    return get_stats([time.perf_counter() - start])
+
+
+def run_cli(argv):
+    """Run the CLI in a new process, as the `bible` script does.
+    """
+    result = subprocess.run(
+        [sys.executable, '-m', 'berea.cli', *argv],
+        capture_output=True,
+        text=True,
+        check=True
+    )
+
+    if result.stdout.startswith("Error"):
+        raise RuntimeError(result.stdout.strip())
+
+
+def iter_benchmarks(bible, repeat=REPEAT):
+    """Yield the names and timings of the benchmarks of an installed translation.
+    """
+    for name, reference in REFERENCES.items():
+        yield f'reference/{name}', measure(lambda: bible.get_passages(reference), repeat)
+
+    for kind, term in SEARCH_TERMS.items():
+        yield f'search/{kind}', measure(lambda: bible.search(term, limit=SEARCH_PAGE), repeat)
+        yield f'count/{kind}', measure(lambda: bible.count_matches(term), repeat)
+
+    for name in ['chapter', 'book']:
+        passages = bible.get_passages(REFERENCES[name])
+        yield f'render/{name}', measure(lambda: render_passages(bible, 'txt', passages), repeat)
+
+    verse_records = bible.search(COMMON_TERM, limit=SEARCH_PAGE)
+    total = bible.count_matches(COMMON_TERM)
+    yield 'render/search', measure(
+        lambda: render_search_results(bible, verse_records, COMMON_TERM, total=total),
+        repeat
+    )
+
+    book, chapter, verse = REFERENCES['verse'].replace(':', ' ').split()
+    yield 'startup', measure(
+        lambda: run_cli([book, chapter, verse, '-t', bible.translation]),
+        repeat
+    )
+
+
+def run_benchmarks(scales, data_path, repeat=REPEAT, report=None):
+    """Install a synthetic translation of each scale, then time its benchmarks.
+
+    Raw DBs already in `data_path` are reused, since generating the larger
+    ones takes a while.
+
+    Args:
+        report (callable, optional): Called with each benchmark's name and
+            timings as it finishes.
+
+    Returns:
+        tuple: The verses of each scale, eg. `{'1x': 32076}`, and the
+            timings of each benchmark, eg. `{'1x/reference/verse': {...}}`.
+    """
+    raw_dir = os.path.join(data_path, 'raw')
+    os.makedirs(raw_dir, exist_ok=True)
+    verses = {}
+    results = {}
+
+    for scale in scales:
+        translation = get_translation(scale)
+        raw_path = os.path.join(raw_dir, f'{translation}.db')
+
+        if not os.path.exists(raw_path):
+            make_raw_bible(f'{raw_path}.part', translation, scale)
+            os.replace(f'{raw_path}.part', raw_path)
+
+        with sqlite3.connect(raw_path) as conn:
+            verses[f'{scale}x'] = conn.execute(f"SELECT COUNT(*) FROM {translation}_verses;").fetchone()[0]
+
+        with BibleClient(translation) as bible:
+            timings = [('install', install(bible, raw_path))]
+            timings = itertools.chain(timings, iter_benchmarks(bible, repeat))
+
+            for name, stats in timings:
+                results[f'{scale}x/{name}'] = stats
+
+                if report:
+                    report(f'{scale}x/{name}', stats)
+
+    return verses, results
+
+
+def find_regressions(results, baseline, threshold=THRESHOLD, min_regression=MIN_REGRESSION):
+    """Compare the benchmarks run by both `results` and `baseline`.
+
+    Returns:
+        list: The `(name, baseline median, median)` of each benchmark whose
+            median regressed by more than `threshold`, eg. `0.25` for 25%.
+    """
+    regressions = []
+
+    for name, stats in results.items():
+        if name not in baseline:
+            continue
+
+        before = baseline[name]['median']
+        after = stats['median']
+
+        if after > before * (1 + threshold) and after - before >= min_regression:
+            regressions.append((name, before, after))
+
+    return regressions
+
+
+def format_duration(seconds):
+    if seconds >= 1:
+        return f"{seconds:.2f} s"
+    return f"{seconds * 1000:.2f} ms"
+
+
+def format_result(name, stats, baseline=None):
+    line = f"{name:<28} {format_duration(stats['median']):>10} {format_duration(stats['min']):>10}"
+
+    if baseline and name in baseline:
+        before = baseline[name]['median']
+        line += f" {format_duration(before):>10} {(stats['median'] - before) / before:>+8.0%}"
+
+    return line
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.run',
+        description="Benchmark Berea on synthetic translations."
+    )
+    parser.add_argument(
+        '-s',
+        '--scales',
+        type=int,
+        nargs='+',
+        default=SCALES,
+        help="Sizes of the translations relative to a Bible, eg. '1 10'."
+    )
+    parser.add_argument(
+        '-r',
+        '--repeat',
+        type=int,
+        default=REPEAT,
+        help="Timed runs of each benchmark."
+    )
+    parser.add_argument(
+        '-o',
+        '--output',
+        help="Write the results to this JSON file, eg. to use as a baseline."
+    )
+    parser.add_argument(
+        '-b',
+        '--baseline',
+        help="Flag regressions from the results in this JSON file."
+    )
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=THRESHOLD,
+        help="Slowdown of a median that's flagged, eg. 0.25 for 25%%."
+    )
+    parser.add_argument(
+        '--data',
+        help="Keep the translations in this directory to reuse them in later runs."
+    )
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    baseline = None
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)['results']
+
+    data_path = args.data or tempfile.mkdtemp(prefix='berea-benchmarks-')
+    data_path = os.path.abspath(data_path)
+    # Read by berea.utils.get_app_data_path, here and in the CLI's processes
+    os.environ['BEREA_DATA_PATH'] = data_path
+
+    header = f"{'benchmark':<28} {'median':>10} {'min':>10}"
+    if baseline:
+        header += f" {'baseline':>10} {'change':>8}"
+    print(header, flush=True)
+
+    try:
+        verses, results = run_benchmarks(
+            args.scales,
+            data_path,
+            args.repeat,
+            report=lambda name, stats: print(format_result(name, stats, baseline), flush=True)
+        )
+    finally:
+        if not args.data:
+            shutil.rmtree(data_path, ignore_errors=True)
+
+    output = {
+        'created': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'berea': __version__,
+        'python': platform.python_version(),
+        'sqlite': sqlite3.sqlite_version,
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'verses': verses,
+        'results': results,
+    }
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(output, file, indent=2)
+            file.write('\n')
+
+    if baseline:
+        regressions = find_regressions(results, baseline, args.threshold)
+
+        for name, before, after in regressions:
+            print(f"Regression: {name} took {format_duration(after)}, up from {format_duration(before)}.")
+
+        if regressions:
+            sys.exit(1)
+
+        print("No regressions.")
+
+
+if __name__ == '__main__':
+    main()
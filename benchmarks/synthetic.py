@@ -0,0 +1,120 @@
+import itertools
+import os
+import random
+import sqlite3
+
+from berea.books import MAX_NUMBER, load_book_abbreviations
+
+
+# A Bible's worth of verses at 1x: 66 books of 18 chapters of 24 to 30
+# verses, about 32,000 verses like the 31,102 of the KJV
+CHAPTERS = 18
+VERSES = 24
+
+# Larger scales first add chapters, up to 10 times as many, then verses
+MAX_CHAPTER_SCALE = 10
+
+# Words per verse; the KJV averages about 25
+MIN_WORDS = 10
+MAX_WORDS = 40
+
+# Frequent words, most frequent first, followed by made-up words whose
+# frequency falls off like a natural language's (Zipf's law)
+WORDS = (
+    "the and of to that in he shall unto for i his a lord they be is him not "
+    "them it with all thou thy was god which my me said but ye their have will "
+    "thee from as are when this out were upon man by israel king son people "
+    "came house land glory glorified glorious faith grace peace love world "
+    "spirit light darkness water bread life"
+).split()
+VOCABULARY_SIZE = 12000
+
+# Search terms of each kind. The rare word is the least frequent one,
+# found in a handful of verses at 1x.
+COMMON_TERM = 'the'
+RARE_TERM = 'maranatha'
+PREFIX_TERM = 'glor*'
+
+
+def make_word(rnd):
+    return ''.join(rnd.choice('bcdfghklmnprstvw') + rnd.choice('aeiou') for _ in range(rnd.randint(2, 4)))
+
+
+def make_vocabulary(rnd):
+    words = dict.fromkeys(WORDS)
+
+    while len(words) < VOCABULARY_SIZE - 1:
+        words.setdefault(make_word(rnd))
+
+    return [*words, RARE_TERM]
+
+
+def iter_chapters(scale):
+    """Yield the `(book_id, chapter, verses)` of a Bible `scale` times the size of one.
+    """
+    chapter_scale = min(scale, MAX_CHAPTER_SCALE)
+
+    for book_id in range(1, 67):
+        verses = round((VERSES + book_id % 7) * scale / chapter_scale)
+
+        if verses > MAX_NUMBER:
+            raise ValueError(f"Invalid {scale=}, a chapter can't hold {verses} verses.")
+
+        for chapter in range(1, CHAPTERS * chapter_scale + 1):
+            yield book_id, chapter, verses
+
+
+def make_raw_bible(path, translation, scale=1, seed=0):
+    """Write a synthetic translation in the format it's downloaded in.
+
+    Installing it with `BibleClient.build_bible_db` gives the same schema as
+    a real translation, so it stands in for one without a download.
+
+    Args:
+        path (str): The raw DB to write.
+        translation (str): The translation's name, which prefixes its tables.
+        scale (int, optional): Size relative to a Bible, eg. `10` for 10x.
+        seed (int, optional): Seed of the text, which is the same for the
+            same seed and scale.
+
+    Returns:
+        int: The number of verses.
+    """
+    rnd = random.Random(seed)
+    vocabulary = make_vocabulary(rnd)
+    cum_weights = list(itertools.accumulate(1 / rank for rank in range(1, len(vocabulary) + 1)))
+
+    def iter_verses():
+        for book_id, chapter, verses in iter_chapters(scale):
+            for verse in range(1, verses + 1):
+                words = rnd.choices(vocabulary, cum_weights=cum_weights, k=rnd.randint(MIN_WORDS, MAX_WORDS))
+                yield book_id, chapter, verse, ' '.join(words).capitalize() + '.'
+
+    if os.path.exists(path):
+        os.remove(path)
+
+    conn = sqlite3.connect(path)
+
+    try:
+        conn.execute(f"CREATE TABLE {translation}_books (id INTEGER PRIMARY KEY, name TEXT);")
+        conn.execute(f"""
+        CREATE TABLE {translation}_verses (
+            id INTEGER PRIMARY KEY,
+            book_id INTEGER,
+            chapter INTEGER,
+            verse INTEGER,
+            text TEXT
+        );
+        """)
+        conn.executemany(
+            f"INSERT INTO {translation}_books (id, name) VALUES (?, ?);",
+            enumerate(load_book_abbreviations(), 1)
+        )
+        conn.executemany(f"""
+        INSERT INTO {translation}_verses (book_id, chapter, verse, text) VALUES (?, ?, ?, ?);
+        """, iter_verses())
+        conn.commit()
+
+        return conn.execute(f"SELECT COUNT(*) FROM {translation}_verses;").fetchone()[0]
+    finally:
+        conn.close()
@@ -0,0 +1,119 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor, wait
+
+from berea.bible import BibleClient
+
+
+# Threads of a client's own executor, and its calls in flight at once
+ASYNC_WORKERS = 4
+ASYNC_CONCURRENCY = 64
+
+
+class AsyncBibleClient:
+    """Coroutine versions of `BibleClient`'s lookups and searches.
+
+    Calls run on a dedicated thread pool rather than the event loop. The
+    wrapped `BibleClient` opens a connection per thread, so each worker
+    keeps reusing its own warm connection, and the pool's size bounds how
+    many queries run at once. At most `max_concurrency` calls are queued
+    or running, so `asyncio.gather` over thousands of references doesn't
+    queue them all up front.
+
+    Clients of several translations can share an `executor`, which they
+    then don't shut down. Closing one only waits for its own calls, eg.
+
+        with ThreadPoolExecutor(4) as executor:
+            clients = [AsyncBibleClient(t, executor=executor) for t in ['KJV', 'BSB']]
+            verses = await asyncio.gather(*(
+                client.get_verse(book, chapter, verse)
+                for client in clients
+                for book, chapter, verse in references
+            ))
+    """
+    def __init__(
+        self,
+        translation,
+        scopes=None,
+        cache=None,
+        max_workers=ASYNC_WORKERS,
+        max_concurrency=ASYNC_CONCURRENCY,
+        executor=None
+    ):
+        self.bible = BibleClient(translation, scopes, cache)
+        self.translation = translation
+        self.max_concurrency = max_concurrency
+        self.owns_executor = executor is None
+        self.executor = executor or ThreadPoolExecutor(
+            max_workers,
+            thread_name_prefix=f'berea-{translation}'
+        )
+        # Created on first use, so it belongs to the running event loop
+        self._semaphore = None
+        # Calls submitted to the executor and not yet finished, which keep
+        # running even if the coroutine awaiting them is cancelled
+        self._pending = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        await self.close()
+
+    async def run(self, method, *args, **kwargs):
+        """Run a `BibleClient` method on the executor.
+        """
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        async with self._semaphore:
+            future = self.executor.submit(getattr(self.bible, method), *args, **kwargs)
+            self._pending.add(future)
+            future.add_done_callback(self._pending.discard)
+            return await asyncio.wrap_future(future)
+
+    async def get_verse(self, book, chapter, verse):
+        return await self.run('get_verse', book, chapter, verse)
+
+    async def get_verses(self, book, chapter, verse):
+        return await self.run('get_verses', book, chapter, verse)
+
+    async def get_verses_by_chapter(self, book, chapter):
+        return await self.run('get_verses_by_chapter', book, chapter)
+
+    async def get_verses_by_book(self, book):
+        return await self.run('get_verses_by_book', book)
+
+    async def get_passages(self, references):
+        return await self.run('get_passages', references)
+
+    async def search(self, phrase, *args, **options):
+        return await self.run('search', phrase, *args, **options)
+
+    async def search_bible(self, phrase, **options):
+        return await self.run('search_bible', phrase, **options)
+
+    async def search_testament(self, phrase, testament, **options):
+        return await self.run('search_testament', phrase, testament, **options)
+
+    async def search_scope(self, phrase, scope, **options):
+        return await self.run('search_scope', phrase, scope, **options)
+
+    async def search_book(self, phrase, book, **options):
+        return await self.run('search_book', phrase, book, **options)
+
+    async def search_chapter(self, phrase, book, chapter, **options):
+        return await self.run('search_chapter', phrase, book, chapter, **options)
+
+    async def count_matches(self, phrase, *args, **options):
+        return await self.run('count_matches', phrase, *args, **options)
+
+    async def close(self):
+        """Wait for the client's calls in flight, then close its connections.
+        """
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(None, wait, set(self._pending))
+
+        if self.owns_executor:
+            await loop.run_in_executor(None, self.executor.shutdown)
+
+        self.bible.close()
@@ -1,20 +1,28 @@
 import sqlite3
-import urllib.request
-from urllib.error import HTTPError
-import json
+import threading
+import time
 import csv
+import json
 import os
+import re
+import unicodedata
+from functools import partial
 
-from berea.utils import get_source_root, get_app_data_path
+# urllib, concurrent.futures and multiprocessing are imported where they're
+# used: they take longer to import than a reference takes to look up
 
-
-def clean_book_name(book):
-        cleaned_name = book.title()
-        # Database names use proper title case
-        # eg. 'Song of Solomon' and 'Revelation of John'
-        if 'Of' in cleaned_name:
-            cleaned_name = cleaned_name.replace('Of', 'of')
-        return cleaned_name
+from berea.utils import get_source_root, get_app_data_path, is_translation_downloaded
+from berea.cache import invalidate_search_cache
+from berea.pack import VersePack, build_pack
+from berea.books import (
+    MAX_NUMBER,
+    get_book_resolver,
+    discard_book_resolver,
+    load_book_abbreviations,
+    split_ordinal,
+    verse_ordinal,
+)
+from berea.scopes import SCOPES, book_ordinal_ranges, resolve_scope
 
 
 def import_resource_books(resource='step_bible'):
@@ -33,57 +41,419 @@ def parse_verses_str(verses):
     return verses_split[0], verses_split[1]
 
 
-def list_to_sql(data):
-    return "('" + "','".join(data) + "')"
+# Book, then an optional chapter or chapter range, or a chapter and verse range
+# which may end in a later chapter, eg. `Matt 5-7`, `1 John 3:16-18`, `Gen 1:1-2:3`
+REFERENCE_PATTERN = re.compile(
+    r"(?P<book>\d?\s*[^\d:;]+?)\s*"
+    r"(?:(?P<chapters>\d+(?:-\d+)?)|(?P<chapter>\d+):(?P<verse>\d+(?:-\d+(?::\d+)?)?))?"
+)
+
+
+def parse_references(references):
+    """Parse references separated by semicolons, eg. `John 3:16; Ps 23`.
+
+    Returns:
+        list: `(book, chapter, verse)` strings; chapter and verse may be `None`.
+    """
+    parsed = []
+    
+    for reference in references.split(';'):
+        match = REFERENCE_PATTERN.fullmatch(reference.strip())
+        
+        if not match:
+            raise BibleInputError(f"Invalid reference: '{reference.strip()}'.")
+        
+        parsed.append((match['book'], match['chapters'] or match['chapter'], match['verse']))
+    
+    return parsed
+
+
+def reference_error(book, chapter, verse=None):
+    if not verse:
+        return BibleInputError(f"Invalid chapter: {book} {chapter}.")
+    elif '-' in verse:
+        verse_start, verse_end = parse_verses_str(verse)
+        return BibleInputError(
+            f"Invalid verses: {book} {chapter}:{verse_start}-{verse_end}."
+        )
+    else:
+        return BibleInputError(f"Invalid verse: {book} {chapter}:{verse}.")
+
+
+def reference_ordinals(book_id, chapter=None, verse=None):
+    """First and last verse ordinals covered by a reference.
+
+    Args:
+        book_id (int): The book's ID.
+        chapter (str, optional): A chapter or chapter range, eg. `5-7`.
+        verse (str, optional): A verse or verse range, which may end in a
+            later chapter, eg. `1-2:3`.
+
+    Raises:
+        ValueError: If the chapter or verse isn't a number.
+    """
+    if not chapter:
+        return verse_ordinal(book_id, 0, 0), verse_ordinal(book_id, MAX_NUMBER, MAX_NUMBER)
+    
+    chapter_start, _, chapter_end = chapter.partition('-')
+    chapter_start = int(chapter_start)
+    chapter_end = int(chapter_end or chapter_start)
+    
+    if not verse:
+        return verse_ordinal(book_id, chapter_start, 0), verse_ordinal(book_id, chapter_end, MAX_NUMBER)
+    
+    verse_start, _, verse_end = verse.partition('-')
+    verse_end = verse_end or verse_start
+    
+    if ':' in verse_end:
+        chapter_end, verse_end = verse_end.split(':')
+    
+    return (
+        verse_ordinal(book_id, chapter_start, int(verse_start)),
+        verse_ordinal(book_id, int(chapter_end), int(verse_end)),
+    )
+
+
+def fold_term(term):
+    """Fold a word like the search index's tokenizer does, eg. `Café` to `cafe`.
+    """
+    decomposed = unicodedata.normalize('NFD', term.lower())
+    return ''.join(char for char in decomposed if not unicodedata.combining(char))
 
 
 class BibleInputError(ValueError):
     pass
 
 
+TRANSLATIONS_URL = "https://github.com/jstadnik619/bible_databases/raw/refs/heads/master/formats/sqlite"
+TRANSLATIONS_INDEX_URL = "https://api.github.com/repos/jstadnik619/bible_databases/contents/formats/sqlite"
+TRANSLATIONS_LINK = "https://github.com/jstadnik619/bible_databases?tab=readme-ov-file#available-translations-140"
+
+# Stored in PRAGMA user_version; installs with an older version are upgraded
+# when they're first opened, see BibleClient.upgrade_bible_db()
+SCHEMA_VERSION = 3
+
+# SQLite's default limit on attached DBs, which bounds a comparison
+MAX_ATTACHED = 10
+
+# FTS5 index and tokenizer queried by each search mode. Only the `exact`
+# index is built with every translation; the others are built on first use,
+# or at install with `bible download --index`
+SEARCH_INDEXES = {
+    'exact': ('fts_verses', None),
+    # Words match their stems, eg. 'glory' matches 'glorified', and every
+    # diacritic is ignored
+    'stem': ('fts_verses_stem', 'porter unicode61 remove_diacritics 2'),
+    # Any run of 3 or more characters matches, eg. 'salem' matches
+    # 'Jerusalem'; LIKE and GLOB queries on its text use it too
+    'substring': ('fts_verses_trigram', 'trigram'),
+}
+
+# The trigram tokenizer of the `substring` index is in SQLite 3.34 and later
+TRIGRAM_SQLITE_VERSION = (3, 34, 0)
+
+# Bytes read from the network per write to the partial download
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# Stands in for a verse pack that failed to open, so it isn't retried
+UNAVAILABLE_PACK = object()
+
+# Applied once to every connection; tuned for read-heavy lookups
+CONNECTION_PRAGMAS = [
+    "PRAGMA temp_store = MEMORY;",
+    "PRAGMA cache_size = -16000;",
+    "PRAGMA mmap_size = 268435456;",
+]
+
+
+def connect(database):
+    # Connections are only used by the thread that opened them,
+    # but may be closed from any thread by BibleClient.close()
+    conn = sqlite3.connect(database, check_same_thread=False)
+    conn.row_factory = sqlite3.Row
+    
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    
+    return conn
+
+
+def is_sqlite_file(path):
+    with open(path, 'rb') as file:
+        return file.read(16) == b'SQLite format 3\x00'
+
+
+def get_available_translations():
+    """List the translations that can be downloaded.
+    """
+    import urllib.request
+    from urllib.error import URLError
+    
+    try:
+        with urllib.request.urlopen(TRANSLATIONS_INDEX_URL) as response:
+            files = json.load(response)
+    
+    except URLError as ex:
+        raise BibleInputError(f"Failed to list available translations: {ex.reason}")
+    
+    return sorted(file['name'][:-3] for file in files if file['name'].endswith('.db'))
+
+
 class BibleClient:
-    def __init__(self, translation):
+    def __init__(self, translation, scopes=None, cache=None):
         self.translation = translation
+        # User-defined search scopes by name, see berea.scopes.resolve_scope()
+        self.scopes = {name.lower(): scope for name, scope in (scopes or {}).items()}
+        # Optional berea.cache.SearchCache for search results
+        self.search_cache = cache
         # Use venv path or platform app data path to store translation DBs
-        self.database = f"{get_app_data_path('translations')}/{self.translation}.db"
+        translations_path = get_app_data_path('translations', create=False)
+        self.database = f"{translations_path}/{self.translation}.db"
+        # Optional packed copy of the verses for lookups without SQL
+        self.pack_path = f"{translations_path}/{self.translation}.pack"
+        self.download_metadata = {}
+        self._pack = None
+        # Each thread gets its own connection, opened on first use
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+    
+    def __enter__(self):
+        return self
     
-    def download_raw_bible(self):
-        url = f"https://github.com/jstadnik619/bible_databases/raw/refs/heads/master/formats/sqlite/{self.translation}.db"
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+    
+    @property
+    def url(self):
+        return f"{TRANSLATIONS_URL}/{self.translation}.db"
+    
+    @property
+    def download_path(self):
+        """Partial download, kept between runs so it can be resumed.
+        """
+        return f"{self.database}.part"
+    
+    @property
+    def download_validator_path(self):
+        """Validators of the response a partial download started with.
+        """
+        return f"{self.download_path}.json"
+    
+    def get_resume_validator(self):
+        """The partial download's ETag or Last-Modified, to send as If-Range.
+
+        Returns:
+            str: The validator, or `None` if there's none to resume with.
+        """
+        try:
+            with open(self.download_validator_path) as file:
+                validators = json.load(file)
+        except (OSError, ValueError):
+            return None
+        
+        etag = validators.get('etag')
+        # If-Range only takes strong ETags
+        if etag and not etag.startswith('W/'):
+            return etag
+        
+        return validators.get('last_modified')
+    
+    def remove_download(self):
+        for path in [self.download_path, self.download_validator_path]:
+            if os.path.exists(path):
+                os.remove(path)
+    
+    @property
+    def build_path(self):
+        return f"{self.database}.build"
+    
+    def download_raw_bible(self, progress=None, conditional=False):
+        """Stream the raw translation DB to `download_path`.
+
+        An existing partial download is resumed with an HTTP Range request,
+        if upstream still has the same file; otherwise it starts over. The
+        response's validators are kept in `download_metadata` so they
+        can be stored with the built DB.
 
+        Args:
+            progress (callable, optional): Called after every chunk with the
+                bytes downloaded, the total bytes (or `None` if unknown) and
+                the elapsed seconds.
+            conditional (bool, optional): Skip the download if the installed
+                DB's ETag or Last-Modified still matches upstream.
+
+        Returns:
+            bool: `False` if a conditional download was skipped.
+        """
+        import urllib.request
+        from http.client import HTTPException
+        from urllib.error import HTTPError, URLError
+        
+        os.makedirs(os.path.dirname(self.database), exist_ok=True)
+        
+        offset = 0
+        validator = None
+        if os.path.exists(self.download_path):
+            validator = self.get_resume_validator()
+            # Without a validator, the rest of the file may not match the start
+            if validator:
+                offset = os.path.getsize(self.download_path)
+        
+        request = urllib.request.Request(self.url)
+        if offset:
+            request.add_header('Range', f'bytes={offset}-')
+            # Upstream sends the whole file instead if it's changed
+            request.add_header('If-Range', validator)
+        
+        if conditional:
+            metadata = self.get_download_metadata()
+            
+            if 'etag' in metadata:
+                request.add_header('If-None-Match', metadata['etag'])
+            if 'last_modified' in metadata:
+                request.add_header('If-Modified-Since', metadata['last_modified'])
+        
         try:
-            urllib.request.urlretrieve(url, self.database)
-            return f"Downloaded: {self.database}"
+            response = urllib.request.urlopen(request)
+        
+        except HTTPError as ex:
+            if ex.code == 304 and conditional:
+                return False
+            
+            # Partial download is already complete or no longer matches
+            if ex.code == 416 and offset:
+                self.remove_download()
+                return self.download_raw_bible(progress, conditional)
             
-        except HTTPError:
-            link = "https://github.com/jstadnik619/bible_databases?tab=readme-ov-file#available-translations-140"
             msg = (
                 f"Translation '{self.translation}' does not exist.\n"
-                f"Check the following link for available translations:\n{link}"
+                f"Check the following link for available translations:\n{TRANSLATIONS_LINK}"
             )
             raise BibleInputError(msg)
+        
+        except URLError as ex:
+            raise BibleInputError(
+                f"Download of '{self.translation}' failed: {ex.reason}"
+            )
+        
+        with response:
+            # The server ignored the Range header, or the file changed upstream
+            if response.status != 206:
+                offset = 0
+            
+            length = response.headers.get('Content-Length')
+            total = offset + int(length) if length else None
+            downloaded = offset
+            
+            self.download_metadata = {
+                'etag': response.headers.get('ETag'),
+                'last_modified': response.headers.get('Last-Modified'),
+            }
+            start = time.monotonic()
+            
+            try:
+                if not offset:
+                    with open(self.download_validator_path, 'w') as file:
+                        json.dump(self.download_metadata, file)
+                
+                with open(self.download_path, 'ab' if offset else 'wb') as file:
+                    while chunk := response.read(DOWNLOAD_CHUNK_SIZE):
+                        file.write(chunk)
+                        downloaded += len(chunk)
+                        
+                        if progress:
+                            progress(downloaded, total, time.monotonic() - start)
+            
+            except (HTTPException, OSError):
+                raise BibleInputError(
+                    f"Download of '{self.translation}' was interrupted. "
+                    "Run the command again to resume it."
+                )
+        
+        if total is not None and downloaded < total:
+            raise BibleInputError(
+                f"Download of '{self.translation}' was interrupted. "
+                "Run the command again to resume it."
+            )
+        
+        self.download_metadata['size'] = str(downloaded)
+        return True
+    
+    def get_download_metadata(self):
+        """Get the validators and size stored when the DB was downloaded.
+        """
+        if not os.path.exists(self.database):
+            return {}
+        
+        try:
+            rows = self.get_bible_cursor().execute(
+                "SELECT key, value FROM metadata;"
+            ).fetchall()
+        # Installed before metadata was recorded
+        except sqlite3.OperationalError:
+            return {}
+        
+        return {row['key']: row['value'] for row in rows}
+    
+    @property
+    def connection(self):
+        """The calling thread's connection to the translation DB.
+        """
+        conn = getattr(self._local, 'conn', None)
+        
+        if conn is None:
+            conn = connect(self.database)
+            self.upgrade_bible_db(conn)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        
+        return conn
     
-    # TODO: Close out the conn when it's released
     def get_bible_cursor(self):
-        conn = sqlite3.connect(self.database)
-        conn.row_factory = sqlite3.Row
-        # TODO: Use context manager?
-        return conn.cursor()
+        return self.connection.cursor()
     
-    def rename_tables(self):
-        """Rename tables for consistent schema across downloaded translations.
+    @property
+    def pack(self):
+        """The memory-mapped verse pack, or `None` if there isn't one.
         """
-        cursor = self.get_bible_cursor()
+        if self._pack is None and os.path.exists(self.pack_path):
+            with self._lock:
+                if self._pack is None:
+                    try:
+                        self._pack = VersePack(self.pack_path)
+                    # Fall back to SQLite for packs from other versions, until
+                    # the translation is installed again
+                    except (ValueError, OSError):
+                        self._pack = UNAVAILABLE_PACK
         
+        return None if self._pack is UNAVAILABLE_PACK else self._pack
+    
+    def close(self):
+        """Close every connection and the verse pack opened by this client.
+        """
+        with self._lock:
+            for conn in self._connections:
+                conn.close()
+            self._connections.clear()
+            self._local = threading.local()
+            
+            if self._pack is not None and self._pack is not UNAVAILABLE_PACK:
+                self._pack.close()
+            self._pack = None
+    
+    def rename_tables(self, cursor):
+        """Rename tables for consistent schema across downloaded translations.
+        """
         tables = ['books', 'verses']
         for table in tables:
             # SQLite doesn't bind parameters for schema objects
             sql = f"ALTER TABLE {self.translation}_{table} RENAME TO {table};"
             cursor.execute(sql)
     
-    def create_abbreviations_table(self):
-        cursor = self.get_bible_cursor()
-
-        cursor.execute(f"""
+    def create_abbreviations_table(self, cursor):
+        cursor.execute("""
         CREATE TABLE IF NOT EXISTS abbreviations (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             book_id INTEGER,
@@ -92,44 +462,31 @@ class BibleClient:
         );
         """)
         
-        books_to_abbreviations = {}
+        books = cursor.execute("SELECT id, name FROM books;").fetchall()
+        book_ids = {name: book_id for book_id, name in books}
+        books_to_abbreviations = load_book_abbreviations()
         
-        with open(f'{get_source_root()}/data/book_abbreviations.json') as file:
-            books_to_abbreviations = dict(json.load(file))
-    
-        # Create a conn to commit inserts and close 
-        conn = sqlite3.connect(self.database)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        for book, abbreviations in books_to_abbreviations.items():
-            for abbreviation in abbreviations:
-                params = {
-                    'abbreviation': abbreviation,
-                    'book': book,
-                }
-                
-                cursor.execute(f"""
-                INSERT INTO abbreviations (abbreviation, book_id)
-                SELECT :abbreviation, books.id
-                FROM books
-                WHERE books.name = :book;
-                """, params)
+        # Skip books missing from the translation, eg. OT in an NT-only Bible
+        params = [
+            (abbreviation, book_ids[book])
+            for book, abbreviations in books_to_abbreviations.items()
+            if book in book_ids
+            for abbreviation in abbreviations
+        ]
         
-        conn.commit()
-        conn.close()
-
-    def create_resource_tables(self):
-        cursor = self.get_bible_cursor()
+        cursor.executemany("""
+        INSERT INTO abbreviations (abbreviation, book_id) VALUES (?, ?);
+        """, params)
 
-        cursor.execute(f"""
+    def create_resource_tables(self, cursor):
+        cursor.execute("""
         CREATE TABLE IF NOT EXISTS resources (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             name TEXT
         );
         """)
         
-        cursor.execute(f"""
+        cursor.execute("""
         CREATE TABLE IF NOT EXISTS resources_abbreviations (
             id INTEGER PRIMARY KEY AUTOINCREMENT,
             resource_id INTEGER,
@@ -137,70 +494,352 @@ class BibleClient:
         );
         """)
         
-        # Create a conn to commit inserts and close 
-        conn = sqlite3.connect(self.database)
-        cursor = conn.cursor()
-        
         # TODO: Insert STEP Bible dynamically
-        resource='STEP Bible'
-        cursor.execute(f"""
+        cursor.execute("""
         INSERT INTO resources (name) VALUES (
             'STEP Bible'
         );
         """)
         
-        conn.commit()
-        conn.close()
+        params = [
+            (abbreviation.lower(),) for abbreviation in import_resource_books()
+        ]
         
-        abbreviations = import_resource_books()
+        # TODO: Select STEP Bible id dynamically
+        cursor.executemany("""
+        INSERT INTO resources_abbreviations (resource_id, abbreviation_id)
+        SELECT 1, abbreviations.id
+        FROM abbreviations
+        WHERE abbreviations.abbreviation = ?;
+        """, params)
+    
+    def create_fts_verses_table(self, cursor, mode='exact'):
+        """Index the verse text for search.
+
+        The index reads verses from the `verses` table (external content)
+        rather than storing a copy, and only the text is tokenized. Matches
+        share the verse's ordinal as their rowid, so results sort in
+        canonical order and line up across translations.
+
+        Args:
+            mode (str, optional): Search mode to index, see `SEARCH_INDEXES`.
+        """
+        table, tokenize = SEARCH_INDEXES[mode]
         
-        conn = sqlite3.connect(self.database)
-        cursor = conn.cursor()
+        if tokenize == 'trigram' and sqlite3.sqlite_version_info < TRIGRAM_SQLITE_VERSION:
+            raise BibleInputError(
+                f"Substring search needs SQLite {'.'.join(map(str, TRIGRAM_SQLITE_VERSION))} "
+                f"or later, but Python uses SQLite {sqlite3.sqlite_version}."
+            )
         
-        for abbreviation in abbreviations:
-            params = {
-                'abbreviation': abbreviation.lower(),
-            }
-            
-            # TODO: Select STEP Bible id dynamically
-            cursor.execute(f"""
-            INSERT INTO resources_abbreviations (resource_id, abbreviation_id)
-            SELECT 1, abbreviations.id
-            FROM abbreviations
-            WHERE abbreviations.abbreviation = :abbreviation;
-            """, params)
+        tokenize = f",\n            tokenize='{tokenize}'" if tokenize else ""
+        
+        # Verses never change once installed, so no triggers keep it in sync
+        cursor.execute(f"""
+        CREATE VIRTUAL TABLE {table} USING fts5(
+            book_id UNINDEXED,
+            chapter UNINDEXED,
+            verse UNINDEXED,
+            text,
+            content='verses',
+            content_rowid='ordinal'{tokenize}
+        );
+        """)
         
-        conn.commit()
-        conn.close()
+        cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('rebuild');")
+        # Merge the index into a single segment
+        cursor.execute(f"INSERT INTO {table} ({table}) VALUES ('optimize');")
     
-    def create_fts_verses_table(self):
-        cursor = self.get_bible_cursor()
+    def create_vocabulary_tables(self, cursor):
+        """Expose the search index's vocabulary for the concordance.
+
+        `fts_vocab` holds every word with the number of verses it's in and
+        its number of occurrences, and `fts_vocab_instance` every occurrence
+        with its verse's ordinal. Neither stores anything; both are read
+        straight from the index.
+        """
+        cursor.execute("""
+        CREATE VIRTUAL TABLE IF NOT EXISTS fts_vocab USING fts5vocab(fts_verses, 'row');
+        """)
         cursor.execute("""
-        CREATE VIRTUAL TABLE fts_verses
-            USING fts5(book_id, chapter, verse, text);
+        CREATE VIRTUAL TABLE IF NOT EXISTS fts_vocab_instance USING fts5vocab(fts_verses, 'instance');
         """)
+    
+    def get_search_indexes(self, cursor=None):
+        """Search modes whose index is built, eg. `['exact', 'stem']`.
+        """
+        cursor = cursor or self.get_bible_cursor()
+        tables = {
+            row[0] for row in cursor.execute(
+                "SELECT name FROM sqlite_master WHERE type = 'table';"
+            )
+        }
+        
+        return [mode for mode, (table, _) in SEARCH_INDEXES.items() if table in tables]
+    
+    def create_search_index(self, mode):
+        """Build the index of a search mode, unless it's built already.
 
-        conn = sqlite3.connect(self.database)
+        Returns:
+            bool: `True` if the index was built.
+        """
+        if mode not in SEARCH_INDEXES:
+            raise BibleInputError(f"Invalid search {mode=}.")
+        
+        conn = self.connection
         cursor = conn.cursor()
+        
+        if mode in self.get_search_indexes(cursor):
+            return False
+        
+        # Lock out other processes, then check again in case one got here first
+        cursor.execute("BEGIN IMMEDIATE;")
+        
+        try:
+            if mode in self.get_search_indexes(cursor):
+                conn.rollback()
+                return False
+            
+            self.create_fts_verses_table(cursor, mode)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        return True
+    
+    def create_reference_indexes(self, cursor):
+        """Key verses by their ordinal, so any reference, even one spanning
+        chapters, is a single range scan of the table.
+        """
+        cursor.execute("""
+        CREATE TABLE verses_by_ordinal (
+            ordinal INTEGER PRIMARY KEY,
+            book_id INTEGER,
+            chapter INTEGER,
+            verse INTEGER,
+            text TEXT
+        );
+        """)
+        
+        # Keep the first copy of a verse listed twice
+        cursor.execute("""
+        INSERT OR IGNORE INTO verses_by_ordinal
+        SELECT book_id * 1000000 + chapter * 1000 + verse, book_id, chapter, verse, text
+        FROM verses
+        ORDER BY 1;
+        """)
+        
+        cursor.execute("DROP TABLE verses;")
+        cursor.execute("ALTER TABLE verses_by_ordinal RENAME TO verses;")
+        
         cursor.execute("""
-        INSERT INTO fts_verses (book_id, chapter, verse, text)
-        SELECT book_id, chapter, verse, text FROM verses;
+        CREATE INDEX IF NOT EXISTS books_name_idx ON books (name);
         """)
-        conn.commit()
-        conn.close()
     
-    def create_bible_db(self):
-        output = self.download_raw_bible()
-        self.rename_tables()
-        self.create_abbreviations_table()
-        self.create_resource_tables()
-        self.create_fts_verses_table()
-        return output
+    def create_metadata_table(self, cursor, metadata):
+        cursor.execute("""
+        CREATE TABLE IF NOT EXISTS metadata (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        );
+        """)
+        
+        params = [(key, value) for key, value in metadata.items() if value]
+        
+        cursor.executemany("""
+        INSERT OR REPLACE INTO metadata (key, value) VALUES (?, ?);
+        """, params)
+    
+    def build_bible_db(self, database, metadata=None, indexes=()):
+        """Convert a raw download to Berea's schema in a single transaction.
+
+        Args:
+            database (str): Path of the raw download, converted in place.
+            metadata (dict, optional): Download validators to store in the
+                `metadata` table. Defaults to `download_metadata`.
+            indexes (list, optional): Search modes to index besides `exact`,
+                eg. `['stem']`.
+        """
+        if metadata is None:
+            metadata = self.download_metadata
+        
+        conn = connect(database)
+        cursor = conn.cursor()
+        
+        try:
+            # A failed build is thrown away, so skip the rollback journal and
+            # fsyncs until the final commit
+            cursor.execute("PRAGMA journal_mode = OFF;")
+            cursor.execute("PRAGMA synchronous = OFF;")
+            cursor.execute("BEGIN;")
+            
+            self.rename_tables(cursor)
+            self.create_abbreviations_table(cursor)
+            self.create_resource_tables(cursor)
+            self.create_reference_indexes(cursor)
+            self.create_fts_verses_table(cursor)
+            self.create_vocabulary_tables(cursor)
+            
+            for mode in dict.fromkeys(indexes):
+                if mode != 'exact':
+                    self.create_fts_verses_table(cursor, mode)
+            
+            self.create_metadata_table(cursor, metadata)
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
+            conn.commit()
+            
+            # Drop the pages freed by replacing the raw verses table
+            cursor.execute("VACUUM;")
+            
+            # Restore durable settings for later writes
+            cursor.execute("PRAGMA journal_mode = DELETE;")
+            cursor.execute("PRAGMA synchronous = FULL;")
+            cursor.execute("PRAGMA optimize;")
+            
+            build_pack(cursor, f"{self.pack_path}.build")
+        finally:
+            conn.close()
+        
+        fd = os.open(database, os.O_RDONLY)
+        try:
+            os.fsync(fd)
+        finally:
+            os.close(fd)
+    
+    def upgrade_bible_db(self, conn):
+        """Upgrade a DB installed by an older version to `SCHEMA_VERSION`.
+        """
+        if conn.execute("PRAGMA user_version;").fetchone()[0] >= SCHEMA_VERSION:
+            return
+        
+        cursor = conn.cursor()
+        # Lock out other processes, then check again in case one got here first
+        cursor.execute("BEGIN IMMEDIATE;")
+        
+        try:
+            version = cursor.execute("PRAGMA user_version;").fetchone()[0]
+            verses = cursor.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'verses';"
+            ).fetchone()
+            
+            # Not a translation DB, eg. an empty file
+            if not verses or version >= SCHEMA_VERSION:
+                conn.rollback()
+                return
+            
+            # Versions 0 and 1 kept a full copy of the verses in the FTS index,
+            # and version 1 another in an index on the ordinal
+            if version < 2:
+                cursor.execute("DROP TABLE IF EXISTS fts_verses;")
+                cursor.execute("DROP INDEX IF EXISTS verses_reference_idx;")
+                cursor.execute("DROP INDEX IF EXISTS verses_ordinal_idx;")
+                self.create_reference_indexes(cursor)
+                self.create_fts_verses_table(cursor)
+            
+            if version < 3:
+                self.create_vocabulary_tables(cursor)
+            
+            cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION};")
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        
+        if version >= 2:
+            return
+        
+        # Give the dropped copies' space back to the file system
+        try:
+            cursor.execute("VACUUM;")
+        # Another connection is reading the DB; SQLite reuses free pages anyway
+        except sqlite3.OperationalError:
+            pass
+    
+    def stage_download(self):
+        """Move a finished download to `build_path`, ready to be built.
+        """
+        if not is_sqlite_file(self.download_path):
+            self.remove_download()
+            raise BibleInputError(
+                f"Download of '{self.translation}' is not a valid database."
+            )
+        
+        os.replace(self.download_path, self.build_path)
+        self.remove_download()
+    
+    def install_build(self):
+        """Move a built DB into place as the installed translation.
+        """
+        # Release connections to a previously installed copy before replacing it
+        self.close()
+        discard_book_resolver(self.database)
+        os.replace(self.build_path, self.database)
+        self.invalidate_search_cache()
+        
+        if os.path.exists(f"{self.pack_path}.build"):
+            os.replace(f"{self.pack_path}.build", self.pack_path)
+        
+        return f"Downloaded: {self.database}"
+    
+    def create_bible_db(self, progress=None, indexes=()):
+        """Download and build the translation DB.
+
+        The DB is only moved into place once the build succeeds, so an
+        interrupted install never looks like a downloaded translation.
+        Search indexes of a DB being replaced are rebuilt with it.
+        """
+        self.download_raw_bible(progress)
+        self.stage_download()
+        
+        try:
+            self.build_bible_db(self.build_path, indexes=self.get_rebuilt_indexes(indexes))
+        except Exception:
+            self.discard_build()
+            raise
+        
+        return self.install_build()
+    
+    def get_rebuilt_indexes(self, indexes=()):
+        """Search modes to index in a new build: the ones requested, plus the
+        ones the installed DB has, if any.
+        """
+        if not os.path.exists(self.database):
+            return list(indexes)
+        
+        installed = self.get_search_indexes()
+        self.close()
+        
+        return list(dict.fromkeys([*indexes, *installed]))
+    
+    def discard_build(self):
+        for path in [self.build_path, f"{self.pack_path}.build"]:
+            if os.path.exists(path):
+                os.remove(path)
     
     def delete_translation(self):
+        self.close()
+        discard_book_resolver(self.database)
         os.remove(self.database)
+        self.invalidate_search_cache()
+        
+        if os.path.exists(self.pack_path):
+            os.remove(self.pack_path)
         return f"Deleted translation '{self.translation}'."
     
+    def get_database_fingerprint(self):
+        """Identify the installed DB by its inode, size and modification time,
+        which change whenever it's replaced or written to.
+        """
+        stat = os.stat(self.database)
+        return f"{stat.st_ino}:{stat.st_size}:{stat.st_mtime_ns}"
+    
+    def invalidate_search_cache(self):
+        if self.search_cache:
+            self.search_cache.invalidate(self.translation)
+        else:
+            invalidate_search_cache(self.translation)
+    
     def get_book_abbreviation_by_resource(self, book, resource):
         """Get a book's abbreviation used by a specific resource.
         """
@@ -224,30 +863,39 @@ class BibleClient:
         # STEP Bible abbreviations are in title case
         return cursor.fetchone()[0].title()
     
-    def get_book_from_abbreviation(self, book):
-        cleaned_book_name = clean_book_name(book)
-        cursor = self.get_bible_cursor()
+    def load_books(self):
+        if self.pack:
+            return self.pack.books
         
-        # Use full book name if that was passed in
-        book_row = cursor.execute(
-            """SELECT * FROM books WHERE books.name = ?;""",
-            (cleaned_book_name,)).fetchone()
-        
-        if book_row:
-            return cleaned_book_name
+        cursor = self.get_bible_cursor()
+        return cursor.execute("SELECT id, name FROM books;").fetchall()
+    
+    @property
+    def book_resolver(self):
+        """Book name resolver shared by every client of this translation.
+        """
+        return get_book_resolver(self.database, self.load_books)
+    
+    def get_book_from_abbreviation(self, book):
+        """Get the full book name from a name, abbreviation or unique prefix.
+        """
+        name = self.book_resolver.resolve(book)
         
-        # Get full book name using abbreviation
+        if name:
+            return name
         else:
-            book_row = cursor.execute("""
-            SELECT * FROM books
-            JOIN abbreviations ON abbreviations.book_id = books.id
-            WHERE abbreviations.abbreviation = ?;
-            """, (book,)).fetchone()
-            
-            if book_row:
-                return book_row['name']
-            else:
-                raise BibleInputError(f"Invalid input {book=}.")
+            raise BibleInputError(f"Invalid input {book=}.")
+    
+    def get_book_id(self, book):
+        return self.book_resolver.ids[book]
+    
+    def get_scope(self, scope):
+        """Compile a search scope, eg. `gospels` or `Gen-Deut`, to book ID ranges.
+        """
+        try:
+            return resolve_scope(scope, self.book_resolver, self.scopes)
+        except ValueError as ex:
+            raise BibleInputError(str(ex))
     
     # TODO: Link format depends on resource
     def create_link(self, book, chapter=None, verse=None, resource='STEP Bible'):
@@ -259,11 +907,21 @@ class BibleClient:
             # Parse verses if multiple provided
             if '-' in verse:
                 verse_start, verse_end = parse_verses_str(verse)
-                link = f"https://www.stepbible.org/?q=version={self.translation}@reference={book_abbrev}.{chapter}.{verse_start}-{book_abbrev}.{chapter}.{verse_end}&options=NVHUG"
+                chapter_end = chapter
+                
+                # Range ending in a later chapter, eg. 1-2:3
+                if ':' in verse_end:
+                    chapter_end, verse_end = verse_end.split(':')
+                
+                link = f"https://www.stepbible.org/?q=version={self.translation}@reference={book_abbrev}.{chapter}.{verse_start}-{book_abbrev}.{chapter_end}.{verse_end}&options=NVHUG"
                 
             else:
                 link = f"https://www.stepbible.org/?q=version={self.translation}@reference={book_abbrev}.{chapter}.{verse}&options=NVHUG"
         
+        elif chapter and '-' in chapter:
+            chapter_start, chapter_end = chapter.split('-')
+            link = f"https://www.stepbible.org/?q=version={self.translation}@reference={book_abbrev}.{chapter_start}-{book_abbrev}.{chapter_end}&options=NVHUG"
+        
         elif chapter:
             link = f"https://www.stepbible.org/?q=version={self.translation}@reference={book_abbrev}.{chapter}&options=NVHUG"
         
@@ -273,64 +931,49 @@ class BibleClient:
 
         return link
 
-    def get_verses_by_book(self, book):
-        cursor = self.get_bible_cursor()
-        book = self.get_book_from_abbreviation(book)
-        params = {'book': book}
-    
-        cursor.execute("""
-        SELECT verse, text FROM verses
-        JOIN books ON verses.book_id = books.id
-        WHERE books.name = :book
-        """, params)
+    def get_reference(self, book, chapter=None, verse=None):
+        """Get the verses of a book, chapter, chapter range or verse range.
+
+        The reference is converted to a range of ordinals, so it's a single
+        scan of the pack or the ordinal index.
 
-        verse_records = cursor.fetchall()
+        Args:
+            book (str): Full book name.
+            chapter (str, optional): A chapter or chapter range, eg. `5-7`.
+            verse (str, optional): A verse or verse range, eg. `16-18` or `1-2:3`.
+        """
+        try:
+            ordinals = reference_ordinals(self.get_book_id(book), chapter, verse)
+        except ValueError:
+            raise reference_error(book, chapter, verse)
+        
+        if self.pack:
+            return self.pack.get_range(*ordinals)
         
-        return verse_records
+        return self.get_verse_ranges([ordinals])[0]
+    
+    def get_verses_by_book(self, book):
+        book = self.get_book_from_abbreviation(book)
+        return self.get_reference(book)
 
     # TODO: Validate chapter?
     def get_verses_by_chapter(self, book, chapter):
-        cursor = self.get_bible_cursor()
         book = self.get_book_from_abbreviation(book)
-        params = {'book': book, 'chapter': chapter}
-        
-        cursor.execute("""
-        SELECT verse, text FROM verses
-        JOIN books ON verses.book_id = books.id
-        WHERE books.name = :book
-        AND chapter = :chapter
-        """, params)
-
-        verse_records = cursor.fetchall()
+        verse_records = self.get_reference(book, chapter)
         
         if len(verse_records) == 0:
-            raise BibleInputError(f"Invalid chapter: {book} {chapter}.")
+            raise reference_error(book, chapter)
         
         else:
             return verse_records
 
     # TODO: Validate chapter?
     def get_verse(self, book, chapter, verse):
-        cursor = self.get_bible_cursor()
         book = self.get_book_from_abbreviation(book)
-        params = {
-            'book': book,
-            'chapter': chapter,
-            'verse': verse
-        }
-        
-        cursor.execute("""
-        SELECT verse, text FROM verses
-        JOIN books ON verses.book_id = books.id
-        WHERE books.name = :book
-        AND chapter = :chapter
-        AND verse = :verse
-        """, params)
-
-        verse_records = cursor.fetchall()
+        verse_records = self.get_reference(book, chapter, verse)
         
         if len(verse_records) == 0:
-            raise BibleInputError(f"Invalid verse: {book} {chapter}:{verse}.")
+            raise reference_error(book, chapter, verse)
         
         else:
             return verse_records
@@ -338,170 +981,789 @@ class BibleClient:
     # TODO: Validate chapter?
     def get_verses(self, book, chapter, verse):
         """
-        Print a range of verses, eg. 5-7. 
+        Print a range of verses, eg. 5-7 or 1-2:3. 
         """
-        cursor = self.get_bible_cursor()
-        book = self.get_book_from_abbreviation(book)
-        verse_start, verse_end = parse_verses_str(verse)
+        return self.get_verse(book, chapter, verse)
+
+    def get_passages(self, references):
+        """Get several passages, fetching all of them in a single query.
+
+        Args:
+            references (str | list): References separated by semicolons,
+                eg. `John 3:16; Rom 8:28-30; Ps 23; Matt 5-7`, or a list of them.
+
+        Returns:
+            list: `((book, chapter, verse), verse_records)` in the order
+                requested, with the full book name.
+        """
+        if isinstance(references, str):
+            references = [references]
         
-        params = {
-            'book': book,
-            'chapter': chapter,
-            'verse_start': verse_start,
-            'verse_end': verse_end,
-        }
+        passages = []
+        ranges = []
         
-        cursor.execute("""
-        SELECT verse, text FROM verses
-        JOIN books ON verses.book_id = books.id
-        WHERE books.name = :book
-        AND chapter = :chapter
-        AND verse BETWEEN :verse_start AND :verse_end
+        for book, chapter, verse in (
+            parsed for text in references for parsed in parse_references(text)
+        ):
+            book = self.get_book_from_abbreviation(book)
+            
+            try:
+                ranges.append(reference_ordinals(self.get_book_id(book), chapter, verse))
+            except ValueError:
+                raise reference_error(book, chapter, verse)
+            
+            passages.append((book, chapter, verse))
+        
+        if self.pack:
+            passage_records = [self.pack.get_range(*ordinals) for ordinals in ranges]
+        else:
+            passage_records = self.get_verse_ranges(ranges)
+        
+        for (book, chapter, verse), verse_records in zip(passages, passage_records):
+            if chapter and not verse_records:
+                raise reference_error(book, chapter, verse)
+        
+        return list(zip(passages, passage_records))
+    
+    def get_verse_ranges(self, ranges):
+        """Fetch verse ranges in one query.
+
+        Args:
+            ranges (list): `(first, last)` verse ordinals, see `reference_ordinals`.
+
+        Returns:
+            list: Verse records for each range.
+        """
+        if not ranges:
+            return []
+        
+        params = [
+            param
+            for position, (first, last) in enumerate(ranges)
+            for param in (position, first, last)
+        ]
+        values = ', '.join(['(?, ?, ?)'] * len(ranges))
+        
+        cursor = self.get_bible_cursor()
+        cursor.execute(f"""
+        WITH refs (position, first, last) AS (VALUES {values})
+        SELECT refs.position, verses.verse, verses.text
+        FROM refs
+        JOIN verses ON verses.ordinal BETWEEN refs.first AND refs.last
+        ORDER BY refs.position, verses.ordinal;
         """, params)
+        
+        passage_records = [[] for _ in ranges]
+        
+        for row in cursor:
+            passage_records[row['position']].append(row)
+        
+        return passage_records
 
-        verse_records = cursor.fetchall()
+    def attach_translation(self, translation):
+        """Attach another translation's DB to the calling thread's connection.
+
+        Returns:
+            str: The quoted schema name to prefix its tables with.
+        """
+        if translation == self.translation:
+            return 'main'
         
-        if len(verse_records) == 0:
+        # ATTACH would create an empty DB, or open one outside the translations
+        if not is_translation_downloaded(translation):
+            raise BibleInputError(f"Translation '{translation}' is not downloaded.")
+        
+        conn = self.connection
+        # The fingerprint of each attached DB, by translation
+        attached = self._local.__dict__.setdefault('attached', {})
+        # SQLite doesn't bind parameters for schema names
+        schema = '"' + translation.replace('"', '""') + '"'
+        other = BibleClient(translation)
+        
+        if translation in attached:
+            if attached[translation] == other.get_database_fingerprint():
+                return schema
+            
+            # Reinstalled since, so the attached file is the old one
+            conn.execute(f"DETACH DATABASE {schema};")
+            del attached[translation]
+        
+        if len(attached) >= MAX_ATTACHED:
             raise BibleInputError(
-                f"Invalid verses: {book} "
-                f"{chapter}:{verse_start}-{verse_end}."
+                f"Can't compare more than {MAX_ATTACHED} other translations at once."
             )
         
-        else:
-            return verse_records
-
-    def search_bible(self, phrase):
-        cursor = self.get_bible_cursor()
+        # Upgrade older installs before they're read through this connection
+        with other:
+            other.connection
         
-        # TODO: Order by rank?
-        cursor.execute("""
-        SELECT
-            books.name AS book,
-            chapter,
-            verse,
-            highlight(fts_verses, 3, '<b>', '</b>') AS text
-        FROM fts_verses
-        JOIN books ON fts_verses.book_id = books.id
-        WHERE fts_verses MATCH ?;
-        """, (phrase,))
+        conn.execute(f"ATTACH DATABASE ? AS {schema};", (other.database,))
+        attached[translation] = other.get_database_fingerprint()
         
-        return cursor.fetchall()
+        return schema
     
-    def search_testament(self, phrase, testament):
+    def compare_passages(self, references, translations):
+        """Get passages from several translations, aligned by verse.
+
+        The other translations' DBs are attached to this client's connection
+        and every passage is fetched with a single query.
+
+        Args:
+            references (str | list): References, as for `get_passages`.
+            translations (list): Translations to compare, eg. `['KJV', 'BSB']`.
+                This client's translation is only included if listed.
+
+        Returns:
+            list: `((book, chapter, verse), verse_records)` in the order
+                requested, where each record holds the `chapter`, `verse` and
+                `texts` of the verse, with a text (or `None`) per translation.
+        """
+        if isinstance(references, str):
+            references = [references]
+        
+        schemas = [self.attach_translation(translation) for translation in translations]
+        passages = []
+        params = []
+        
+        for position, (book, chapter, verse) in enumerate(
+            parsed for text in references for parsed in parse_references(text)
+        ):
+            book = self.get_book_from_abbreviation(book)
+            
+            try:
+                first, last = reference_ordinals(self.get_book_id(book), chapter, verse)
+            except ValueError:
+                raise reference_error(book, chapter, verse)
+            
+            passages.append((book, chapter, verse))
+            params += [position, first, last]
+        
+        values = ', '.join(['(?, ?, ?)'] * len(passages))
+        # A verse missing from some translations is still aligned with the rest
+        ordinals = '\n            UNION\n'.join(
+            f"""            SELECT refs.position, verses.ordinal FROM refs
+            JOIN {schema}.verses AS verses
+            ON verses.ordinal BETWEEN refs.first AND refs.last"""
+            for schema in dict.fromkeys(schemas)
+        )
+        texts = ', '.join(f"t{i}.text" for i in range(len(schemas)))
+        joins = '\n        '.join(
+            f"LEFT JOIN {schema}.verses AS t{i} ON t{i}.ordinal = ordinals.ordinal"
+            for i, schema in enumerate(schemas)
+        )
+        
         cursor = self.get_bible_cursor()
+        cursor.execute(f"""
+        WITH refs (position, first, last) AS (VALUES {values}),
+        ordinals (position, ordinal) AS (
+{ordinals}
+        )
+        SELECT ordinals.position, ordinals.ordinal, {texts}
+        FROM ordinals
+        {joins}
+        ORDER BY ordinals.position, ordinals.ordinal;
+        """, params)
         
-        new_testament = [
-            'Matthew',
-            'Mark',
-            'Luke',
-            'John',
-            'Acts',
-            'Romans',
-            'I Corinthians',
-            'II Corinthians',
-            'Galatians',
-            'Ephesians',
-            'Philippians',
-            'Colossians',
-            'I Thessalonians',
-            'II Thessalonians',
-            'I Timothy',
-            'II Timothy',
-            'Titus',
-            'Philemon',
-            'Hebrews',
-            'James',
-            'I Peter',
-            'II Peter',
-            'I John',
-            'II John',
-            'III John',
-            'Jude',
-            'Revelation of John'
-        ]
+        passage_records = [[] for _ in passages]
+        
+        for position, ordinal, *verse_texts in cursor:
+            _, chapter, verse = split_ordinal(ordinal)
+            passage_records[position].append(
+                {'chapter': chapter, 'verse': verse, 'texts': verse_texts}
+            )
+        
+        for (book, chapter, verse), verse_records in zip(passages, passage_records):
+            if chapter and not verse_records:
+                raise reference_error(book, chapter, verse)
+        
+        return list(zip(passages, passage_records))
 
-        nt_sql_list = list_to_sql(new_testament)
-
-        if testament == 'nt':
-            sql = f"""
-            SELECT
-                books.name AS book,
-                chapter,
-                verse,
-                highlight(fts_verses, 3, '<b>', '</b>') AS text
-            FROM fts_verses
-            JOIN books ON fts_verses.book_id = books.id
-            WHERE fts_verses MATCH ?
-            AND books.name IN {nt_sql_list};
-            """
-        
-        elif testament == 'ot': 
-            sql = f"""
-            SELECT
-                books.name AS book,
-                chapter,
-                verse,
-                highlight(fts_verses, 3, '<b>', '</b>') AS text
-            FROM fts_verses
-            JOIN books ON fts_verses.book_id = books.id
-            WHERE fts_verses MATCH ?
-            AND books.name NOT IN {nt_sql_list};
-            """
+    def search_filter(
+        self,
+        testament=None,
+        book=None,
+        chapter=None,
+        scope=None,
+        column='fts_verses.rowid'
+    ):
+        """SQL conditions limiting a search to a testament, book, chapter or scope.
+
+        Every limit compiles to ranges of verse ordinals, which FTS5 checks
+        against the rowids of its matches without reading their verses.
+
+        Args:
+            column (str, optional): The column holding the ordinals.
+
+        Returns:
+            tuple: The conditions, to follow a `WHERE` clause, and their params.
+        """
+        if chapter:
+            book_id = self.get_book_id(self.get_book_from_abbreviation(book))
+            
+            try:
+                chapter = int(chapter)
+            except ValueError:
+                raise BibleInputError(f"Invalid {chapter=}.")
+            
+            ranges = [(
+                verse_ordinal(book_id, chapter, 0),
+                verse_ordinal(book_id, chapter, MAX_NUMBER),
+            )]
         
-        else:
+        elif book:
+            book_id = self.get_book_id(self.get_book_from_abbreviation(book))
+            ranges = book_ordinal_ranges([(book_id, book_id)])
+        
+        elif testament in ('nt', 'ot'):
+            ranges = book_ordinal_ranges(SCOPES[testament])
+        
+        elif testament:
             raise BibleInputError(f"Invalid {testament=}.")
         
-        # Bind phrase since it's user input
-        cursor.execute(sql, (phrase,))
-        return cursor.fetchall()
+        elif scope:
+            ranges = book_ordinal_ranges(self.get_scope(scope))
+        
+        else:
+            return "", {}
+        
+        # A single range is pushed down into FTS5, which then skips straight
+        # to the first rowid in it
+        conditions = " OR ".join(
+            f"{column} BETWEEN :first_{i} AND :last_{i}" for i in range(len(ranges))
+        )
+        params = {}
+        
+        for i, (first, last) in enumerate(ranges):
+            params[f'first_{i}'] = first
+            params[f'last_{i}'] = last
+        
+        return f"AND ({conditions})", params
     
-    def search_book(self, phrase, book):
-        cursor = self.get_bible_cursor()
+    def iter_search(
+        self,
+        phrase,
+        testament=None,
+        book=None,
+        chapter=None,
+        scope=None,
+        rank=False,
+        limit=None,
+        after=None,
+        offset=0,
+        mode='exact'
+    ):
+        """Search the whole Bible, a testament, a book, a chapter or a scope.
 
-        book = self.get_book_from_abbreviation(book)
-        params = {
-            'phrase': phrase,
-            'book': book
-        }
+        Matches are in canonical order, or best first by BM25 when ranked.
+        Only `limit` matches are highlighted and fetched, so the first page
+        of a common word is as fast as a rare one.
+
+        Args:
+            phrase (str): FTS5 query.
+            testament (str, optional): `nt` or `ot`.
+            book (str, optional): Book to search.
+            chapter (str, optional): Chapter of `book` to search.
+            scope (str, optional): Named scope, books or ranges of books to
+                search, eg. `gospels` or `Gen-Deut`, see `get_scope`.
+            rank (bool, optional): Order by BM25 instead of canonical order.
+            limit (int, optional): Maximum number of matches.
+            after (int | tuple, optional): Keyset pagination cursor from
+                `search_cursor`; only matches after it are returned.
+            offset (int, optional): Matches to skip, eg. for a page number.
+            mode (str, optional): `exact`, `stem` or `substring`, see
+                `SEARCH_INDEXES`. Its index is built if it isn't already.
+
+        Returns:
+            sqlite3.Cursor: Yields rows with `book`, `chapter`, `verse`, the
+                highlighted `text` and the verse's `ordinal`, plus its `rank`
+                if ranked, as SQLite finds them. With a `search_cache`, an
+                iterator of the same rows, which are cached once read.
+        """
+        conditions, params = self.search_filter(testament, book, chapter, scope)
+        params['phrase'] = phrase
         
-        cursor.execute("""
+        if after is not None:
+            if rank:
+                conditions += " AND (rank, fts_verses.rowid) > (:after_rank, :after)"
+                params['after_rank'], params['after'] = after
+            else:
+                conditions += " AND fts_verses.rowid > :after"
+                params['after'] = after
+        
+        # LIMIT -1 is no limit
+        params['limit'] = -1 if limit is None else limit
+        params['offset'] = offset
+        
+        if self.search_cache:
+            fingerprint = self.get_database_fingerprint()
+            key = json.dumps(['search', mode, rank, conditions, params], sort_keys=True)
+            value = self.search_cache.get(self.translation, fingerprint, key)
+            
+            if value is not None:
+                return iter(cached_rows(value))
+        
+        table = self.get_search_table(mode)
+        
+        # Every index is aliased to fts_verses; the column named after the
+        # table is the one FTS5 matches and highlights
+        cursor = self.get_bible_cursor()
+        cursor.execute(f"""
         SELECT
             books.name AS book,
             chapter,
             verse,
-            highlight(fts_verses, 3, '<b>', '</b>') AS text
-        FROM fts_verses
+            highlight(fts_verses.{table}, 3, '<b>', '</b>') AS text,
+            fts_verses.rowid AS ordinal{", rank" if rank else ""}
+        FROM {table} AS fts_verses
         JOIN books ON fts_verses.book_id = books.id
-        WHERE fts_verses MATCH :phrase
-        AND book = :book;
+        WHERE fts_verses.{table} MATCH :phrase
+        {conditions}
+        ORDER BY {"rank, " if rank else ""}fts_verses.rowid
+        LIMIT :limit OFFSET :offset;
         """, params)
+        
+        if self.search_cache:
+            return cache_rows(
+                cursor,
+                partial(self.search_cache.put, self.translation, fingerprint, key)
+            )
+        
+        return cursor
+    
+    def get_search_table(self, mode):
+        """The FTS5 table a search mode queries, built on first use.
+        """
+        if mode != 'exact':
+            self.create_search_index(mode)
+        
+        return SEARCH_INDEXES[mode][0]
+    
+    def search(self, phrase, *args, **options):
+        """Fetch every match of `iter_search`.
+        """
+        return list(self.iter_search(phrase, *args, **options))
 
+    def count_matches(
+        self,
+        phrase,
+        testament=None,
+        book=None,
+        chapter=None,
+        scope=None,
+        mode='exact'
+    ):
+        """Count a search's matches without highlighting or fetching them.
+        """
+        conditions, params = self.search_filter(testament, book, chapter, scope)
+        params['phrase'] = phrase
+        
+        def count():
+            table = self.get_search_table(mode)
+            
+            cursor = self.get_bible_cursor()
+            cursor.execute(f"""
+            SELECT COUNT(*)
+            FROM {table} AS fts_verses
+            WHERE fts_verses.{table} MATCH :phrase
+            {conditions};
+            """, params)
+            
+            return cursor.fetchone()[0]
         
-        return cursor.fetchall()
+        return self.cached(['count', mode, conditions, params], count)
+    
+    def count_matches_by(
+        self,
+        phrase,
+        by='book',
+        testament=None,
+        book=None,
+        chapter=None,
+        scope=None,
+        mode='exact'
+    ):
+        """Count a search's matches per book or per chapter.
 
-    # TODO: Validate chapter?
-    def search_chapter(self, phrase, book, chapter):
-        cursor = self.get_bible_cursor()
+        Books and chapters are read off the matches' rowids, so, like
+        `count_matches`, no verse is read or highlighted.
 
-        book = self.get_book_from_abbreviation(book)
-        params = {
-            'phrase': phrase,
-            'book': book,
-            # FTS will fail if chapter is passed as a string
-            'chapter': int(chapter),
-        }
+        Args:
+            by (str, optional): `book` or `chapter`.
+
+        Returns:
+            list: `(book, count)` or `(book, chapter, count)` in canonical
+                order, for every book or chapter with a match.
+        """
+        if by not in ('book', 'chapter'):
+            raise BibleInputError(f"Invalid histogram {by=}.")
         
-        cursor.execute("""
-        SELECT
-            books.name AS book,
-            chapter,
-            verse,
-            highlight(fts_verses, 3, '<b>', '</b>') AS text
-        FROM fts_verses
-        JOIN books ON fts_verses.book_id = books.id
-        WHERE fts_verses MATCH :phrase
-        AND book = :book
-        AND chapter = :chapter;
+        conditions, params = self.search_filter(testament, book, chapter, scope)
+        params['phrase'] = phrase
+        # Ordinals are BBCCCVVV
+        group = 1000000 if by == 'book' else 1000
+        
+        def count():
+            table = self.get_search_table(mode)
+            
+            cursor = self.get_bible_cursor()
+            cursor.execute(f"""
+            SELECT fts_verses.rowid / {group}, COUNT(*)
+            FROM {table} AS fts_verses
+            WHERE fts_verses.{table} MATCH :phrase
+            {conditions}
+            GROUP BY 1
+            ORDER BY 1;
+            """, params)
+            
+            return [tuple(row) for row in cursor]
+        
+        counts = self.cached(['count', by, mode, conditions, params], count)
+        names = self.book_resolver.names
+        
+        if by == 'book':
+            return [(names[book_id], total) for book_id, total in counts]
+        
+        return [
+            (names[ordinal // 1000], ordinal % 1000, total)
+            for ordinal, total in counts
+        ]
+    
+    def cached(self, key, query):
+        """Return `query()`, through the `search_cache` if there is one.
+
+        Args:
+            key (list): Everything the result depends on, serialized as JSON.
+            query (callable): Returns a JSON serializable result.
+        """
+        if not self.search_cache:
+            return query()
+        
+        fingerprint = self.get_database_fingerprint()
+        key = json.dumps(key, sort_keys=True)
+        result = self.search_cache.get(self.translation, fingerprint, key)
+        
+        if result is None:
+            result = query()
+            self.search_cache.put(self.translation, fingerprint, key, result)
+        
+        return result
+
+    def get_concordance(
+        self,
+        terms=(),
+        testament=None,
+        book=None,
+        chapter=None,
+        scope=None,
+        limit=None
+    ):
+        """Count how often words are used, from the search index's vocabulary.
+
+        Words are looked up in the index rather than the verses, so counting
+        one, or expanding a prefix, takes about a millisecond. Counting every
+        word of a book or scope reads each occurrence in the index once.
+
+        Args:
+            terms (list, optional): Words to count, or prefixes ending with
+                `*` to expand, eg. `glor*`. Defaults to every word.
+            testament, book, chapter, scope (str, optional): Only count the
+                words there, as for `search`.
+            limit (int, optional): Maximum number of words.
+
+        Returns:
+            list: `(word, verses, occurrences)`, most frequent first.
+        """
+        conditions, params = self.search_filter(
+            testament, book, chapter, scope, column='doc'
+        )
+        # Each term is queried on its own so its constraint reaches the index
+        term_conditions = []
+        
+        for i, term in enumerate(terms or ['*']):
+            # Words are indexed in lowercase, without diacritics
+            term = fold_term(term)
+            
+            if not term.endswith('*'):
+                term_conditions.append(f"term = :term_{i}")
+                params[f'term_{i}'] = term
+                continue
+            
+            prefix = term[:-1]
+            
+            if not prefix:
+                term_conditions.append("1")
+                continue
+            
+            # Every word starting with the prefix sorts below the next prefix
+            term_conditions.append(f"term >= :term_{i} AND term < :term_{i}_end")
+            params[f'term_{i}'] = prefix
+            params[f'term_{i}_end'] = prefix[:-1] + chr(ord(prefix[-1]) + 1)
+        
+        if conditions:
+            queries = [
+                f"""
+                SELECT term, COUNT(DISTINCT doc) AS verses, COUNT(*) AS occurrences
+                FROM fts_vocab_instance
+                WHERE {term_condition} {conditions}
+                GROUP BY term
+                """
+                for term_condition in term_conditions
+            ]
+        else:
+            queries = [
+                f"""
+                SELECT term, doc AS verses, cnt AS occurrences
+                FROM fts_vocab
+                WHERE {term_condition}
+                """
+                for term_condition in term_conditions
+            ]
+        
+        params['limit'] = -1 if limit is None else limit
+        
+        cursor = self.get_bible_cursor()
+        cursor.execute(f"""
+        {" UNION ".join(queries)}
+        ORDER BY occurrences DESC, term
+        LIMIT :limit;
         """, params)
         
-        return cursor.fetchall()
+        return [tuple(row) for row in cursor]
+    
+    def search_bible(self, phrase, **options):
+        return self.search(phrase, **options)
+    
+    def search_testament(self, phrase, testament, **options):
+        return self.search(phrase, testament, **options)
+    
+    def search_scope(self, phrase, scope, **options):
+        return self.search(phrase, scope=scope, **options)
+    
+    def search_book(self, phrase, book, **options):
+        return self.search(phrase, book=book, **options)
+
+    # TODO: Validate chapter?
+    def search_chapter(self, phrase, book, chapter, **options):
+        return self.search(phrase, book=book, chapter=chapter, **options)
+
+
+def build_translation(translation, database, metadata, indexes=()):
+    """Build a staged download; runs in a worker process.
+    """
+    BibleClient(translation).build_bible_db(database, metadata, indexes)
+
+
+def cache_rows(cursor, store):
+    """Yield a cursor's rows, then pass them to `store` once every one is read.
+
+    Rows are stored as lists under their column names, see `cached_rows`.
+    They aren't stored if the reader stops early, eg. `bible search | head`.
+    """
+    cached = []
+    
+    for row in cursor:
+        cached.append(tuple(row))
+        yield row
+    
+    store({
+        'columns': [column[0] for column in cursor.description],
+        'rows': cached,
+    })
+
+
+def cached_rows(value):
+    """Rows stored by `cache_rows`, as dicts.
+    """
+    columns = value['columns']
+    return [dict(zip(columns, row)) for row in value['rows']]
+
+
+def search_cursor(row):
+    """Keyset pagination cursor to pass as `after` for the matches after a row.
+    """
+    if 'rank' in row.keys():
+        return row['rank'], row['ordinal']
+    
+    return row['ordinal']
+
+
+def format_search_cursor(cursor):
+    """Format a `search_cursor` as text, eg. for a command line or URL.
+    """
+    if isinstance(cursor, tuple):
+        rank, ordinal = cursor
+        return f"{ordinal}:{-rank!r}"
+    
+    return str(cursor)
+
+
+def parse_search_cursor(value):
+    """Parse a cursor from `format_search_cursor`, eg. 43003016, or
+    43003016:2.5 for ranked results.
+
+    Raises:
+        ValueError: If the cursor is invalid.
+    """
+    ordinal, _, score = value.partition(':')
+    
+    if score:
+        # BM25 ranks are negative, the cursor shows their magnitude
+        return -float(score), int(ordinal)
+    
+    return int(ordinal)
+
+
+def search_translations(
+    phrase,
+    translations,
+    testament=None,
+    book=None,
+    chapter=None,
+    scope=None,
+    scopes=None,
+    mode='exact',
+    max_workers=None
+):
+    """Search several translations concurrently and merge the matches by verse.
+
+    SQLite releases the GIL while it runs a query, so each translation is
+    searched on its own thread and connection.
+
+    Args:
+        phrase (str): FTS5 query, as for `BibleClient.search_bible`.
+        translations (list): Translations to search.
+        testament, book, chapter, scope (str, optional): Limit the search, as
+            for `BibleClient.search`.
+        scopes (dict, optional): User-defined scopes, as for `BibleClient`.
+        mode (str, optional): Search mode, as for `BibleClient.search`.
+        max_workers (int, optional): Concurrent searches. Defaults to one
+            per translation.
+
+    Returns:
+        list: A record per matching verse in canonical order, holding the
+            `book`, `chapter`, `verse` and `matches`, the highlighted text
+            of each translation that matched, in the order requested.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    
+    translations = list(dict.fromkeys(translations))
+    
+    def search(translation):
+        with BibleClient(translation, scopes) as bible:
+            return bible.search(phrase, testament, book, chapter, scope, mode=mode)
+    
+    with ThreadPoolExecutor(max_workers or len(translations) or None) as executor:
+        results = list(executor.map(search, translations))
+    
+    merged = {}
+    
+    for translation, verse_records in zip(translations, results):
+        for row in verse_records:
+            record = merged.setdefault(row['ordinal'], {
+                'book': row['book'],
+                'chapter': row['chapter'],
+                'verse': row['verse'],
+                'matches': {},
+            })
+            record['matches'][translation] = row['text']
+    
+    return [merged[ordinal] for ordinal in sorted(merged)]
+
+
+def download_translations(
+    translations,
+    progress=None,
+    update=False,
+    indexes=(),
+    max_downloads=4,
+    max_builds=None
+):
+    """Download and build several translations concurrently.
+
+    Downloads are I/O bound and share a thread pool, while the CPU-bound
+    builds run in a process pool as soon as each download finishes.
+
+    Args:
+        translations (list): Translations to download.
+        progress (callable, optional): Called with the translation followed
+            by the arguments of `BibleClient.download_raw_bible`'s callback.
+        update (bool, optional): Only download and rebuild translations
+            that changed upstream. Defaults to False.
+        indexes (list, optional): Search modes to index besides `exact`, as
+            for `BibleClient.build_bible_db`.
+        max_downloads (int, optional): Concurrent downloads. Defaults to 4.
+        max_builds (int, optional): Concurrent builds. Defaults to the CPU count.
+
+    Returns:
+        list: `(translation, message, succeeded, bytes_saved)` in the order
+            requested, where `bytes_saved` is the size of an unchanged DB
+            that didn't need to be downloaded.
+    """
+    from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor, as_completed
+    from multiprocessing import get_context
+    
+    clients = [BibleClient(translation) for translation in dict.fromkeys(translations)]
+    results = {}
+    
+    def download(bible):
+        changed = bible.download_raw_bible(
+            progress and partial(progress, bible.translation),
+            conditional=update
+        )
+        
+        if changed:
+            bible.stage_download()
+        
+        return changed
+    
+    # Spawn build workers so they don't fork the download threads
+    with ThreadPoolExecutor(max_downloads) as downloads, \
+            ProcessPoolExecutor(max_builds, mp_context=get_context('spawn')) as builds:
+        download_futures = {downloads.submit(download, bible): bible for bible in clients}
+        build_futures = {}
+        
+        for future in as_completed(download_futures):
+            bible = download_futures[future]
+            
+            try:
+                if future.result():
+                    rebuilt_indexes = bible.get_rebuilt_indexes(indexes)
+                else:
+                    bytes_saved = int(bible.get_download_metadata().get('size', 0))
+                    results[bible.translation] = (
+                        f"Translation '{bible.translation}' is up to date.", True, bytes_saved
+                    )
+            except BibleInputError as ex:
+                results[bible.translation] = (str(ex), False, 0)
+            # Eg. an OSError staging the download, which shouldn't stop the others
+            except Exception as ex:
+                results[bible.translation] = (
+                    f"Download of '{bible.translation}' failed: {ex}", False, 0
+                )
+            
+            if bible.translation in results:
+                bible.close()
+                continue
+            
+            build_future = builds.submit(
+                build_translation,
+                bible.translation,
+                bible.build_path,
+                bible.download_metadata,
+                rebuilt_indexes
+            )
+            build_futures[build_future] = bible
+        
+        for future in as_completed(build_futures):
+            bible = build_futures[future]
+            
+            try:
+                future.result()
+                results[bible.translation] = (bible.install_build(), True, 0)
+            except Exception as ex:
+                bible.discard_build()
+                results[bible.translation] = (
+                    f"Build of '{bible.translation}' failed: {ex}", False, 0
+                )
+    
+    return [(bible.translation, *results[bible.translation]) for bible in clients]
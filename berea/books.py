@@ -0,0 +1,108 @@
+import json
+import threading
+from functools import lru_cache
+
+from berea.utils import get_source_root
+
+
+# Marks a trie node whose prefix is shared by more than one book
+AMBIGUOUS = object()
+
+# Largest chapter or verse number an ordinal can hold
+MAX_NUMBER = 999
+
+
+def verse_ordinal(book_id, chapter, verse):
+    """Global position of a verse as BBCCCVVV, eg. John 3:16 is 43003016.
+    """
+    return book_id * 1000000 + min(chapter, MAX_NUMBER) * 1000 + min(verse, MAX_NUMBER)
+
+
+def split_ordinal(ordinal):
+    """Split an ordinal into `(book_id, chapter, verse)`.
+    """
+    return ordinal // 1000000, ordinal // 1000 % 1000, ordinal % 1000
+
+
+@lru_cache(maxsize=None)
+def load_book_abbreviations():
+    with open(f'{get_source_root()}/data/book_abbreviations.json') as file:
+        return dict(json.load(file))
+
+
+class BookResolver:
+    """Resolve book names, abbreviations and unambiguous prefixes without SQL.
+
+    Built once from a translation's `books` table, eg.
+    `BookResolver([(1, 'Genesis'), (2, 'Exodus'), ...])`.
+    """
+    def __init__(self, books):
+        self.ids = {}
+        self.names = {}
+        # Lowercase names and abbreviations mapped to full book names
+        self.lookup = {}
+        self.trie = {}
+
+        abbreviations = load_book_abbreviations()
+
+        for book_id, name in books:
+            self.ids[name] = book_id
+            self.names[book_id] = name
+
+            for key in [name, *abbreviations.get(name, [])]:
+                self.add(key.lower(), name)
+
+    def add(self, key, name):
+        self.lookup[key] = name
+
+        node = self.trie
+        for char in key:
+            node = node.setdefault(char, {})
+            # The empty key holds the book every key below this node resolves to
+            book = node.get('')
+            if book is None:
+                node[''] = name
+            elif book != name:
+                node[''] = AMBIGUOUS
+
+    def resolve(self, book):
+        """Return the full book name, or `None` if it can't be resolved.
+        """
+        key = book.lower()
+        name = self.lookup.get(key)
+
+        if name:
+            return name
+
+        node = self.trie
+        for char in key:
+            node = node.get(char)
+            if node is None:
+                return None
+
+        name = node.get('')
+        return None if name is AMBIGUOUS else name
+
+
+_resolvers = {}
+_resolvers_lock = threading.Lock()
+
+
+def get_book_resolver(database, load_books):
+    """Return the process-wide resolver for a translation DB.
+
+    `load_books` is only called the first time the DB is seen.
+    """
+    with _resolvers_lock:
+        resolver = _resolvers.get(database)
+
+        if resolver is None:
+            resolver = BookResolver(load_books())
+            _resolvers[database] = resolver
+
+    return resolver
+
+
+def discard_book_resolver(database):
+    with _resolvers_lock:
+        _resolvers.pop(database, None)
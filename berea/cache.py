@@ -0,0 +1,140 @@
+import json
+import os
+import sqlite3
+import threading
+
+from berea.utils import get_app_data_path
+
+
+# Bound on the summed size of cached results before the least recently used
+# are evicted
+SEARCH_CACHE_SIZE = 32 * 1024 * 1024
+
+
+# Values are stamped with an increasing counter rather than the time, which
+# can repeat or go backwards
+NEXT_ACCESS = "(SELECT COALESCE(MAX(accessed), 0) + 1 FROM search_cache)"
+
+
+def get_search_cache_path():
+    return f"{get_app_data_path()}/search_cache.db"
+
+
+class SearchCache:
+    """Search results kept in a sidecar SQLite DB between runs.
+
+    Results are stored per translation, under the fingerprint of the DB they
+    were read from, so a translation that's replaced on disk never serves
+    stale results. The least recently used results are evicted once their
+    total size passes `max_size` bytes.
+    """
+    def __init__(self, path=None, max_size=SEARCH_CACHE_SIZE):
+        self.path = path or get_search_cache_path()
+        self.max_size = max_size
+        # Shared by threads, eg. search_translations(), so access is locked
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(self.path, check_same_thread=False)
+
+        with self.lock:
+            self.conn.execute("PRAGMA journal_mode = WAL;")
+            self.conn.execute("PRAGMA synchronous = NORMAL;")
+            self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS search_cache (
+                translation TEXT,
+                key TEXT,
+                fingerprint TEXT,
+                value TEXT,
+                size INTEGER,
+                accessed INTEGER,
+                PRIMARY KEY (translation, key)
+            );
+            """)
+            self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS search_cache_accessed_idx
+            ON search_cache (accessed);
+            """)
+            self.conn.commit()
+
+    def get(self, translation, fingerprint, key):
+        """Return a cached value, or `None` if there isn't a fresh one.
+        """
+        with self.lock:
+            row = self.conn.execute("""
+            SELECT fingerprint, value FROM search_cache
+            WHERE translation = ? AND key = ?;
+            """, (translation, key)).fetchone()
+
+            if row is None:
+                return None
+
+            if row[0] != fingerprint:
+                self.conn.execute("""
+                DELETE FROM search_cache
+                WHERE translation = ? AND fingerprint != ?;
+                """, (translation, fingerprint))
+                self.conn.commit()
+                return None
+
+            self.conn.execute(f"""
+            UPDATE search_cache SET accessed = {NEXT_ACCESS}
+            WHERE translation = ? AND key = ?;
+            """, (translation, key))
+            self.conn.commit()
+
+        return json.loads(row[1])
+
+    def put(self, translation, fingerprint, key, value):
+        """Cache a JSON serializable value, evicting the least recently used
+        values past `max_size`.
+        """
+        value = json.dumps(value, separators=(',', ':'))
+
+        # A value that would evict everything else isn't worth keeping
+        if len(value) > self.max_size:
+            return
+
+        with self.lock:
+            self.conn.execute(f"""
+            INSERT OR REPLACE INTO search_cache
+            (translation, key, fingerprint, value, size, accessed)
+            VALUES (?, ?, ?, ?, ?, {NEXT_ACCESS});
+            """, (translation, key, fingerprint, value, len(value)))
+
+            self.conn.execute("""
+            DELETE FROM search_cache WHERE rowid IN (
+                SELECT rowid FROM (
+                    SELECT rowid, SUM(size) OVER (ORDER BY accessed DESC) AS total
+                    FROM search_cache
+                )
+                WHERE total > ?
+            );
+            """, (self.max_size,))
+            self.conn.commit()
+
+    def invalidate(self, translation):
+        """Drop every cached value of a translation.
+        """
+        with self.lock:
+            self.conn.execute(
+                "DELETE FROM search_cache WHERE translation = ?;", (translation,)
+            )
+            self.conn.commit()
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+
+def invalidate_search_cache(translation):
+    """Drop a translation's cached results, eg. once it's replaced or deleted.
+    """
+    # Nothing to invalidate, and no need to create the cache to find that out
+    if not os.path.exists(get_search_cache_path()):
+        return
+
+    cache = SearchCache()
+
+    try:
+        cache.invalidate(translation)
+    finally:
+        cache.close()
@@ -1,55 +1,510 @@
+import os
 import sys
-import configparser
 import argparse
+import threading
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from functools import partial
+from io import StringIO
 
-from berea.utils import get_downloaded_translations, get_app_data_path
-from berea.bible import BibleClient, BibleInputError
-from berea.render import render_reference_results, render_search_results
+from berea.utils import (
+    get_app_data_path,
+    get_daemon_socket_path,
+    get_downloaded_translations,
+    is_translation_downloaded,
+)
+from berea.books import discard_book_resolver
+from berea.cache import SearchCache
+from berea.bible import (
+    BibleClient,
+    BibleInputError,
+    download_translations,
+    format_search_cursor,
+    get_available_translations,
+    parse_search_cursor,
+    search_cursor,
+    search_translations,
+)
+from berea.render import (
+    render_reference_results,
+    render_passages,
+    render_comparison,
+    stream_search_results,
+    render_merged_search_results,
+    render_search_count,
+    render_concordance,
+    render_search_histogram,
+    render_download_progress,
+)
 
 
 # Version stored here to prevent editable install ImportError
 __version__ = '0.1.2'
 
+# Matches per page when paging search results without '--limit'
+SEARCH_PAGE_SIZE = 20
+
+# Words listed by the concordance when no words are given
+CONCORDANCE_SIZE = 20
+
+COMMANDS = [
+    '--help',
+    '-h',
+    '--version',
+    'download',
+    'update',
+    'delete',
+    'config',
+    'reference',
+    'search',
+    'concordance',
+    'serve',
+]
+
+# Read-only commands, which `bible serve --daemon` can run for other processes
+DAEMON_COMMANDS = ['reference', 'search', 'concordance']
+
 
 class CLIConfig:
-    config = configparser.ConfigParser()
-    path = get_app_data_path() + '/berea.ini'
+    """Settings in `berea.ini`, read once per process, or per reload.
+    """
+    config = None
+    
+    @classmethod
+    def get_path(cls):
+        return get_app_data_path(create=False) + '/berea.ini'
+    
+    @classmethod
+    def load(cls):
+        if cls.config is None:
+            import configparser
+            
+            cls.config = configparser.ConfigParser()
+            cls.config.read(cls.get_path())
+        
+        return cls.config
+    
+    @classmethod
+    def reload(cls):
+        """Forget the settings read so far, eg. once another process saved them.
+        """
+        cls.config = None
     
     @classmethod
     def set_default_translation(cls, translation):
-        if not cls.config.has_section('Defaults'):
-            cls.config.add_section('Defaults')
+        config = cls.load()
+        
+        if not config.has_section('Defaults'):
+            config.add_section('Defaults')
         
-        cls.config.set('Defaults', 'translation', translation)
+        config.set('Defaults', 'translation', translation)
         
-        with open(cls.path, 'w') as config_file:
-            cls.config.write(config_file)
+        # The app data directory is only created once there's something to save
+        with open(get_app_data_path() + '/berea.ini', 'w') as config_file:
+            config.write(config_file)
     
     @classmethod
     def get_default_translation(cls):
-        cls.config.read(cls.path)
-        return cls.config.get('Defaults', 'translation', fallback=None)
+        return cls.load().get('Defaults', 'translation', fallback=None)
+    
+    @classmethod
+    def get_scopes(cls):
+        """User-defined search scopes from the `[Scopes]` section, eg.
+        `johannine = John, 1John-3John, Rev`.
+        """
+        config = cls.load()
+        
+        if not config.has_section('Scopes'):
+            return {}
+        
+        return dict(config.items('Scopes'))
+
+
+class DownloadedTranslations:
+    """The downloaded translations, as choices for the parser and the commands.
+
+    Checking for a translation only looks for its DB, and the translations
+    are only listed once they're shown or counted, eg. in help, so looking
+    up a reference never lists the translations directory.
+    """
+    def __init__(self):
+        self._translations = None
+    
+    def list(self):
+        if self._translations is None:
+            self._translations = get_downloaded_translations()
+        
+        return self._translations
+    
+    def __contains__(self, translation):
+        return isinstance(translation, str) and is_translation_downloaded(translation)
+    
+    def __iter__(self):
+        return iter(self.list())
+    
+    def __len__(self):
+        return len(self.list())
+    
+    def __str__(self):
+        # Formatted like argparse formats choices, eg. for a metavar
+        return '{' + ','.join(self) + '}'
+
+
+def add_translation_argument(parser, *args, choices=None, metavar=None, **kwargs):
+    """Add an argument whose choices or metavar list the downloaded translations.
+
+    They're set once the argument is added, since adding it formats them
+    to check them, which would list the translations.
+    """
+    action = parser.add_argument(*args, **kwargs)
+    action.choices = choices
+    action.metavar = metavar
+    return action
+
+
+class CLISession:
+    """State shared by the commands run in a process: the downloaded
+    translations, the argument parsers, and clients of the translations.
+
+    A command run in its own process uses a session once. The daemon keeps
+    one between requests, so connections, book resolvers and the search
+    cache stay warm, and reloads it when translations or the config change.
+    """
+    def __init__(self):
+        self.downloaded_translations = []
+        self.parsers = {}
+        self.scopes = {}
+        self.clients = {}
+        self.cache = None
+        self.version = None
+    
+    def get_version(self):
+        """Stamp the translations directory and the config, which change
+        whenever a translation is installed or deleted, or a setting saved.
+        """
+        version = []
+        
+        for path in [get_app_data_path('translations', create=False), CLIConfig.get_path()]:
+            try:
+                stat = os.stat(path)
+                version.append((stat.st_ino, stat.st_mtime_ns))
+            except OSError:
+                version.append(None)
+        
+        return version
+    
+    def refresh(self):
+        """Load the session, or reload it if it's out of date.
+        """
+        version = self.get_version()
+        
+        if version == self.version:
+            return
+        
+        self.close()
+        CLIConfig.reload()
+        self.downloaded_translations = DownloadedTranslations()
+        self.parsers = {}
+        self.scopes = CLIConfig.get_scopes()
+        self.version = version
+    
+    def get_parser(self, command=None):
+        """The argument parser for a command, or for every command.
+        """
+        if command not in self.parsers:
+            self.parsers[command] = build_berea_parser(self.downloaded_translations, command)
+        
+        return self.parsers[command]
+    
+    def get_bible(self, translation, cache=None):
+        bible = self.clients.get(translation)
+        
+        if bible is None:
+            bible = self.clients[translation] = BibleClient(translation, self.scopes)
+        
+        bible.search_cache = cache
+        return bible
+    
+    def get_search_cache(self):
+        if self.cache is None:
+            self.cache = SearchCache()
+        
+        return self.cache
+    
+    def close(self):
+        for bible in self.clients.values():
+            bible.close()
+            # The DB may be replaced before the session is reloaded
+            discard_book_resolver(bible.database)
+        
+        self.clients.clear()
+        
+        if self.cache:
+            self.cache.close()
+            self.cache = None
+
+
+def translations_type(downloaded_translations, default=None):
+    """Create an argparse type for translations separated by commas, eg. KJV,BSB
+    """
+    def translations(value):
+        # Defaults come from the config and aren't validated, like choices
+        if value == default:
+            return value
+        
+        for translation in value.split(','):
+            if translation not in downloaded_translations:
+                choices = ', '.join(repr(choice) for choice in downloaded_translations)
+                raise argparse.ArgumentTypeError(
+                    f"invalid choice: {translation!r} (choose from {choices})"
+                )
+        
+        return value
+    
+    return translations
+
+
+def print_download_progress(translations):
+    """Create a download progress callback that redraws a line on stderr.
+
+    Progress of concurrent downloads is summed into a single line.
+    """
+    # Keep progress out of logs and pipes
+    if not sys.stderr.isatty():
+        return None
+    
+    reports = {}
+    lock = threading.Lock()
+    
+    def progress(translation, downloaded, total, elapsed):
+        with lock:
+            reports[translation] = (downloaded, total, elapsed)
+            
+            if len(translations) == 1:
+                label = translation
+            else:
+                label = f"{len(reports)}/{len(translations)} translations"
+            
+            line = render_download_progress(
+                label,
+                sum(report[0] for report in reports.values()),
+                sum(report[1] or 0 for report in reports.values()),
+                max(report[2] for report in reports.values())
+            )
+            sys.stderr.write(f"\r\033[K{line}")
+            sys.stderr.flush()
+    
+    return progress
+
+
+def download(args, downloaded_translations):
+    translations = args.translations
+    # Checked before installing anything
+    first_download = not downloaded_translations
+    
+    if args.all:
+        try:
+            translations = [
+                translation for translation in get_available_translations()
+                if translation not in downloaded_translations
+            ]
+        except BibleInputError as ex:
+            return str(ex)
+        
+        if not translations:
+            return "All available translations are already downloaded."
+    
+    if not translations:
+        return "Error: Specify the translations to download or pass '--all'."
+    
+    start = time.monotonic()
+    progress = print_download_progress(translations)
+    
+    # A single translation doesn't need worker pools
+    if len(translations) == 1:
+        translation = translations[0]
+        
+        try:
+            output = BibleClient(translation).create_bible_db(
+                progress and partial(progress, translation),
+                args.index
+            )
+            results = [(translation, output, True, 0)]
+        except BibleInputError as ex:
+            results = [(translation, str(ex), False, 0)]
+    
+    else:
+        results = download_translations(translations, progress, indexes=args.index)
+    
+    if progress:
+        sys.stderr.write("\n")
+    
+    installed = [translation for translation, _, succeeded, _ in results if succeeded]
+    
+    # Save first downloaded translation as the default
+    if first_download and installed:
+        CLIConfig.set_default_translation(installed[0])
+    
+    output = '\n'.join(message for _, message, _, _ in results)
+    
+    if len(results) > 1:
+        output += (
+            f"\n\nDownloaded {len(installed)} of {len(results)} translations "
+            f"in {time.monotonic() - start:.1f}s."
+        )
+    
+    return output
+
+
+def update(args, downloaded_translations):
+    translations = args.translations or downloaded_translations
+    
+    for translation in translations:
+        if translation not in downloaded_translations:
+            return f"Error: Translation '{translation}' is not downloaded."
+    
+    start = time.monotonic()
+    progress = print_download_progress(translations)
+    results = download_translations(translations, progress, update=True)
+    
+    if progress:
+        sys.stderr.write("\n")
+    
+    unchanged = [result for result in results if result[3]]
+    updated = [result for result in results if result[2] and not result[3]]
+    bytes_saved = sum(result[3] for result in unchanged)
+    
+    output = '\n'.join(message for _, message, _, _ in results)
+    output += (
+        f"\n\nUpdated {len(updated)} of {len(results)} translations "
+        f"in {time.monotonic() - start:.1f}s. "
+        f"{len(unchanged)} unchanged, {bytes_saved / 1024 / 1024:.1f} MB saved."
+    )
+    
+    return output
+
+
+def search_cursor_type(value):
+    """Parse a '--after' cursor, see `berea.bible.parse_search_cursor`.
+    """
+    try:
+        return parse_search_cursor(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid cursor: {value!r}")
+
+
+def search_page_footer(args, verse_records, limit, total):
+    """Describe which matches are shown and how to get the next page.
+    """
+    if args.page:
+        pages = max(1, -(-total // limit))
+        footer = f"Page {args.page} of {pages}."
+        
+        if args.page < pages:
+            footer += f" Next page: --page {args.page + 1}"
+        
+        return footer
+    
+    footer = f"Showing {len(verse_records)} of {total} occurrences."
+    
+    if len(verse_records) == limit:
+        footer += f" Next page: --after {format_search_cursor(search_cursor(verse_records[-1]))}"
+    
+    return footer
+
+
+def write_stream(chunks):
+    """Write output to stdout as it's rendered.
+    """
+    try:
+        for chunk in chunks:
+            sys.stdout.write(chunk)
+        sys.stdout.flush()
+    
+    # The reader stopped early, eg. `bible search lord | head`
+    except BrokenPipeError:
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+
+
+def search_scope_error(args):
+    """Return an error if a search's book or chapter conflicts with a testament
+    or scope.
+    """
+    for scope, value in [('chapter', args.chapter), ('book', args.book)]:
+        if not value:
+            continue
+        
+        if args.scope:
+            return f"Invalid search: cannot search a {scope} with the '-s, --scope' flag."
+        
+        if args.new_testament:
+            return (
+                f"Invalid search: cannot search a {scope} with the "
+                "'-NT, --new_testament' flag."
+            )
+        elif args.old_testament:
+            return (
+                f"Invalid search: cannot search a {scope} with the "
+                "'-OT, --old_testament' flag."
+            )
+    
+    if args.scope and (args.new_testament or args.old_testament):
+        return "Invalid search: cannot combine '-s, --scope' with a testament flag."
+    
+    return ''
 
 
 def add_download_parser(subparsers):
     download_parser = subparsers.add_parser(
         'download',
-        help="Download a Bible translation"
+        help="Download Bible translations"
     )
     
     download_parser.add_argument(
-        'translation',
-        default='KJV'
+        'translations',
+        nargs='*',
+        help="Translations to download, eg. KJV BSB"
     )
     
+    download_parser.add_argument(
+        '--all',
+        action='store_true',
+        help="Download every available translation not yet downloaded"
+    )
     
+    download_parser.add_argument(
+        '--index',
+        nargs='+',
+        choices=['stem', 'substring'],
+        default=[],
+        help=(
+            "Extra search indexes to build, for the 'search --mode' flag. "
+            "Otherwise they're built on their first search"
+        )
+    )
+    
+    
+def add_update_parser(subparsers):
+    update_parser = subparsers.add_parser(
+        'update',
+        help="Update downloaded translations that changed upstream"
+    )
+    
+    update_parser.add_argument(
+        'translations',
+        nargs='*',
+        help="Translations to update (default: all downloaded translations)"
+    )
+
+
 def add_delete_parser(subparsers, downloaded_translations):
     delete_parser = subparsers.add_parser(
         'delete',
         help="Delete a Bible translation"
     )
     
-    delete_parser.add_argument(
+    add_translation_argument(
+        delete_parser,
         'translation',
         choices=downloaded_translations
     )
@@ -66,7 +521,8 @@ def add_config_parser(subparsers, downloaded_translations):
         choices=['translation']
     )
 
-    config_parser.add_argument(
+    add_translation_argument(
+        config_parser,
         'value',
         choices=downloaded_translations
     )
@@ -80,17 +536,25 @@ def add_reference_parser(subparsers, downloaded_translations):
     )
     
     reference_parser.add_argument(
-        'book'
+        'book',
+        help="Book, or references separated by semicolons, eg. 'John 3:16; Ps 23'"
     )
 
     reference_parser.add_argument('chapter', nargs='?')
     reference_parser.add_argument('verse', nargs='?')
     
-    reference_parser.add_argument(
+    default_translation = CLIConfig.get_default_translation()
+    
+    add_translation_argument(
+        reference_parser,
         '-t', '--translation',
-        choices=downloaded_translations,
-        default=CLIConfig.get_default_translation(),
-        help='Bible translation used to display passage'
+        type=translations_type(downloaded_translations, default_translation),
+        metavar=downloaded_translations,
+        default=default_translation,
+        help=(
+            'Bible translation used to display passage, or several separated '
+            'by commas to compare them, eg. KJV,BSB'
+        )
     )
     
     reference_parser.add_argument(
@@ -105,6 +569,12 @@ def add_reference_parser(subparsers, downloaded_translations):
         default='txt'
     )
     
+    reference_parser.add_argument(
+        '-c', '--columns',
+        action='store_true',
+        help="Compare translations side by side instead of interleaving verses"
+    )
+    
     
 def add_search_parser(subparsers, downloaded_translations):
     search_parser = subparsers.add_parser(
@@ -121,7 +591,8 @@ def add_search_parser(subparsers, downloaded_translations):
     search_parser.add_argument('book', nargs='?')
     search_parser.add_argument('chapter', nargs='?')
     
-    search_parser.add_argument(
+    add_translation_argument(
+        search_parser,
         '-t', '--translation',
         choices=downloaded_translations,
         default=CLIConfig.get_default_translation(),
@@ -137,71 +608,408 @@ def add_search_parser(subparsers, downloaded_translations):
         '-OT', '--old_testament',
         action='store_true'
     )
+    
+    search_parser.add_argument(
+        '-s', '--scope',
+        help=(
+            "Books to search: a named scope (eg. gospels, pentateuch, paul), a book "
+            "range (eg. Gen-Deut) or several separated by commas. More scopes can be "
+            "defined in the [Scopes] section of berea.ini"
+        )
+    )
+    
+    search_parser.add_argument(
+        '-m', '--mode',
+        choices=['exact', 'stem', 'substring'],
+        default='exact',
+        help=(
+            "Match whole words, words sharing a stem (eg. glory, glorified), or any "
+            "substring of 3 or more characters"
+        )
+    )
+    
+    search_parser.add_argument(
+        '-r', '--rank',
+        action='store_true',
+        help="Order matches by relevance (BM25) instead of canonical order"
+    )
+    
+    search_parser.add_argument(
+        '-l', '--limit',
+        type=int,
+        help="Show at most this many matches"
+    )
+    
+    search_parser.add_argument(
+        '-p', '--page',
+        type=int,
+        help=f"Page of matches to show, {SEARCH_PAGE_SIZE} per page unless '--limit' is given"
+    )
+    
+    search_parser.add_argument(
+        '--after',
+        type=search_cursor_type,
+        help="Show the matches after a cursor printed with the previous page"
+    )
+    
+    search_parser.add_argument(
+        '-c', '--count',
+        action='store_true',
+        help="Only count the matches"
+    )
+    
+    search_parser.add_argument(
+        '--histogram',
+        nargs='?',
+        const='book',
+        choices=['book', 'chapter'],
+        help="Only count the matches in each book, or in each chapter"
+    )
+    
+    search_parser.add_argument(
+        '--no-cache',
+        action='store_true',
+        help="Run the search even if its results are cached from a previous run"
+    )
+    
+    search_parser.add_argument(
+        '-a', '--all-translations',
+        action='store_true',
+        help="Search every downloaded translation and merge the matches by verse"
+    )
+
+
+def add_concordance_parser(subparsers, downloaded_translations):
+    concordance_parser = subparsers.add_parser(
+        'concordance',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+        help="Count how often words are used in a Bible translation"
+    )
+    
+    concordance_parser.add_argument(
+        'terms',
+        nargs='*',
+        help=(
+            "Words to count, or prefixes to expand ending with '*', eg. glor*. "
+            f"Lists the {CONCORDANCE_SIZE} most frequent words if none are given"
+        )
+    )
+    
+    add_translation_argument(
+        concordance_parser,
+        '-t', '--translation',
+        choices=downloaded_translations,
+        default=CLIConfig.get_default_translation(),
+        help='Bible translation whose words are counted'
+    )
+    
+    concordance_parser.add_argument(
+        '-b', '--book',
+        help="Only count the words in a book"
+    )
+    
+    concordance_parser.add_argument(
+        '-NT', '--new_testament',
+        action='store_true'
+    )
+    
+    concordance_parser.add_argument(
+        '-OT', '--old_testament',
+        action='store_true'
+    )
+    
+    concordance_parser.add_argument(
+        '-s', '--scope',
+        help="Only count the words in a scope, as for 'search --scope'"
+    )
+    
+    concordance_parser.add_argument(
+        '-l', '--limit',
+        type=int,
+        help="Show at most this many words"
+    )
 
 
-def parse_berea_args(downloaded_translations):
+def add_serve_parser(subparsers):
+    from berea.server import DEFAULT_HOST, DEFAULT_PORT
+    
+    serve_parser = subparsers.add_parser(
+        'serve',
+        help="Serve commands from a long-running process"
+    )
+    
+    serve_parser.add_argument(
+        '--daemon',
+        action='store_true',
+        help=(
+            "Run a daemon on a Unix socket that answers the reference, search and "
+            "concordance commands, which are forwarded to it while it's running"
+        )
+    )
+    
+    serve_parser.add_argument(
+        '--http',
+        action='store_true',
+        help="Serve a JSON API for the reference, search, count and compare endpoints"
+    )
+    
+    serve_parser.add_argument(
+        '--host',
+        default=DEFAULT_HOST,
+        help="Address the '--http' server listens on"
+    )
+    
+    serve_parser.add_argument(
+        '--port',
+        type=int,
+        default=DEFAULT_PORT,
+        help="Port the '--http' server listens on"
+    )
+    
+    serve_parser.add_argument(
+        '--workers',
+        type=int,
+        help="Threads running the '--http' server's queries (default: CPUs + 4, up to 32)"
+    )
+    
+    serve_parser.add_argument(
+        '--foreground',
+        action='store_true',
+        help="Serve from this process instead of detaching, eg. under a service manager"
+    )
+    
+    serve_parser.add_argument(
+        '--stop',
+        action='store_true',
+        help="Stop the running daemon"
+    )
+
+
+def build_berea_parser(downloaded_translations, command=None):
+    """Build the argument parser, with only `command`'s subparser if given,
+    so running a command doesn't build the others or import their modules.
+    """
     description = "Berea: A CLI for studying Scripture."
-    parser = argparse.ArgumentParser(description=description)
+    parser = argparse.ArgumentParser(prog='bible', description=description)
     parser.add_argument('--version', action='version', version=f'%(prog)s {__version__}')
     
     subparsers = parser.add_subparsers(title="Commands", dest="command")
-    add_download_parser(subparsers)
-    add_delete_parser(subparsers, downloaded_translations)
-    add_config_parser(subparsers, downloaded_translations)
-    add_reference_parser(subparsers, downloaded_translations)
-    add_search_parser(subparsers, downloaded_translations)
+    add_parsers = {
+        'download': lambda: add_download_parser(subparsers),
+        'update': lambda: add_update_parser(subparsers),
+        'delete': lambda: add_delete_parser(subparsers, downloaded_translations),
+        'config': lambda: add_config_parser(subparsers, downloaded_translations),
+        'reference': lambda: add_reference_parser(subparsers, downloaded_translations),
+        'search': lambda: add_search_parser(subparsers, downloaded_translations),
+        'concordance': lambda: add_concordance_parser(subparsers, downloaded_translations),
+        'serve': lambda: add_serve_parser(subparsers),
+    }
+    
+    for name, add_parser in add_parsers.items():
+        if command in (None, name):
+            add_parser()
+    
+    return parser
+
+
+def complete_argv(argv):
+    """Fill in the command if it's left out of the arguments.
+    """
+    if not argv:
+        return ['--help']
+    
+    # Set reference as the default command
+    if argv[0] not in COMMANDS:
+        return ['reference', *argv]
+    
+    return argv
+
+
+def serve_http(args, session):
+    import asyncio
+    from berea.server import BibleHTTPServer
+    
+    if args.workers is not None and args.workers < 1:
+        return "Error: '--workers' must be positive."
+    
+    server = BibleHTTPServer(
+        CLIConfig.get_default_translation(),
+        session.scopes,
+        session.get_search_cache(),
+        args.workers
+    )
+    
+    def ready(_):
+        print(f"Serving on http://{args.host}:{args.port}. Stop with Ctrl+C.", flush=True)
+    
+    try:
+        asyncio.run(server.serve_forever(args.host, args.port, ready))
+    except KeyboardInterrupt:
+        pass
+    except OSError as ex:
+        return f"Error: Can't serve on {args.host}:{args.port}: {ex.strerror}."
+    finally:
+        server.close()
+    
+    return "Server stopped."
+
+
+def serve(args, session):
+    from berea.daemon import BibleDaemon, exit_on_sigterm, is_daemon_running, stop_daemon
+    
+    path = get_daemon_socket_path()
+    
+    if args.http:
+        return serve_http(args, session)
+    
+    if args.stop:
+        if stop_daemon(path):
+            return "Daemon stopped."
+        return "Error: The daemon isn't running."
+    
+    if not args.daemon:
+        return "Error: Choose what to serve with '--daemon' or '--http'."
+    
+    if is_daemon_running(path):
+        return f"Error: The daemon is already running on {path}."
+    
+    daemon = BibleDaemon(partial(run_captured, session=session), path)
     
-    return parser.parse_args()
+    if args.foreground:
+        exit_on_sigterm()
+        print(f"Serving on {path}. Stop with Ctrl+C or 'bible serve --stop'.", flush=True)
+        
+        try:
+            daemon.serve_forever()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            daemon.close()
+        
+        return "Daemon stopped."
+    
+    # The session holds no connections yet, so it's safe to fork
+    pid = daemon.detach()
+    return f"Daemon started on {path} (pid {pid}). Stop it with 'bible serve --stop'."
+
+
+def run_captured(argv, session):
+    """Run a command for the daemon, capturing its output.
+
+    Returns:
+        tuple: The command's `(stdout, stderr, status)`.
+    """
+    stdout = StringIO()
+    stderr = StringIO()
+    status = 0
+    
+    with redirect_stdout(stdout), redirect_stderr(stderr):
+        try:
+            if complete_argv(argv)[0] not in DAEMON_COMMANDS:
+                sys.exit("Error: The daemon only runs the reference, search and concordance commands.")
+            
+            run(argv, session)
+        
+        # Eg. argparse errors and '--help'
+        except SystemExit as ex:
+            if isinstance(ex.code, str):
+                print(ex.code, file=sys.stderr)
+                status = 1
+            else:
+                status = ex.code or 0
+        
+        # A failed command shouldn't take the daemon down with it
+        except Exception:
+            import traceback
+            
+            traceback.print_exc()
+            status = 1
+    
+    return stdout.getvalue(), stderr.getvalue(), status
 
 
 def main():
-    if len(sys.argv) < 2:
-        sys.argv = ['bible', '--help']
+    argv = complete_argv(sys.argv[1:])
     
-    commands = [
-        '--help',
-        '-h',
-        '--version',
-        'download',
-        'delete',
-        'config',
-        'reference',
-        'search',
-    ]
+    path = get_daemon_socket_path()
     
-    # Set reference as the default command
-    if sys.argv[1] not in commands:
-        sys.argv.insert(1, 'reference')
+    # A running daemon answers without the startup cost of a new process.
+    # Without its socket, there's no need to import the socket module.
+    if argv[0] in DAEMON_COMMANDS and os.path.exists(path):
+        from berea.daemon import forward_request
+        
+        response = forward_request(argv, path)
+        
+        if response is not None:
+            stdout, stderr, status = response
+            sys.stderr.write(stderr)
+            write_stream([stdout])
+            
+            if status:
+                sys.exit(status)
+            return
     
-    downloaded_translations = get_downloaded_translations()
-    args = parse_berea_args(downloaded_translations)
+    session = CLISession()
+    
+    try:
+        run(argv, session)
+    finally:
+        session.close()
+
+
+def run(argv, session):
+    """Run a command, reusing the state in `session`.
+    """
+    session.refresh()
+    downloaded_translations = session.downloaded_translations
+    argv = complete_argv(argv)
+    # Options like '--help' are handled by the parser of every command
+    command = None if argv[0].startswith('-') else argv[0]
+    args = session.get_parser(command).parse_args(argv)
+    
+    if args.command == 'serve':
+        print(serve(args, session))
+        return
 
     if args.command == 'config':
         CLIConfig.set_default_translation(args.value)
         print('Default translation updated.')
         return 
-
-    bible = BibleClient(args.translation)
-    output = ''
     
     if args.command == 'download':
-        # Save first downloaded translation as the default
-        if not downloaded_translations:
-            CLIConfig.set_default_translation(args.translation)
-        
-        try:
-            output = bible.create_bible_db()
-        except BibleInputError as ex:
-            output = str(ex)
+        print(download(args, downloaded_translations))
+        return
+    
+    if args.command == 'update':
+        if downloaded_translations:
+            print(update(args, downloaded_translations))
+        else:
+            print("Error: Download a translation before invoking 'update'.")
+        return
+
+    # Translations after the first are compared with it, eg. `-t KJV,BSB`
+    compared = []
+    if args.command == 'reference' and args.translation:
+        args.translation, *compared = args.translation.split(',')
+    
+    # Repeated searches are read back from the cache instead of run again
+    cache = None
+    if args.command == 'search' and args.translation in downloaded_translations and not args.no_cache:
+        cache = session.get_search_cache()
     
-    elif not downloaded_translations:
+    bible = session.get_bible(args.translation, cache)
+    output = ''
+    
+    if args.translation not in downloaded_translations:
         output = f"Error: Download a translation before invoking '{args.command}'."
         
     elif args.command == 'delete':
+        # Listed before the translation's DB is removed
+        translations = downloaded_translations.list()
         output = bible.delete_translation()
 
         # Update config if no other translation is downloaded
-        if [args.translation] == downloaded_translations:
+        if [args.translation] == translations:
             CLIConfig.set_default_translation('None')
         
         # Update config if default translation is deleted
@@ -212,97 +1020,213 @@ def main():
         verse_records = []
         
         try:
-            if not args.chapter:
-                verse_records = bible.get_verses_by_book(args.book)
-            elif not args.verse:
-                verse_records = bible.get_verses_by_chapter(
-                    args.book,
-                    args.chapter
+            if compared:
+                reference = args.book
+                if args.chapter:
+                    reference += f" {args.chapter}"
+                if args.verse:
+                    reference += f":{args.verse}"
+                
+                translations = [bible.translation, *compared]
+                output = render_comparison(
+                    translations,
+                    args.format,
+                    bible.compare_passages(reference, translations),
+                    args.columns
                 )
-            elif '-' in args.verse:
-                verse_records = bible.get_verses(
-                    args.book,
-                    args.chapter,
-                    args.verse
+            
+            # The book argument may hold one or more full references
+            elif not args.chapter:
+                output = render_passages(
+                    bible,
+                    args.format,
+                    bible.get_passages(args.book),
+                    args.verse_numbers
                 )
+            
             else:
-                verse_records = bible.get_verse(
+                if not args.verse:
+                    verse_records = bible.get_verses_by_chapter(
+                        args.book,
+                        args.chapter
+                    )
+                elif '-' in args.verse:
+                    verse_records = bible.get_verses(
+                        args.book,
+                        args.chapter,
+                        args.verse
+                    )
+                else:
+                    verse_records = bible.get_verse(
+                        args.book,
+                        args.chapter,
+                        args.verse
+                    )
+                
+                output = render_reference_results(
+                    bible,
+                    args.format,
+                    verse_records,
+                    args.verse_numbers,
                     args.book,
                     args.chapter,
                     args.verse
                 )
-            
-            output = render_reference_results(
-                bible,
-                args.format,
-                verse_records,
-                args.verse_numbers,
-                args.book,
-                args.chapter,
-                args.verse
-            )
         except BibleInputError as ex:
             output = str(ex)
         
+    elif args.command == 'concordance':
+        testament = None
+        if args.new_testament:
+            testament = 'nt'
+        elif args.old_testament:
+            testament = 'ot'
+        
+        limit = args.limit
+        if limit is None and not args.terms:
+            limit = CONCORDANCE_SIZE
+        
+        search = {'testament': testament, 'book': args.book, 'scope': args.scope}
+        
+        try:
+            if len([value for value in search.values() if value]) > 1:
+                output = (
+                    "Invalid concordance: choose one of a book, a testament or a scope."
+                )
+            elif limit is not None and limit < 1:
+                output = "Invalid concordance: '--limit' must be positive."
+            else:
+                words = bible.get_concordance(args.terms, limit=limit, **search)
+                output = render_concordance(bible, words, args.terms, **search)
+        except BibleInputError as ex:
+            output = str(ex)
+    
     elif args.command ==  'search':
         verse_records = []
+        testament = None
+        if args.new_testament:
+            testament = 'nt'
+        elif args.old_testament:
+            testament = 'ot'
+        
+        error = search_scope_error(args)
+        paged = args.limit is not None or args.page or args.after is not None
+        limit = args.limit if args.limit is not None else (SEARCH_PAGE_SIZE if paged else None)
+        
+        if args.all_translations and paged:
+            error = (
+                "Invalid search: cannot page results with the "
+                "'-a, --all-translations' flag."
+            )
+        elif args.page and args.after is not None:
+            error = "Invalid search: cannot combine '--page' with '--after'."
+        elif args.page is not None and args.page < 1 or args.limit is not None and args.limit < 1:
+            error = "Invalid search: '--page' and '--limit' must be positive."
+        elif args.after is not None and args.rank != isinstance(args.after, tuple):
+            error = "Invalid search: the '--after' cursor is from a search with a different order."
+        elif (args.count or args.histogram) and (paged or args.rank or args.all_translations):
+            error = (
+                "Invalid search: cannot page, rank or search every translation "
+                "with the '--count' and '--histogram' flags."
+            )
+        
+        # Building an index takes a few seconds, so say why we're waiting
+        if not error and not args.all_translations and args.mode not in bible.get_search_indexes():
+            sys.stderr.write(
+                f"Building the '{args.mode}' search index for {args.translation}...\n"
+            )
+        
+        search = {
+            'testament': testament,
+            'book': args.book,
+            'chapter': args.chapter,
+            'scope': args.scope,
+        }
+        
         try:
-            if args.chapter:
-                if args.new_testament:
-                    output = (
-                        "Invalid search: cannot search a chapter with the "
-                        "'-NT, --new_testament' flag."
-                    )
-                elif args.old_testament:
-                    output = (
-                        "Invalid search: cannot search a chapter with the "
-                        "'-OT, --old_testament' flag."
-                    )
-                else:
-                    verse_records = bible.search_chapter(
+            if error:
+                output = error
+            elif args.count:
+                total = bible.count_matches(args.phrase, mode=args.mode, **search)
+                output = render_search_count(bible, total, args.phrase, **search)
+            elif args.histogram:
+                counts = bible.count_matches_by(
+                    args.phrase,
+                    args.histogram,
+                    mode=args.mode,
+                    **search
+                )
+                output = render_search_histogram(
+                    bible,
+                    counts,
+                    args.phrase,
+                    args.histogram,
+                    **search
+                )
+            elif args.all_translations:
+                verse_records = search_translations(
+                    args.phrase,
+                    downloaded_translations,
+                    testament,
+                    args.book,
+                    args.chapter,
+                    args.scope,
+                    bible.scopes,
+                    args.mode
+                )
+                
+                if verse_records:
+                    output = render_merged_search_results(
+                        verse_records,
                         args.phrase,
-                        args.book,
-                        args.chapter
-                    )
-            elif args.book:
-                if args.new_testament:
-                    output = (
-                        "Invalid search: cannot search a book with the "
-                        "'-NT, --new_testament' flag."
-                    )
-                elif args.old_testament:
-                    output = (
-                        "Invalid search: cannot search a book with the "
-                        "'-OT, --old_testament' flag."
+                        downloaded_translations
                     )
-                else:
-                    verse_records = bible.search_book(args.phrase, args.book)
-            elif args.new_testament:
-                verse_records = bible.search_testament(args.phrase, 'nt')
-            elif args.old_testament:
-                verse_records = bible.search_testament(args.phrase, 'ot')
             else:
-                verse_records = bible.search_bible(args.phrase)
-            testament = None
-            if args.new_testament:
-                testament = 'nt'
-            elif args.old_testament:
-                testament = 'ot'
-            
-            if verse_records:
-                output = render_search_results(
-                    bible,
-                    verse_records,
+                # Count first so the header is printed before any match
+                total = bible.count_matches(
+                    args.phrase,
+                    testament,
+                    args.book,
+                    args.chapter,
+                    args.scope,
+                    args.mode
+                )
+                verse_records = bible.iter_search(
                     args.phrase,
                     testament,
                     args.book,
-                    args.chapter
+                    args.chapter,
+                    args.scope,
+                    rank=args.rank,
+                    limit=limit,
+                    after=args.after,
+                    offset=((args.page or 1) - 1) * (limit or 0),
+                    mode=args.mode
                 )
+                footer = None
+                
+                # A page is small enough to fetch, and ends with the next cursor
+                if paged:
+                    verse_records = list(verse_records)
+                    footer = search_page_footer(args, verse_records, limit, total)
+                
+                if total and (verse_records or not paged):
+                    write_stream(stream_search_results(
+                        bible,
+                        verse_records,
+                        args.phrase,
+                        testament,
+                        args.book,
+                        args.chapter,
+                        total,
+                        footer,
+                        args.scope
+                    ))
     
         except BibleInputError as ex:
             output = str(ex)
     
-    print(output)
+    write_stream([output, '\n'])
 
 
 if __name__ == "__main__":
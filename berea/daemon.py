@@ -0,0 +1,215 @@
+import json
+import os
+import signal
+import socket
+import sys
+
+from berea.utils import get_daemon_socket_path
+
+
+# Seconds a client has to send its request and read the response, so a
+# stalled client can't hold up the requests queued behind it
+REQUEST_TIMEOUT = 10
+
+
+def send_request(path, request):
+    """Send a request to the daemon listening on `path` and return its response.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        # A stalled daemon raises socket.timeout, an OSError, instead of hanging
+        sock.settimeout(REQUEST_TIMEOUT)
+        sock.connect(path)
+        sock.sendall(json.dumps(request).encode() + b'\n')
+
+        with sock.makefile('rb') as file:
+            line = file.readline()
+
+    # An empty line means the daemon hung up without answering
+    return json.loads(line)
+
+
+def forward_request(argv, path=None):
+    """Run a command in the daemon, if one is running.
+
+    Args:
+        argv (list): The command's arguments, eg. `['reference', 'john', '3', '16']`.
+        path (str, optional): The daemon's socket.
+
+    Returns:
+        tuple: The command's `(stdout, stderr, status)`, or `None` if no
+            daemon answered and the command should be run in-process.
+    """
+    path = path or get_daemon_socket_path()
+
+    # Checking for the socket is cheaper than failing to connect to it
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(path):
+        return None
+
+    try:
+        response = send_request(path, {'argv': argv})
+        return response['stdout'], response['stderr'], response['status']
+
+    # The daemon stopped, or left a stale socket behind. Only read-only
+    # commands are forwarded, so they're safe to run again in-process.
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def exit_on_sigterm():
+    """Exit through `finally` clauses on SIGTERM, eg. to remove the socket.
+    """
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit())
+
+
+def is_daemon_running(path=None):
+    path = path or get_daemon_socket_path()
+
+    if not hasattr(socket, 'AF_UNIX') or not os.path.exists(path):
+        return False
+
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        try:
+            sock.connect(path)
+        except OSError:
+            return False
+
+    return True
+
+
+def stop_daemon(path=None):
+    """Stop the daemon listening on `path`.
+
+    Returns:
+        bool: Whether a daemon was running.
+    """
+    path = path or get_daemon_socket_path()
+
+    if not is_daemon_running(path):
+        return False
+
+    try:
+        send_request(path, {'stop': True})
+    except (OSError, ValueError):
+        pass
+
+    return True
+
+
+class BibleDaemon:
+    """Answers commands sent by `forward_request` over a Unix socket.
+
+    Requests are answered one at a time by `handler`, which takes a
+    command's arguments and returns its `(stdout, stderr, status)`, so it
+    can keep connections and caches warm between requests. Requests and
+    responses are single lines of JSON, eg.
+
+        {"argv": ["reference", "john", "3", "16"]}
+        {"stdout": "For God so loved the world...", "stderr": "", "status": 0}
+    """
+    def __init__(self, handler, path=None):
+        self.handler = handler
+        self.path = path or get_daemon_socket_path()
+        self.sock = None
+        self.running = False
+
+    def bind(self):
+        """Listen on the socket, replacing a stale one left by a daemon that
+        didn't exit cleanly.
+        """
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        # Create the socket owner-only, since other users could otherwise run
+        # commands as this one, even before a chmod
+        umask = os.umask(0o177)
+
+        try:
+            self.sock.bind(self.path)
+        finally:
+            os.umask(umask)
+
+        self.sock.listen()
+
+    def serve_forever(self):
+        """Answer requests until a stop request or SIGTERM.
+        """
+        if self.sock is None:
+            self.bind()
+
+        self.running = True
+
+        while self.running:
+            conn, _ = self.sock.accept()
+
+            with conn:
+                conn.settimeout(REQUEST_TIMEOUT)
+
+                # A client that goes away or sends garbage doesn't get an answer
+                try:
+                    self.handle(conn)
+                except (OSError, ValueError, KeyError):
+                    continue
+
+    def handle(self, conn):
+        with conn.makefile('rb') as file:
+            request = json.loads(file.readline())
+
+        if request.get('stop'):
+            self.running = False
+            response = {'stopped': True}
+
+        else:
+            argv = request['argv']
+
+            if not isinstance(argv, list) or not all(isinstance(arg, str) for arg in argv):
+                raise ValueError(f"Invalid arguments: {argv!r}")
+
+            stdout, stderr, status = self.handler(argv)
+            response = {'stdout': stdout, 'stderr': stderr, 'status': status}
+
+        conn.sendall(json.dumps(response).encode() + b'\n')
+
+    def detach(self):
+        """Fork a daemon process to serve requests in the background.
+
+        The socket is bound first, so it accepts requests as soon as this
+        returns.
+
+        Returns:
+            int: The daemon's process ID.
+        """
+        if self.sock is None:
+            self.bind()
+
+        pid = os.fork()
+
+        if pid:
+            # The daemon owns the socket now, so leave the file in place
+            self.sock.close()
+            self.sock = None
+            return pid
+
+        # Leave the terminal's session, so closing it doesn't stop the daemon
+        os.setsid()
+        devnull = os.open(os.devnull, os.O_RDWR)
+
+        for fd in range(3):
+            os.dup2(devnull, fd)
+
+        exit_on_sigterm()
+
+        try:
+            self.serve_forever()
+        finally:
+            self.close()
+            os._exit(0)
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+            if os.path.exists(self.path):
+                os.remove(self.path)
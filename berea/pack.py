@@ -0,0 +1,263 @@
+import mmap
+import os
+import struct
+from array import array
+
+from berea.books import MAX_NUMBER, split_ordinal
+
+
+# Bump the version whenever the layout changes
+MAGIC = b'BRPK'
+VERSION = 1
+
+# magic, version, book count, chapter count, verse count, names size
+HEADER = struct.Struct('<4sIIIII')
+
+# Every index is an array of unsigned ints, see build_pack() for the layout
+BOOK_FIELDS = 5
+CHAPTER_FIELDS = 3
+VERSE_FIELDS = 3
+
+
+def build_pack(cursor, path):
+    """Write a translation's verses to a packed file for lookups without SQL.
+
+    The file holds a header, then three arrays of unsigned ints indexing
+    books, chapters and verses, then the book names and verse text as
+    UTF-8 blobs:
+
+        books:    book_id, first chapter, chapter count, name start, name end
+        chapters: chapter, first verse, verse count
+        verses:   verse, text start, text end
+    """
+    books = array('I')
+    chapters = array('I')
+    verses = array('I')
+    names = bytearray()
+    text = bytearray()
+
+    book_names = dict(cursor.execute("SELECT id, name FROM books;").fetchall())
+    rows = cursor.execute("""
+    SELECT book_id, chapter, verse, text FROM verses
+    ORDER BY book_id, chapter, verse;
+    """)
+
+    last_book = last_chapter = None
+
+    for book_id, chapter, verse, verse_text in rows:
+        if book_id != last_book:
+            name = book_names[book_id].encode()
+            books.extend([book_id, len(chapters) // CHAPTER_FIELDS, 0, len(names), len(names) + len(name)])
+            names += name
+            last_book, last_chapter = book_id, None
+
+        if chapter != last_chapter:
+            chapters.extend([chapter, len(verses) // VERSE_FIELDS, 0])
+            books[-3] += 1
+            last_chapter = chapter
+
+        encoded = (verse_text or '').encode()
+        verses.extend([verse, len(text), len(text) + len(encoded)])
+        chapters[-1] += 1
+        text += encoded
+
+    header = HEADER.pack(
+        MAGIC,
+        VERSION,
+        len(books) // BOOK_FIELDS,
+        len(chapters) // CHAPTER_FIELDS,
+        len(verses) // VERSE_FIELDS,
+        len(names)
+    )
+
+    with open(path, 'wb') as file:
+        file.write(header)
+        # Native byte order matches the machine that reads the pack
+        for index in [books, chapters, verses]:
+            index.tofile(file)
+        file.write(names)
+        file.write(text)
+        file.flush()
+        os.fsync(file.fileno())
+
+
+class VersePack:
+    """Memory-mapped view of a file written by `build_pack`.
+    """
+    def __init__(self, path):
+        with open(path, 'rb') as file:
+            self.mmap = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, book_count, chapter_count, verse_count, names_size = (
+            HEADER.unpack_from(self.mmap)
+        )
+
+        if magic != MAGIC or version != VERSION:
+            self.mmap.close()
+            raise ValueError(f"Unsupported verse pack: {path}")
+
+        # Slice the index arrays out of the map without copying them
+        view = memoryview(self.mmap)
+        offset = HEADER.size
+        item = array('I').itemsize
+        sections = []
+
+        for count, fields in [
+            (book_count, BOOK_FIELDS),
+            (chapter_count, CHAPTER_FIELDS),
+            (verse_count, VERSE_FIELDS),
+        ]:
+            size = count * fields * item
+            sections.append(view[offset:offset + size].cast('I'))
+            offset += size
+
+        self.book_index, self.chapter_index, self.verse_index = sections
+        self.names_offset = offset
+        self.text_offset = offset + names_size
+
+        # Position of each book in book_index
+        self.book_positions = {
+            self.book_index[i * BOOK_FIELDS]: i for i in range(book_count)
+        }
+
+    @property
+    def books(self):
+        """`(id, name)` for every book, like the `books` table.
+        """
+        books = []
+
+        for book_id, position in self.book_positions.items():
+            _, _, _, start, end = self.book_fields(position)
+            name = bytes(self.mmap[self.names_offset + start:self.names_offset + end])
+            books.append((book_id, name.decode()))
+
+        return books
+
+    def book_fields(self, position):
+        start = position * BOOK_FIELDS
+        return self.book_index[start:start + BOOK_FIELDS]
+
+    def find(self, index, fields, first, count, number):
+        """Find the position of a chapter or verse number within a run.
+
+        Numbers are usually consecutive from the first one, so the position
+        is computed directly and only searched for if there are gaps.
+        """
+        if count == 0:
+            return None
+
+        position = first + number - index[first * fields]
+
+        if first <= position < first + count and index[position * fields] == number:
+            return position
+
+        for position in range(first, first + count):
+            if index[position * fields] == number:
+                return position
+
+        return None
+
+    def records(self, first, last):
+        """Verse records for verse positions `first` up to `last` (exclusive).
+        """
+        records = []
+
+        for position in range(first, last):
+            verse, start, end = self.verse_index[position * VERSE_FIELDS:(position + 1) * VERSE_FIELDS]
+            text = self.mmap[self.text_offset + start:self.text_offset + end]
+            records.append({'verse': verse, 'text': text.decode()})
+
+        return records
+
+    def chapter_span(self, book_id, chapter=None):
+        """First and last (exclusive) verse positions of a book or chapter.
+        """
+        position = self.book_positions.get(book_id)
+
+        if position is None:
+            return 0, 0
+
+        _, first_chapter, chapter_count, _, _ = self.book_fields(position)
+
+        if chapter is None:
+            chapters = range(first_chapter, first_chapter + chapter_count)
+        else:
+            found = self.find(
+                self.chapter_index, CHAPTER_FIELDS, first_chapter, chapter_count, chapter
+            )
+            chapters = range(found, found + 1) if found is not None else range(0)
+
+        if not chapters:
+            return 0, 0
+
+        first_verse = self.chapter_index[chapters[0] * CHAPTER_FIELDS + 1]
+        last_chapter = chapters[-1] * CHAPTER_FIELDS
+        last_verse = self.chapter_index[last_chapter + 1] + self.chapter_index[last_chapter + 2]
+
+        return first_verse, last_verse
+
+    def get_verses(self, book_id, chapter=None, verse_start=None, verse_end=None):
+        """Verses of a book, a chapter, or a range of verses in a chapter.
+        """
+        first, last = self.chapter_span(book_id, chapter)
+
+        if verse_start is None:
+            return self.records(first, last)
+
+        if verse_end is None:
+            verse_end = verse_start
+
+        count = last - first
+        start = self.find(self.verse_index, VERSE_FIELDS, first, count, verse_start)
+        end = self.find(self.verse_index, VERSE_FIELDS, first, count, verse_end)
+
+        if start is not None and end is not None:
+            return self.records(start, end + 1)
+
+        # A bound is missing from the chapter, eg. a range past its last verse.
+        # Verse numbers ascend within a chapter, so the range is contiguous.
+        positions = [
+            position for position in range(first, last)
+            if verse_start <= self.verse_index[position * VERSE_FIELDS] <= verse_end
+        ]
+
+        if not positions:
+            return []
+
+        return self.records(positions[0], positions[-1] + 1)
+
+    def get_range(self, start, end):
+        """Verses of one book with ordinals from `start` to `end` (inclusive).
+        """
+        book_id, chapter_start, verse_start = split_ordinal(start)
+        _, chapter_end, verse_end = split_ordinal(end)
+
+        position = self.book_positions.get(book_id)
+
+        if position is None:
+            return []
+
+        _, first_chapter, chapter_count, _, _ = self.book_fields(position)
+        records = []
+
+        for chapter_position in range(first_chapter, first_chapter + chapter_count):
+            chapter = self.chapter_index[chapter_position * CHAPTER_FIELDS]
+
+            if not chapter_start <= chapter <= chapter_end:
+                continue
+
+            first = verse_start if chapter == chapter_start else 0
+            last = verse_end if chapter == chapter_end else MAX_NUMBER
+
+            if first == 0 and last == MAX_NUMBER:
+                records += self.get_verses(book_id, chapter)
+            else:
+                records += self.get_verses(book_id, chapter, first, last)
+
+        return records
+
+    def close(self):
+        for section in [self.book_index, self.chapter_index, self.verse_index]:
+            section.release()
+
+        self.mmap.close()
@@ -1,3 +1,22 @@
+def render_download_progress(translation, downloaded, total=None, elapsed=0):
+    """Creates a one-line progress report, eg. `KJV: 2.1/5.0 MB 1.2 MB/s ETA 3s`
+    """
+    mb = 1024 * 1024
+    rate = downloaded / elapsed if elapsed else 0
+    
+    if total:
+        progress = f"{translation}: {downloaded / mb:.1f}/{total / mb:.1f} MB"
+    else:
+        progress = f"{translation}: {downloaded / mb:.1f} MB"
+    
+    progress += f" {rate / mb:.1f} MB/s"
+    
+    if total and rate:
+        progress += f" ETA {(total - downloaded) / rate:.0f}s"
+    
+    return progress
+
+
 # TODO: Adjustable line length? (BSB wraps lines at 40-43 characters)
 def list_multiline_verse(verse):
     lines = []
@@ -100,6 +119,103 @@ def render_reference_results(bible_client, format, verse_records, verse_numbers=
             return create_markdown_excerpt(bible_client, verse_records, book, chapter, verse, verse_numbers)
 
 
+def render_passages(bible_client, format, passages, verse_numbers=False):
+    """Render passages from `BibleClient.get_passages` in order.
+
+    A single passage is rendered exactly like `render_reference_results`;
+    plaintext passages are labeled when there are several.
+    """
+    rendered = []
+    
+    for (book, chapter, verse), verse_records in passages:
+        output = render_reference_results(
+            bible_client,
+            format,
+            verse_records,
+            verse_numbers,
+            book,
+            chapter,
+            verse
+        )
+        
+        if format == 'txt' and len(passages) > 1:
+            label = create_link_label(bible_client.translation, book, chapter, verse)
+            output = f"{label}\n{output}"
+        
+        rendered.append(output)
+    
+    return '\n\n'.join(rendered)
+
+
+def wrap_column(text, width):
+    """Split text into lines no wider than `width`.
+    """
+    lines = []
+    line = ''
+    
+    for word in text.split():
+        if line and len(line) + len(word) + 1 > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    
+    lines.append(line)
+    return lines
+
+
+def render_comparison(translations, format, passages, columns=False):
+    """Render passages from `BibleClient.compare_passages`.
+
+    Every verse is labeled with its reference. Plaintext verses are
+    interleaved, one translation after another, or laid out side by side
+    in columns. Markdown is rendered as a table.
+    """
+    if format == 'md':
+        output = (
+            f"| Reference | {' | '.join(translations)} |\n"
+            f"|{' --- |' * (len(translations) + 1)}"
+        )
+        
+        for (book, _, _), verse_records in passages:
+            for row in verse_records:
+                texts = [(text or '').strip().replace('|', '\\|') for text in row['texts']]
+                output += f"\n| {book} {row['chapter']}:{row['verse']} | {' | '.join(texts)} |"
+        
+        return output
+    
+    if columns:
+        width = (80 - 3 * (len(translations) - 1)) // len(translations)
+        rows = [
+            ' | '.join(translation.ljust(width) for translation in translations).rstrip(),
+            '-' * (width * len(translations) + 3 * (len(translations) - 1)),
+        ]
+    else:
+        rows = []
+    
+    for (book, _, _), verse_records in passages:
+        for row in verse_records:
+            texts = [(text or '').strip() for text in row['texts']]
+            
+            if columns:
+                cells = [wrap_column(text, width) for text in texts]
+                rows.append(f"\n{book} {row['chapter']}:{row['verse']}")
+                
+                for line in range(max(len(cell) for cell in cells)):
+                    rows.append(' | '.join(
+                        (cell[line] if line < len(cell) else '').ljust(width)
+                        for cell in cells
+                    ).rstrip())
+            
+            else:
+                rows.append(f"\n{book} {row['chapter']}:{row['verse']}")
+                
+                for translation, text in zip(translations, texts):
+                    rows += list_multiline_verse(f"{translation}: {text}")
+    
+    return '\n'.join(rows).strip('\n')
+
+
  # TODO: Output txt, markdown table, csv format
 def render_search_results(
     bible_client,
@@ -107,32 +223,177 @@ def render_search_results(
     phrase,
     testament=None,
     book=None,
-    chapter=None
+    chapter=None,
+    total=None,
+    footer=None,
+    scope=None
 ):
+    """Render search matches under a header counting them.
+
+    Args:
+        total (int, optional): Matches in total, when `verse_records` is
+            only a page of them. Defaults to `len(verse_records)`.
+        footer (str, optional): Line to end with, eg. how to get the next page.
+        scope (str, optional): Scope searched, see `BibleClient.get_scope`.
+    """
+    if total is None:
+        verse_records = list(verse_records)
+        total = len(verse_records)
+    
+    return ''.join(stream_search_results(
+        bible_client,
+        verse_records,
+        phrase,
+        testament,
+        book,
+        chapter,
+        total,
+        footer,
+        scope
+    ))
+
+
+def describe_search(bible_client, testament=None, book=None, chapter=None, scope=None):
+    """Describe what a search covered, eg. `in John (KJV)`.
+    """
+    translation = bible_client.translation
+    
     if chapter:
         book = bible_client.get_book_from_abbreviation(book)
-        output = f"{len(verse_records)} occurrences of '{phrase}' in {book} {chapter} ({bible_client.translation}):\n___\n"
-        for verse in verse_records:
-            output += f"\n{verse['book']} {verse['chapter']}:{verse['verse']}:\n{verse['text']}\n___\n"
-        
+        return f"in {book} {chapter} ({translation})"
     elif book:
         book = bible_client.get_book_from_abbreviation(book)
-        output = f"{len(verse_records)} occurrences of '{phrase}' in {book} ({bible_client.translation}):\n___\n"
-        for verse in verse_records:
-            output += f"\n{verse['book']} {verse['chapter']}:{verse['verse']}:\n{verse['text']}\n___\n"
-            
+        return f"in {book} ({translation})"
     elif testament:
         testament = 'New Testament' if testament == 'nt' else 'Old Testament'
-        output = f"{len(verse_records)} occurrences of '{phrase}' in the {testament} ({bible_client.translation}):\n___\n"
-        for verse in verse_records:
-            output += f"\n{verse['book']} {verse['chapter']}:{verse['verse']}:\n{verse['text']}\n___\n"
-            
+        return f"in the {testament} ({translation})"
+    elif scope:
+        return f"in {scope} ({translation})"
+    
+    return f"in the {translation} Bible"
+
+
+def render_search_count(bible_client, total, phrase, **search):
+    """Render a count of matches from `BibleClient.count_matches`.
+
+    Args:
+        search: The search's `testament`, `book`, `chapter` or `scope`.
+    """
+    return f"{total} occurrences of '{phrase}' {describe_search(bible_client, **search)}."
+
+
+def render_search_histogram(bible_client, counts, phrase, by='book', **search):
+    """Render the matches per book or chapter from `BibleClient.count_matches_by`
+    as a table with a bar for each count.
+
+    Args:
+        search: The search's `testament`, `book`, `chapter` or `scope`.
+    """
+    searched = describe_search(bible_client, **search)
+    total = sum(row[-1] for row in counts)
+    
+    if by == 'book':
+        labels = [book for book, _ in counts]
     else:
-        output = f"{len(verse_records)} occurrences of '{phrase}' in the {bible_client.translation} Bible:\n___\n"
-        for verse in verse_records:
-            output += f"\n{verse['book']} {verse['chapter']}:{verse['verse']}:\n{verse['text']}\n___\n"
+        labels = [f"{book} {chapter}" for book, chapter, _ in counts]
     
-    # Replace highlight bold tags with ANSI escape codes
-    output = output.replace('<b>', '\033[1m')
-    output = output.replace('</b>', '\033[0m')
-    return output
+    lines = [f"{total} occurrences of '{phrase}' {searched}, by {by}:"]
+    
+    if counts:
+        label_width = max(len(label) for label in labels)
+        most = max(row[-1] for row in counts)
+        count_width = len(str(most))
+        
+        for label, row in zip(labels, counts):
+            # Bars are scaled so the largest count fills 40 columns
+            bar = '#' * max(1, round(row[-1] / most * 40))
+            lines.append(f"{label:<{label_width}}  {row[-1]:>{count_width}}  {bar}")
+    
+    return '\n'.join(lines)
+
+
+def render_concordance(bible_client, words, terms=(), **search):
+    """Render word counts from `BibleClient.get_concordance` as a table.
+
+    Args:
+        terms (list, optional): The words and prefixes that were counted.
+        search: The concordance's `testament`, `book`, `chapter` or `scope`.
+    """
+    searched = describe_search(bible_client, **search)
+    
+    if terms:
+        quoted = ', '.join(f"'{term}'" for term in terms)
+        lines = [f"Concordance of {quoted} {searched}:"]
+    else:
+        lines = [f"Most frequent words {searched}:"]
+    
+    if not words:
+        lines.append("No matching words.")
+        return '\n'.join(lines)
+    
+    header = ('Word', 'Verses', 'Occurrences')
+    word_width = max(len(header[0]), *(len(word) for word, _, _ in words))
+    verses_width = max(len(header[1]), *(len(str(verses)) for _, verses, _ in words))
+    
+    for word, verses, occurrences in [header, *words]:
+        lines.append(f"{word:<{word_width}}  {verses:>{verses_width}}  {occurrences:>11}")
+    
+    return '\n'.join(lines)
+
+
+def highlight_ansi(text):
+    """Replace highlight bold tags with ANSI escape codes.
+    """
+    return text.replace('<b>', '\033[1m').replace('</b>', '\033[0m')
+
+
+def stream_search_results(
+    bible_client,
+    verse_records,
+    phrase,
+    testament=None,
+    book=None,
+    chapter=None,
+    total=0,
+    footer=None,
+    scope=None
+):
+    """Yield the output of `render_search_results` a match at a time.
+
+    Matches are rendered as they're read from `verse_records`, eg. a cursor
+    from `BibleClient.iter_search`, so output starts before the search ends
+    and memory doesn't grow with the number of matches. The header's total
+    has to be counted beforehand, see `BibleClient.count_matches`.
+    """
+    searched = describe_search(bible_client, testament, book, chapter, scope)
+    
+    yield highlight_ansi(f"{total} occurrences of '{phrase}' {searched}:\n___\n")
+    
+    for verse in verse_records:
+        yield highlight_ansi(
+            f"\n{verse['book']} {verse['chapter']}:{verse['verse']}:\n{verse['text']}\n___\n"
+        )
+    
+    if footer:
+        yield f"\n{footer}\n"
+
+
+def render_merged_search_results(verse_records, phrase, translations):
+    """Render matches from `search_translations`, labeling each verse with
+    the translations it matched in.
+    """
+    lines = [
+        f"{len(verse_records)} verses matching '{phrase}' in "
+        f"{len(translations)} translations ({', '.join(translations)}):\n___\n"
+    ]
+    
+    for verse in verse_records:
+        matched = ', '.join(verse['matches'])
+        lines.append(f"\n{verse['book']} {verse['chapter']}:{verse['verse']} ({matched}):\n")
+        
+        for translation, text in verse['matches'].items():
+            lines.append(f"{translation}: {text}\n")
+        
+        lines.append("___\n")
+    
+    return highlight_ansi(''.join(lines))
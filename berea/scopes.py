@@ -0,0 +1,111 @@
+from berea.books import MAX_NUMBER, verse_ordinal
+
+
+# Book IDs follow the 66-book Protestant order every translation DB uses,
+# eg. 1 is Genesis and 40 is Matthew
+SCOPES = {
+    'ot': [(1, 39)],
+    'nt': [(40, 66)],
+    'pentateuch': [(1, 5)],
+    'history': [(6, 17)],
+    'wisdom': [(18, 22)],
+    'prophets': [(23, 39)],
+    'major prophets': [(23, 27)],
+    'minor prophets': [(28, 39)],
+    'gospels': [(40, 43)],
+    'synoptics': [(40, 42)],
+    'paul': [(45, 57)],
+    'general epistles': [(58, 65)],
+    'epistles': [(45, 65)],
+}
+
+SCOPE_ALIASES = {
+    'old testament': 'ot',
+    'new testament': 'nt',
+    'torah': 'pentateuch',
+    'law': 'pentateuch',
+    'poetry': 'wisdom',
+    'pauline': 'paul',
+    'pauline epistles': 'paul',
+}
+
+
+def merge_ranges(ranges):
+    """Sort ranges and merge the ones that overlap or touch.
+    """
+    merged = []
+    
+    for first, last in sorted(ranges):
+        if merged and first <= merged[-1][1] + 1:
+            merged[-1] = (merged[-1][0], max(merged[-1][1], last))
+        else:
+            merged.append((first, last))
+    
+    return merged
+
+
+def resolve_scope(scope, book_resolver, user_scopes=None, seen=()):
+    """Compile a scope to ranges of book IDs.
+
+    A scope is a comma-separated list of named scopes, books and ranges of
+    books, eg. `gospels, Acts` or `Gen-Deut`. Named scopes are predefined
+    in `SCOPES`, or user-defined in `user_scopes` using the same syntax.
+
+    Args:
+        scope (str): The scope to compile.
+        book_resolver (BookResolver): Resolves book names and abbreviations.
+        user_scopes (dict, optional): User-defined scopes by lowercase name.
+
+    Returns:
+        list: `(first_book_id, last_book_id)` ranges, sorted and merged.
+
+    Raises:
+        ValueError: If a scope, book or range is invalid, with the part
+            that is, eg. `'Gen-Foo'`.
+    """
+    user_scopes = user_scopes or {}
+    ranges = []
+    
+    for item in scope.split(','):
+        name = item.strip().lower()
+        name = SCOPE_ALIASES.get(name, name)
+    
+        if not name:
+            raise ValueError(f"Invalid scope: '{scope}'.")
+    
+        if name in user_scopes:
+            # A scope defined in terms of itself would never resolve
+            if name in seen:
+                raise ValueError(f"Invalid scope: '{item.strip()}' refers to itself.")
+    
+            ranges += resolve_scope(user_scopes[name], book_resolver, user_scopes, (*seen, name))
+    
+        elif name in SCOPES:
+            ranges += SCOPES[name]
+    
+        else:
+            first, _, last = name.partition('-')
+            first_name = book_resolver.resolve(first.strip())
+            last_name = book_resolver.resolve(last.strip() or first.strip())
+    
+            if not first_name or not last_name:
+                raise ValueError(f"Invalid scope: '{item.strip()}'.")
+    
+            first_id = book_resolver.ids[first_name]
+            last_id = book_resolver.ids[last_name]
+    
+            if first_id > last_id:
+                raise ValueError(f"Invalid scope: '{item.strip()}' is backwards.")
+    
+            ranges.append((first_id, last_id))
+    
+    return merge_ranges(ranges)
+
+
+def book_ordinal_ranges(ranges):
+    """Convert ranges of book IDs to the ranges of verse ordinals they cover.
+    """
+    return [
+        (verse_ordinal(first, 0, 0), verse_ordinal(last, MAX_NUMBER, MAX_NUMBER))
+        for first, last in ranges
+    ]
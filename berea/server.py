@@ -0,0 +1,398 @@
+import asyncio
+import hashlib
+import json
+import sqlite3
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlsplit
+
+from berea.bible import (
+    SEARCH_INDEXES,
+    BibleClient,
+    BibleInputError,
+    format_search_cursor,
+    parse_search_cursor,
+    search_cursor,
+)
+from berea.utils import is_translation_downloaded
+
+
+DEFAULT_HOST = '127.0.0.1'
+DEFAULT_PORT = 8000
+
+# Matches returned by /search without a limit, and the most it returns
+SEARCH_LIMIT = 100
+MAX_SEARCH_LIMIT = 1000
+
+# Bound on a request line and its headers
+MAX_HEAD_SIZE = 16 * 1024
+
+
+def get_param(params, name, default=None):
+    values = params.get(name)
+    return values[-1] if values else default
+
+
+def get_int_param(params, name, default=None):
+    value = get_param(params, name)
+
+    if value is None:
+        return default
+
+    try:
+        return int(value)
+    except ValueError:
+        raise BibleInputError(f"Invalid {name}={value!r}.")
+
+
+def get_query(params):
+    query = get_param(params, 'q')
+
+    if not query:
+        raise BibleInputError("Specify the query with 'q'.")
+
+    return query
+
+
+def get_reference_json(reference, verse_records):
+    book, chapter, verse = reference
+    return {'book': book, 'chapter': chapter, 'verse': verse, 'verses': verse_records}
+
+
+class BibleHTTPServer:
+    """JSON API over HTTP for looking up, searching and comparing passages.
+
+    Requests are parsed on an asyncio event loop, and their queries run on
+    a bounded pool of threads, each with its own connection to every
+    translation it reads. Verses only change when a translation is
+    replaced, so responses are tagged with the DBs they were read from,
+    and a request with a matching `If-None-Match` is answered with a 304
+    without querying them.
+
+        GET /reference?q=John 3:16; Ps 23&t=KJV
+        GET /search?q=living water&book=john&limit=10&after=43004010
+        GET /count?q=covenant&testament=ot&by=book
+        GET /compare?q=John 3:16-17&t=KJV,BSB
+    """
+    def __init__(self, default_translation=None, scopes=None, cache=None, max_workers=None):
+        self.default_translation = default_translation
+        self.scopes = scopes
+        self.cache = cache
+        self.clients = {}
+        # The fingerprint of each client's DB when it was opened
+        self.fingerprints = {}
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix='berea-http')
+        self.routes = {
+            '/reference': self.reference,
+            '/search': self.search,
+            '/count': self.count,
+            '/compare': self.compare,
+        }
+
+    def get_bible(self, translation):
+        """Get the client of a downloaded translation, reopened if it was
+        reinstalled since.
+
+        Clients are only created on the event loop, so they don't need a lock.
+        """
+        if not translation:
+            raise BibleInputError("Specify a translation with 't'.")
+
+        # Only the names of downloaded translations, so 't' can't open other files
+        if not is_translation_downloaded(translation):
+            raise BibleInputError(f"Translation '{translation}' is not downloaded.")
+
+        bible = self.clients.get(translation) or BibleClient(translation, self.scopes, self.cache)
+
+        try:
+            fingerprint = bible.get_database_fingerprint()
+        except OSError:
+            raise BibleInputError(f"Translation '{translation}' is not downloaded.")
+
+        if self.fingerprints.get(translation) != fingerprint:
+            # The old client isn't closed, since queries may still be running
+            # on it. Its connections are closed once it's garbage collected.
+            if translation in self.clients:
+                bible = BibleClient(translation, self.scopes, self.cache)
+
+            self.clients[translation] = bible
+            self.fingerprints[translation] = fingerprint
+
+        return bible
+
+    def get_etag(self, target, clients):
+        """Tag a response by the request and the DBs it reads.
+        """
+        tag = hashlib.sha1(target.encode())
+
+        for bible in clients:
+            tag.update(self.fingerprints[bible.translation].encode())
+
+        return f'"{tag.hexdigest()}"'
+
+    def reference(self, bible, params):
+        passages = bible.get_passages(get_query(params))
+
+        return {
+            'translation': bible.translation,
+            'passages': [
+                get_reference_json(reference, [
+                    {'verse': record['verse'], 'text': record['text']}
+                    for record in verse_records
+                ])
+                for reference, verse_records in passages
+            ],
+        }
+
+    def search_options(self, bible, params):
+        options = {
+            'testament': get_param(params, 'testament'),
+            'book': get_param(params, 'book'),
+            'chapter': get_param(params, 'chapter'),
+            'scope': get_param(params, 'scope'),
+            'mode': get_param(params, 'mode', 'exact'),
+        }
+
+        if options['chapter'] and not options['book']:
+            raise BibleInputError("Specify the book of 'chapter' with 'book'.")
+
+        # Only one of them limits a search, so don't silently ignore the others
+        limits = [name for name in ['book', 'testament', 'scope'] if options[name]]
+
+        if len(limits) > 1:
+            raise BibleInputError(f"Invalid search: cannot combine '{limits[0]}' with '{limits[1]}'.")
+
+        mode = options['mode']
+
+        if mode not in SEARCH_INDEXES:
+            raise BibleInputError(f"Invalid search {mode=}.")
+
+        # Building an index writes to the DB for a while, so that's left to the CLI
+        if mode not in bible.get_search_indexes():
+            raise BibleInputError(
+                f"The '{mode}' search index of {bible.translation} isn't built, "
+                f"build it with a search, eg. 'bible search <phrase> -m {mode} -t {bible.translation}'."
+            )
+
+        return options
+
+    def search(self, bible, params):
+        rank = get_param(params, 'rank', '') not in ('', '0', 'false')
+        limit = get_int_param(params, 'limit', SEARCH_LIMIT)
+        after = get_param(params, 'after')
+
+        if not 0 < limit <= MAX_SEARCH_LIMIT:
+            raise BibleInputError(f"Invalid limit={limit}, must be from 1 to {MAX_SEARCH_LIMIT}.")
+
+        if after is not None:
+            try:
+                after = parse_search_cursor(after)
+            except ValueError:
+                raise BibleInputError(f"Invalid after={after!r}.")
+
+            if rank != isinstance(after, tuple):
+                raise BibleInputError("The 'after' cursor is from a search with a different order.")
+
+        verse_records = bible.search(
+            get_query(params),
+            rank=rank,
+            limit=limit,
+            after=after,
+            **self.search_options(bible, params)
+        )
+
+        # The next page starts after the last match of a full page
+        cursor = None
+        if len(verse_records) == limit:
+            cursor = format_search_cursor(search_cursor(verse_records[-1]))
+
+        return {
+            'translation': bible.translation,
+            'matches': [dict(record) for record in verse_records],
+            'after': cursor,
+        }
+
+    def count(self, bible, params):
+        phrase = get_query(params)
+        by = get_param(params, 'by')
+        options = self.search_options(bible, params)
+
+        if by is None:
+            return {'translation': bible.translation, 'count': bible.count_matches(phrase, **options)}
+
+        counts = bible.count_matches_by(phrase, by, **options)
+
+        return {
+            'translation': bible.translation,
+            'counts': [
+                dict(zip(['book', 'chapter', 'count'] if by == 'chapter' else ['book', 'count'], row))
+                for row in counts
+            ],
+        }
+
+    def compare(self, bible, params, translations):
+        passages = bible.compare_passages(get_query(params), translations)
+
+        return {
+            'translations': translations,
+            'passages': [
+                get_reference_json(reference, [
+                    {
+                        'chapter': record['chapter'],
+                        'verse': record['verse'],
+                        'texts': dict(zip(translations, record['texts'])),
+                    }
+                    for record in verse_records
+                ])
+                for reference, verse_records in passages
+            ],
+        }
+
+    def run_query(self, handler, *args):
+        """Run a query on a worker thread and serialize its result.
+        """
+        try:
+            return HTTPStatus.OK, json.dumps(handler(*args))
+        except BibleInputError as ex:
+            return HTTPStatus.BAD_REQUEST, json.dumps({'error': str(ex)})
+        # Eg. FTS5 syntax errors in a search phrase
+        except sqlite3.OperationalError as ex:
+            return HTTPStatus.BAD_REQUEST, json.dumps({'error': f"Invalid query: {ex}."})
+
+    async def respond(self, method, target, headers):
+        """Answer a request.
+
+        Returns:
+            tuple: The response's status, JSON body (or `None`) and headers.
+        """
+        if method not in ('GET', 'HEAD'):
+            error = {'error': f"Method {method} is not allowed."}
+            return HTTPStatus.METHOD_NOT_ALLOWED, json.dumps(error), {'Allow': 'GET, HEAD'}
+
+        url = urlsplit(target)
+        handler = self.routes.get(url.path)
+
+        if handler is None:
+            return HTTPStatus.NOT_FOUND, json.dumps({'error': f"No such endpoint: {url.path}."}), {}
+
+        params = parse_qs(url.query)
+
+        try:
+            translations = get_param(params, 't', self.default_translation or '').split(',')
+            clients = [self.get_bible(translation) for translation in translations]
+
+            if len(clients) > 1 and handler != self.compare:
+                raise BibleInputError("Only '/compare' takes several translations.")
+
+            etag = self.get_etag(target, clients)
+        except BibleInputError as ex:
+            return HTTPStatus.BAD_REQUEST, json.dumps({'error': str(ex)}), {}
+
+        response_headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+
+        if etag in headers.get('if-none-match', ''):
+            return HTTPStatus.NOT_MODIFIED, None, response_headers
+
+        args = [clients[0], params]
+        if handler == self.compare:
+            args.append(translations)
+
+        loop = asyncio.get_running_loop()
+        status, body = await loop.run_in_executor(self.executor, partial(self.run_query, handler, *args))
+
+        if status != HTTPStatus.OK:
+            return status, body, {}
+
+        return status, body, response_headers
+
+    async def handle_connection(self, reader, writer):
+        """Answer the requests on a connection, keeping it open between them.
+        """
+        try:
+            while True:
+                try:
+                    head = await reader.readuntil(b'\r\n\r\n')
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+
+                request_line, *header_lines = head.decode('latin-1').rstrip('\r\n').split('\r\n')
+                headers = {}
+
+                for line in header_lines:
+                    name, _, value = line.partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                try:
+                    method, target, version = request_line.split(' ')
+                    # Requests don't need a body, but skip one if it's sent
+                    await reader.readexactly(int(headers.get('content-length', 0)))
+                except (ValueError, asyncio.IncompleteReadError):
+                    writer.write(render_response(HTTPStatus.BAD_REQUEST, None, {}, False))
+                    break
+
+                connection = headers.get('connection', '').lower()
+                keep_alive = connection == 'keep-alive' or version == 'HTTP/1.1' and connection != 'close'
+
+                try:
+                    status, body, response_headers = await self.respond(method, target, headers)
+                # A bug answers with an error instead of dropping the connection
+                except Exception:
+                    traceback.print_exc()
+                    status = HTTPStatus.INTERNAL_SERVER_ERROR
+                    body = json.dumps({'error': "Internal server error."})
+                    response_headers = {}
+
+                writer.write(render_response(
+                    status,
+                    body,
+                    response_headers,
+                    keep_alive,
+                    head=method == 'HEAD'
+                ))
+                await writer.drain()
+
+                if not keep_alive:
+                    break
+
+        except ConnectionError:
+            pass
+
+        finally:
+            writer.close()
+
+    async def start(self, host=DEFAULT_HOST, port=DEFAULT_PORT):
+        return await asyncio.start_server(self.handle_connection, host, port, limit=MAX_HEAD_SIZE)
+
+    async def serve_forever(self, host=DEFAULT_HOST, port=DEFAULT_PORT, ready=None):
+        server = await self.start(host, port)
+
+        if ready:
+            ready(server)
+
+        async with server:
+            await server.serve_forever()
+
+    def close(self):
+        self.executor.shutdown()
+
+        for bible in self.clients.values():
+            bible.close()
+
+
+def render_response(status, body, headers, keep_alive, head=False):
+    """Render an HTTP/1.1 response with a JSON body, or just its head.
+    """
+    lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+    body = body.encode() if body is not None else b''
+
+    if status != HTTPStatus.NOT_MODIFIED:
+        lines.append("Content-Type: application/json; charset=utf-8")
+        lines.append(f"Content-Length: {len(body)}")
+
+    lines += [f"{name}: {value}" for name, value in headers.items()]
+    lines.append(f"Connection: {'keep-alive' if keep_alive else 'close'}")
+    head_bytes = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+    return head_bytes if head else head_bytes + body
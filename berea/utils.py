@@ -7,14 +7,20 @@ def get_source_root():
     return os.path.realpath(os.path.dirname(__file__))
 
 
-def get_app_data_path(subdir=None):
+def get_app_data_path(subdir=None, create=True):
     """
     Retrieve the venv or OS's directory for mutuable app data (translations or config).
+
+    Pass `create=False` to only read from the directory, eg. on startup.
+    Set `BEREA_DATA_PATH` to use another directory, eg. for benchmarks.
     """
     app = 'berea'
     
+    if os.environ.get('BEREA_DATA_PATH'):
+        path = os.environ['BEREA_DATA_PATH']
+    
     # Check if a virtual environment is active
-    if hasattr(sys, 'prefix') and sys.prefix != sys.base_prefix:
+    elif hasattr(sys, 'prefix') and sys.prefix != sys.base_prefix:
         # Get path to venv/lib/python3.XX/site-packages/
         venv_site_packages = getsitepackages()[0]
         path = os.path.join(venv_site_packages, app)
@@ -37,14 +43,37 @@ def get_app_data_path(subdir=None):
             path = os.path.join(path, subdir)
     
     # Create berea directory if it doesn't exist
-    if not os.path.exists(path):
+    if create and not os.path.exists(path):
         os.makedirs(path)
         
     return path
 
 
+def is_translation_name(translation):
+    """Check that a translation's name can't reach outside the translations
+    directory, eg. `../victim`, since names can come from HTTP requests.
+    """
+    return (
+        bool(translation)
+        and translation not in ('.', '..')
+        and '/' not in translation
+        and os.sep not in translation
+        and (not os.altsep or os.altsep not in translation)
+    )
+
+
+def is_translation_downloaded(translation):
+    return is_translation_name(translation) and os.path.exists(
+        f"{get_app_data_path('translations', create=False)}/{translation}.db"
+    )
+
+
+def get_daemon_socket_path():
+    return f"{get_app_data_path(create=False)}/daemon.sock"
+
+
 def get_downloaded_translations():
-    translations_path = get_app_data_path('translations')
+    translations_path = get_app_data_path('translations', create=False)
     
     if os.path.exists(translations_path):
         files = os.listdir(translations_path)
@@ -56,3 +85,5 @@ def get_downloaded_translations():
                 downloaded_translations.append(file[:-3])
         
         return sorted(downloaded_translations)
+    
+    return []
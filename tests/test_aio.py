@@ -0,0 +1,128 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from berea.aio import AsyncBibleClient
+from berea.bible import BibleClient, BibleInputError
+
+
+REFERENCES = [('john', '3', '16'), ('gen', '1', '1-3'), ('ruth', '1', '1')]
+
+
+def test_get_verse():
+    async def get_verses():
+        async with AsyncBibleClient('BSB') as client:
+            return await asyncio.gather(*(
+                client.get_verse(*reference) for reference in REFERENCES
+            ))
+    
+    with BibleClient('BSB') as bible:
+        expected = [bible.get_verse(*reference) for reference in REFERENCES]
+    
+    assert asyncio.run(get_verses()) == expected
+
+
+def test_search():
+    async def search():
+        async with AsyncBibleClient('BSB') as client:
+            return await asyncio.gather(
+                client.search_book('lord', 'ruth'),
+                client.search_chapter('lord', 'ruth', '1'),
+                client.count_matches('lord', book='ruth'),
+            )
+    
+    by_book, by_chapter, total = asyncio.run(search())
+    
+    assert len(by_book) == total
+    assert by_chapter == [row for row in by_book if row['chapter'] == 1]
+
+
+def test_error():
+    async def get_verse():
+        async with AsyncBibleClient('BSB') as client:
+            return await client.get_verse('john', '3', '999')
+    
+    with pytest.raises(BibleInputError):
+        asyncio.run(get_verse())
+
+
+def test_shared_executor():
+    """Clients of several translations share threads, and each thread keeps
+    its connection to each translation."""
+    async def get_verses(executor):
+        clients = [
+            AsyncBibleClient(translation, executor=executor)
+            for translation in ['KJV', 'BSB']
+        ]
+        
+        try:
+            return await asyncio.gather(*(
+                client.get_verse(*reference)
+                for _ in range(20)
+                for client in clients
+                for reference in REFERENCES
+            )), [len(client.bible._connections) for client in clients]
+        finally:
+            for client in clients:
+                await client.close()
+    
+    with ThreadPoolExecutor(2) as executor:
+        results, connections = asyncio.run(get_verses(executor))
+    
+    assert len(results) == 120
+    assert results[0] == results[6]
+    assert all(count <= 2 for count in connections)
+
+
+def test_bounded_concurrency():
+    running = 0
+    peak = 0
+    lock = threading.Lock()
+    
+    def get_verse(*reference):
+        nonlocal running, peak
+        
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        
+        time.sleep(0.01)
+        
+        with lock:
+            running -= 1
+    
+    async def get_verses():
+        async with AsyncBibleClient('BSB', max_workers=8, max_concurrency=3) as client:
+            client.bible.get_verse = get_verse
+            await asyncio.gather(*(client.get_verse(*REFERENCES[0]) for _ in range(12)))
+    
+    asyncio.run(get_verses())
+    
+    assert peak == 3
+
+
+def test_close_waits():
+    """Closing a client with a shared executor waits for its calls in flight."""
+    finished = []
+    
+    def get_verse(*reference):
+        time.sleep(0.05)
+        finished.append(reference)
+    
+    async def close_early(executor):
+        client = AsyncBibleClient('BSB', executor=executor)
+        client.bible.get_verse = get_verse
+        task = asyncio.ensure_future(client.get_verse(*REFERENCES[0]))
+        
+        # Let the call start
+        await asyncio.sleep(0)
+        await client.close()
+        
+        assert finished == [REFERENCES[0]]
+        await task
+    
+    with ThreadPoolExecutor(1) as executor:
+        asyncio.run(close_early(executor))
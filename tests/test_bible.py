@@ -1,8 +1,24 @@
+import os
+import sqlite3
+import threading
 import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 import pytest
 
-from berea.bible import BibleClient, BibleInputError
+from berea import bible as bible_module
+from berea.bible import (
+    BibleClient,
+    BibleInputError,
+    download_translations,
+    fold_term,
+    parse_references,
+    reference_ordinals,
+    search_cursor,
+    search_translations,
+)
+from berea.cache import SearchCache
+from berea.utils import get_downloaded_translations
 
 
 def redirected_to_gen1(response):
@@ -59,6 +75,16 @@ def valid_url(url, gen1_invalid=True):
             "John", "3", "16-18", "BSB",
             "https://www.stepbible.org/?q=version=BSB@reference=John.3.16-John.3.18&options=NVHUG"
         ),
+        (
+            "Creating link for verses across chapters failed",
+            "Genesis", "1", "1-2:3", "BSB",
+            "https://www.stepbible.org/?q=version=BSB@reference=Gen.1.1-Gen.2.3&options=NVHUG"
+        ),
+        (
+            "Creating link for a range of chapters failed",
+            "Matthew", "5-7", None, "BSB",
+            "https://www.stepbible.org/?q=version=BSB@reference=Matt.5-Matt.7&options=NVHUG"
+        ),
         (
             "Creating link for a chapter failed",
             "Psalms", "117", None, "BSB",
@@ -135,6 +161,388 @@ def test_create_bible_db(translation):
     for expected_table in created_tables:
         msg =  f"'{expected_table}' table does not exist."
         assert expected_table in actual_tables, msg
+    
+    msg = 'Build-time PRAGMAs were not reset after installing.'
+    journal_mode = cursor.execute("PRAGMA journal_mode;").fetchone()[0]
+    assert journal_mode == 'delete', msg
+    
+    msg = 'The FTS index should read the text from the verses table.'
+    fts_sql = cursor.execute(
+        "SELECT sql FROM sqlite_master WHERE name = 'fts_verses';"
+    ).fetchone()[0]
+    assert "content='verses'" in fts_sql, msg
+    
+    user_version = cursor.execute("PRAGMA user_version;").fetchone()[0]
+    assert user_version == bible_module.SCHEMA_VERSION
+
+
+@pytest.mark.parametrize(
+    "references, expected",
+    [
+        ("John 3:16", [('John', '3', '16')]),
+        ("1 John 3:16-18", [('1 John', '3', '16-18')]),
+        ("Gen 1:1-2:3", [('Gen', '1', '1-2:3')]),
+        ("Matt 5-7; Ps 23", [('Matt', '5-7', None), ('Ps', '23', None)]),
+        ("3john", [('3john', None, None)]),
+    ]
+)
+def test_parse_references(references, expected):
+    assert parse_references(references) == expected
+
+
+@pytest.mark.parametrize(
+    "reference, expected",
+    [
+        ((43, '3', '16'), (43003016, 43003016)),
+        ((43, '3', '16-18'), (43003016, 43003018)),
+        ((1, '1', '1-2:3'), (1001001, 1002003)),
+        ((40, '5-7', None), (40005000, 40007999)),
+        ((64, None, None), (64000000, 64999999)),
+    ]
+)
+def test_reference_ordinals(reference, expected):
+    assert reference_ordinals(*reference) == expected
+
+
+def test_get_reference_across_chapters():
+    bible = BibleClient('BSB')
+    
+    genesis = bible.get_verses('gen', '1', '1-2:3')
+    expected = bible.get_verses_by_chapter('gen', '1') + bible.get_verses('gen', '2', '1-3')
+    assert [row['text'] for row in genesis] == [row['text'] for row in expected]
+    
+    sermon = bible.get_verses_by_chapter('matt', '5-7')
+    assert [row['verse'] for row in sermon[:2]] == [1, 2]
+    assert len(sermon) == sum(
+        len(bible.get_verses_by_chapter('matt', chapter)) for chapter in ['5', '6', '7']
+    )
+
+
+def test_upgrade_bible_db(tmp_path):
+    """DBs installed before verse ordinals are upgraded when opened.
+    """
+    database = tmp_path / 'OLD.db'
+    conn = sqlite3.connect(database)
+    conn.executescript("""
+    CREATE TABLE books (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE verses (id INTEGER PRIMARY KEY, book_id INTEGER, chapter INTEGER, verse INTEGER, text TEXT);
+    INSERT INTO books VALUES (1, 'Genesis'), (43, 'John');
+    INSERT INTO verses (book_id, chapter, verse, text) VALUES
+        (43, 3, 16, 'For God so loved the world'),
+        (1, 1, 1, 'In the beginning God created'),
+        (1, 2, 1, 'Thus the heavens and the earth were finished');
+    CREATE VIRTUAL TABLE fts_verses USING fts5(book_id, chapter, verse, text);
+    INSERT INTO fts_verses SELECT book_id, chapter, verse, text FROM verses;
+    CREATE INDEX verses_reference_idx ON verses (book_id, chapter, verse, text);
+    """)
+    conn.close()
+    
+    bible = BibleClient('OLD')
+    bible.database = str(database)
+    bible.pack_path = str(tmp_path / 'OLD.pack')
+    
+    with bible:
+        cursor = bible.get_bible_cursor()
+        assert cursor.execute("PRAGMA user_version;").fetchone()[0] == bible_module.SCHEMA_VERSION
+        
+        verse_records = bible.search('God')
+        assert [row['ordinal'] for row in verse_records] == [1001001, 43003016]
+        assert verse_records[1]['chapter'] == 3
+        
+        # Numbers are no longer tokenized
+        assert bible.search('16') == []
+        
+        passage, = bible.get_verse_ranges([(1001001, 1002999)])
+        assert [row['verse'] for row in passage] == [1, 1]
+
+
+def test_create_reference_indexes():
+    """Verses are keyed by their ordinal at install, so a reference is a
+    range scan of the table, and books are looked up by name with an index.
+    """
+    conn = sqlite3.connect(':memory:')
+    conn.executescript("""
+    CREATE TABLE books (id INTEGER PRIMARY KEY, name TEXT);
+    CREATE TABLE verses (id INTEGER PRIMARY KEY, book_id INTEGER, chapter INTEGER, verse INTEGER, text TEXT);
+    INSERT INTO books VALUES (1, 'Genesis'), (43, 'John');
+    INSERT INTO verses (book_id, chapter, verse, text) VALUES
+        (43, 3, 16, 'For God so loved the world'),
+        (1, 2, 1, 'Thus the heavens and the earth were finished'),
+        (1, 1, 1, 'In the beginning God created'),
+        (43, 3, 16, 'For God so loved the world');
+    """)
+    
+    BibleClient('BSB').create_reference_indexes(conn.cursor())
+    
+    assert conn.execute("SELECT ordinal, text FROM verses;").fetchall() == [
+        (1001001, 'In the beginning God created'),
+        (1002001, 'Thus the heavens and the earth were finished'),
+        (43003016, 'For God so loved the world'),
+    ]
+    
+    def get_plan(sql, *params):
+        return ' '.join(row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params))
+    
+    plan = get_plan("SELECT text FROM verses WHERE ordinal BETWEEN ? AND ?;", 1001001, 1002999)
+    assert 'INTEGER PRIMARY KEY' in plan
+    
+    plan = get_plan("SELECT id FROM books WHERE name = ?;", 'John')
+    assert 'books_name_idx' in plan
+
+
+def test_get_passages():
+    bible = BibleClient('BSB')
+    passages = bible.get_passages("John 3:16; Ps 117; 3john 1:2-4")
+    
+    references = [reference for reference, _ in passages]
+    assert references == [
+        ('John', '3', '16'),
+        ('Psalms', '117', None),
+        ('III John', '1', '2-4'),
+    ]
+    
+    expected_records = [
+        bible.get_verse('john', '3', '16'),
+        bible.get_verses_by_chapter('psa', '117'),
+        bible.get_verses('3john', '1', '2-4'),
+    ]
+    
+    for (_, verse_records), expected in zip(passages, expected_records):
+        assert [row['text'] for row in verse_records] == [row['text'] for row in expected]
+
+
+def test_compare_passages():
+    bible = BibleClient('BSB')
+    passages = bible.compare_passages("John 3:16-17; Ps 117", ['KJV', 'BSB'])
+    
+    (reference, verse_records), (_, psalm_records) = passages
+    assert reference == ('John', '3', '16-17')
+    assert [(row['chapter'], row['verse']) for row in verse_records] == [(3, 16), (3, 17)]
+    assert len(psalm_records) == 2
+    
+    kjv = BibleClient('KJV')
+    for translation, position in [(kjv, 0), (bible, 1)]:
+        expected = translation.get_verses('john', '3', '16-17')
+        assert [row['texts'][position] for row in verse_records] == [row['text'] for row in expected]
+    
+    kjv.close()
+    bible.close()
+
+
+def test_compare_passages_errors():
+    with BibleClient('BSB') as bible:
+        with pytest.raises(BibleInputError, match="Translation 'XYZ' is not downloaded."):
+            bible.compare_passages("John 3:16", ['BSB', 'XYZ'])
+        
+        with pytest.raises(BibleInputError, match="Invalid chapter: John 99."):
+            bible.compare_passages("John 99", ['BSB', 'KJV'])
+
+
+def test_search_translations():
+    phrase = '"living water"'
+    verse_records = search_translations(phrase, ['KJV', 'BSB'])
+    
+    references = [(row['book'], row['chapter'], row['verse']) for row in verse_records]
+    assert len(references) == len(set(references)), "Matches weren't merged by verse."
+    
+    for translation in ['KJV', 'BSB']:
+        with BibleClient(translation) as bible:
+            expected = bible.search_bible(phrase)
+        
+        actual = [row['matches'][translation] for row in verse_records if translation in row['matches']]
+        assert actual == [row['text'] for row in expected]
+
+
+@pytest.mark.parametrize("rank", [False, True])
+def test_search_pages(rank):
+    with BibleClient('KJV') as bible:
+        phrase = 'lord'
+        expected = bible.search(phrase, rank=rank)
+        assert bible.count_matches(phrase) == len(expected)
+        
+        pages = []
+        after = None
+        
+        while page := bible.search(phrase, rank=rank, limit=500, after=after):
+            pages += page
+            after = search_cursor(page[-1])
+        
+        assert [row['ordinal'] for row in pages] == [row['ordinal'] for row in expected]
+        
+        offset_page = bible.search(phrase, rank=rank, limit=10, offset=20)
+        assert [row['ordinal'] for row in offset_page] == [row['ordinal'] for row in expected[20:30]]
+
+
+def test_search_ranked_scope():
+    with BibleClient('KJV') as bible:
+        verse_records = bible.search('lord', book='john', rank=True, limit=5)
+        
+        assert len(verse_records) == 5
+        assert {row['book'] for row in verse_records} == {'John'}
+        assert [row['rank'] for row in verse_records] == sorted(row['rank'] for row in verse_records)
+
+
+@pytest.mark.parametrize(
+    "scope, books",
+    [
+        ('gospels', {'Matthew', 'Mark', 'Luke', 'John'}),
+        ('rom-gal, rev', {'Romans', 'I Corinthians', 'II Corinthians', 'Galatians', 'Revelation of John'}),
+    ]
+)
+def test_search_scope(scope, books):
+    with BibleClient('KJV') as bible:
+        verse_records = bible.search_scope('lord', scope)
+        
+        assert {row['book'] for row in verse_records} == books
+        assert bible.count_matches('lord', scope=scope) == len(verse_records)
+
+
+def test_search_user_scope():
+    with BibleClient('KJV', {'Johannine': 'John, 1John-3John, Rev'}) as bible:
+        verse_records = bible.search('love', scope='johannine')
+        
+        assert {row['book'] for row in verse_records} <= {
+            'John', 'I John', 'II John', 'III John', 'Revelation of John'
+        }
+        assert 'I John' in {row['book'] for row in verse_records}
+        
+        with pytest.raises(BibleInputError, match="Invalid scope: 'Gen-Foo'."):
+            bible.search('love', scope='Gen-Foo')
+
+
+@pytest.mark.parametrize(
+    "mode, phrase, expected_match",
+    [
+        ('stem', 'glorify', '<b>glorified</b>'),
+        ('substring', 'salem', 'jeru<b>salem</b>'),
+    ]
+)
+def test_search_modes(mode, phrase, expected_match):
+    with BibleClient('KJV') as bible:
+        bible.create_search_index(mode)
+        assert mode in bible.get_search_indexes()
+        
+        verse_records = bible.search(phrase, mode=mode)
+        
+        assert len(verse_records) == bible.count_matches(phrase, mode=mode)
+        assert len(verse_records) > bible.count_matches(phrase)
+        assert any(expected_match in row['text'].lower() for row in verse_records)
+
+
+def test_search_mode_error():
+    with BibleClient('KJV') as bible:
+        with pytest.raises(BibleInputError, match="Invalid search mode='fuzzy'."):
+            bible.search('lord', mode='fuzzy')
+
+
+def test_get_rebuilt_indexes():
+    """A rebuilt translation keeps the search indexes it was installed with.
+    """
+    with BibleClient('KJV') as bible:
+        bible.create_search_index('stem')
+        assert 'stem' in bible.get_rebuilt_indexes(['substring'])
+
+
+def test_search_cache(tmp_path):
+    cache = SearchCache(f'{tmp_path}/search_cache.db')
+    
+    with BibleClient('KJV', cache=cache) as bible:
+        for _ in range(2):
+            verse_records = bible.search('lord', book='john', rank=True, limit=5)
+            total = bible.count_matches('lord', book='john')
+            
+            assert [dict(row) for row in verse_records] == [
+                dict(row) for row in BibleClient('KJV').search('lord', book='john', rank=True, limit=5)
+            ]
+            assert total == BibleClient('KJV').count_matches('lord', book='john')
+        
+        fingerprint = bible.get_database_fingerprint()
+    
+    assert cache.conn.execute("SELECT COUNT(*) FROM search_cache;").fetchone()[0] == 2
+    assert cache.conn.execute("SELECT DISTINCT fingerprint FROM search_cache;").fetchone()[0] == fingerprint
+    cache.close()
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {'testament': 'nt'},
+        {'book': 'john'},
+        {'scope': 'pentateuch'},
+    ]
+)
+def test_count_matches_by(options):
+    with BibleClient('KJV') as bible:
+        verse_records = bible.search('lord', **options)
+        by_book = bible.count_matches_by('lord', 'book', **options)
+        by_chapter = bible.count_matches_by('lord', 'chapter', **options)
+        
+        books = list(dict.fromkeys(row['book'] for row in verse_records))
+        chapters = list(dict.fromkeys((row['book'], row['chapter']) for row in verse_records))
+        
+        assert [book for book, _ in by_book] == books
+        assert [(book, chapter) for book, chapter, _ in by_chapter] == chapters
+        assert sum(count for _, count in by_book) == len(verse_records)
+        assert sum(count for _, _, count in by_chapter) == len(verse_records)
+
+
+def test_count_matches_by_error():
+    with BibleClient('KJV') as bible:
+        with pytest.raises(BibleInputError, match="Invalid histogram by='verse'."):
+            bible.count_matches_by('lord', 'verse')
+
+
+@pytest.mark.parametrize(
+    "options",
+    [
+        {},
+        {'book': 'john'},
+        {'scope': 'gospels, acts'},
+    ]
+)
+def test_get_concordance(options):
+    with BibleClient('KJV') as bible:
+        words = bible.get_concordance(['glor*', 'LORD'], **options)
+        
+        assert 'lord' in [word for word, _, _ in words]
+        assert all(word == 'lord' or word.startswith('glor') for word, _, _ in words)
+        assert [row[2] for row in words] == sorted((row[2] for row in words), reverse=True)
+        
+        for word, verses, occurrences in words:
+            assert verses == bible.count_matches(word, **options)
+            assert occurrences >= verses
+
+
+@pytest.mark.parametrize(
+    "term, folded",
+    [
+        ('Café', 'cafe'),
+        ('naïve', 'naive'),
+        ('Jérusalem*', 'jerusalem*'),
+        ('LORD', 'lord'),
+    ]
+)
+def test_fold_term(term, folded):
+    assert fold_term(term) == folded
+
+
+def test_get_concordance_diacritics():
+    """Terms with diacritics find the words the index stores without them."""
+    with BibleClient('KJV') as bible:
+        words = bible.get_concordance(['jerusalem', 'glor*'])
+        
+        assert words
+        assert bible.get_concordance(['Jérusalem', 'glör*']) == words
+
+
+def test_get_concordance_most_frequent():
+    with BibleClient('KJV') as bible:
+        words = bible.get_concordance(limit=3)
+        
+        assert len(words) == 3
+        assert words == bible.get_concordance(['*'])[:3]
+        assert all(words[-1][2] >= row[2] for row in bible.get_concordance()[3:])
 
 
 def test_search_testament_error():
@@ -144,3 +552,211 @@ def test_search_testament_error():
     
     with pytest.raises(BibleInputError, match="Invalid testament='secret'."):
         bible.search_testament("That's all folks!", "secret")
+
+
+def test_client_connection_lifecycle():
+    """A client reuses one connection per thread and closes it on exit."""
+    with BibleClient('BSB') as bible:
+        conn = bible.connection
+        bible.get_verse('john', '3', '16')
+        bible.get_verses_by_chapter('psa', '117')
+        assert bible.connection is conn
+    
+    with pytest.raises(sqlite3.ProgrammingError):
+        conn.execute("SELECT 1;")
+
+
+def test_substring_index_needs_trigram(monkeypatch):
+    monkeypatch.setattr(sqlite3, 'sqlite_version_info', (3, 31, 1))
+    conn = sqlite3.connect(':memory:')
+    
+    with pytest.raises(BibleInputError, match="Substring search needs SQLite 3.34.0 or later"):
+        BibleClient('BSB').create_fts_verses_table(conn.cursor(), 'substring')
+    
+    conn.close()
+
+
+def test_unreadable_pack(tmp_path, monkeypatch):
+    """A pack that fails to open falls back to SQLite, and isn't opened again."""
+    opened = []
+    
+    def open_pack(path):
+        opened.append(path)
+        raise ValueError("Unsupported verse pack version")
+    
+    def read(bible):
+        """The texts of a verse, a range, a chapter, a book and passages."""
+        passages = bible.get_passages('Gen 1:1-3; Ps 3')
+        return [
+            [record['text'] for record in verse_records]
+            for verse_records in [
+                bible.get_verse('john', '3', '16'),
+                bible.get_verses('john', '3', '16-18'),
+                bible.get_verses_by_chapter('john', '3'),
+                bible.get_verses_by_book('jude'),
+                *(verse_records for _, verse_records in passages),
+            ]
+        ]
+    
+    with BibleClient('BSB') as bible:
+        assert bible.pack is not None
+        expected = read(bible)
+    
+    monkeypatch.setattr(bible_module, 'VersePack', open_pack)
+    
+    with BibleClient('BSB') as bible:
+        assert bible.pack is None
+        assert read(bible) == expected
+        assert len(opened) == 1
+
+
+class RawBibleHandler(BaseHTTPRequestHandler):
+    """Stand-in for GitHub that supports Range requests and dropped connections.
+    """
+    def do_GET(self):
+        raw = self.server.raw
+        etag = f'"{hash(raw)}"'
+        
+        if self.headers.get('If-None-Match') == etag:
+            self.send_response(304)
+            self.end_headers()
+            return
+        
+        byte_range = self.headers.get('Range')
+        self.server.ranges.append(byte_range)
+        
+        # A range of a file that's changed since is answered with all of it
+        if self.headers.get('If-Range') not in (None, etag):
+            byte_range = None
+        
+        start = int(byte_range[len('bytes='):-1]) if byte_range else 0
+        body = raw[start:]
+        
+        self.send_response(206 if byte_range else 200)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('ETag', etag)
+        self.end_headers()
+        
+        if self.server.interrupt:
+            # Drop the connection halfway through the body
+            self.wfile.write(body[:len(body) // 2])
+        else:
+            self.wfile.write(body)
+    
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def raw_bible_server(tmp_path, monkeypatch):
+    path = tmp_path / 'TEST.db'
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE TEST_books (id INTEGER PRIMARY KEY, name TEXT);")
+    conn.execute(
+        "CREATE TABLE TEST_verses (id INTEGER PRIMARY KEY, book_id INTEGER, "
+        "chapter INTEGER, verse INTEGER, text TEXT);"
+    )
+    conn.execute("INSERT INTO TEST_books VALUES (1, 'Genesis');")
+    conn.executemany(
+        "INSERT INTO TEST_verses (book_id, chapter, verse, text) VALUES (1, 1, ?, ?);",
+        [(verse, f"In the beginning {verse}") for verse in range(1, 500)]
+    )
+    conn.commit()
+    conn.close()
+    
+    server = ThreadingHTTPServer(('127.0.0.1', 0), RawBibleHandler)
+    server.raw = path.read_bytes()
+    server.ranges = []
+    server.interrupt = False
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    
+    host, port = server.server_address
+    monkeypatch.setattr(bible_module, 'TRANSLATIONS_URL', f"http://{host}:{port}")
+    
+    yield server
+    
+    server.shutdown()
+    server.server_close()
+
+
+def test_download_resumes_after_interruption(raw_bible_server):
+    bible = BibleClient('TEST')
+    raw_bible_server.interrupt = True
+    
+    with pytest.raises(BibleInputError, match="interrupted"):
+        bible.create_bible_db()
+    
+    msg = "An interrupted download was treated as an installed translation"
+    assert 'TEST' not in get_downloaded_translations(), msg
+    partial_size = os.path.getsize(bible.download_path)
+    
+    raw_bible_server.interrupt = False
+    progress = []
+    bible.create_bible_db(lambda *report: progress.append(report))
+    
+    msg = "Download did not resume from the partial file"
+    assert raw_bible_server.ranges[-1] == f"bytes={partial_size}-", msg
+    assert progress[-1][:2] == (len(raw_bible_server.raw), len(raw_bible_server.raw))
+    
+    assert not os.path.exists(bible.download_path)
+    assert bible.get_verse('gen', '1', '3')[0]['text'] == "In the beginning 3"
+    
+    bible.delete_translation()
+
+
+def test_download_restarts_if_changed(raw_bible_server):
+    bible = BibleClient('TEST')
+    raw_bible_server.interrupt = True
+    
+    with pytest.raises(BibleInputError, match="interrupted"):
+        bible.create_bible_db()
+    
+    # Upstream replaces the file before the download is resumed
+    raw_bible_server.raw = raw_bible_server.raw.replace(b"In the beginning", b"In  the  start  ")
+    raw_bible_server.interrupt = False
+    bible.create_bible_db()
+    
+    msg = "Resumed a partial download of a file that changed upstream"
+    assert bible.get_verse('gen', '1', '3')[0]['text'] == "In  the  start   3", msg
+    assert not os.path.exists(bible.download_validator_path)
+    
+    bible.delete_translation()
+
+
+def test_download_translations_failure(raw_bible_server, monkeypatch):
+    stage_download = BibleClient.stage_download
+    
+    def fail_to_stage(bible):
+        if bible.translation == 'FAIL':
+            raise OSError("No space left on device")
+        stage_download(bible)
+    
+    monkeypatch.setattr(BibleClient, 'stage_download', fail_to_stage)
+    results = download_translations(['FAIL', 'TEST'], max_builds=1)
+    
+    msg = "A failed download stopped the others"
+    assert results[0] == ('FAIL', "Download of 'FAIL' failed: No space left on device", False, 0), msg
+    assert results[1][0] == 'TEST' and results[1][2], msg
+    
+    with BibleClient('TEST') as bible:
+        bible.delete_translation()
+    
+    BibleClient('FAIL').remove_download()
+
+
+def test_conditional_download(raw_bible_server):
+    bible = BibleClient('TEST')
+    bible.create_bible_db()
+    
+    metadata = bible.get_download_metadata()
+    assert metadata['size'] == str(len(raw_bible_server.raw))
+    
+    msg = "Unchanged translation was downloaded again"
+    assert not bible.download_raw_bible(conditional=True), msg
+    
+    raw_bible_server.raw += b'changed'
+    msg = "Changed translation was not downloaded"
+    assert bible.download_raw_bible(conditional=True), msg
+    
+    bible.remove_download()
+    bible.delete_translation()
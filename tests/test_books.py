@@ -0,0 +1,54 @@
+import pytest
+
+from berea.books import BookResolver, load_book_abbreviations, split_ordinal, verse_ordinal
+
+
+@pytest.fixture(scope='module')
+def resolver():
+    books = enumerate(load_book_abbreviations().keys(), start=1)
+    return BookResolver(books)
+
+
+@pytest.mark.parametrize(
+    "book, expected_name",
+    [
+        ('John', 'John'),
+        ('song of solomon', 'Song of Solomon'),
+        ('REVELATION OF JOHN', 'Revelation of John'),
+        ('psa', 'Psalms'),
+        ('3john', 'III John'),
+        ('1 Sam', 'I Samuel'),
+        # Unambiguous prefixes
+        ('deuter', 'Deuteronomy'),
+        ('philem', 'Philemon'),
+        ('zepha', 'Zephaniah'),
+    ]
+)
+def test_resolve(resolver, book, expected_name):
+    assert resolver.resolve(book) == expected_name
+
+
+@pytest.mark.parametrize(
+    "book",
+    [
+        # Prefix of John, Job, Joel, Jonah, Joshua...
+        'jo',
+        'silmarillion',
+        '',
+    ]
+)
+def test_resolve_invalid(resolver, book):
+    assert resolver.resolve(book) is None
+
+
+@pytest.mark.parametrize(
+    "reference, ordinal",
+    [
+        ((1, 1, 1), 1001001),
+        ((43, 3, 16), 43003016),
+        ((19, 119, 176), 19119176),
+    ]
+)
+def test_verse_ordinal(reference, ordinal):
+    assert verse_ordinal(*reference) == ordinal
+    assert split_ordinal(ordinal) == reference
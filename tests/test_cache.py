@@ -0,0 +1,56 @@
+import pytest
+
+from berea.cache import SearchCache
+
+
+@pytest.fixture
+def cache(tmp_path):
+    cache = SearchCache(f'{tmp_path}/search_cache.db', max_size=100)
+    yield cache
+    cache.close()
+
+
+def test_get(cache):
+    cache.put('KJV', 'v1', 'lord', [1, 2, 3])
+    
+    assert cache.get('KJV', 'v1', 'lord') == [1, 2, 3]
+    assert cache.get('KJV', 'v1', 'god') is None
+    assert cache.get('BSB', 'v1', 'lord') is None
+
+
+def test_get_stale(cache):
+    """Values cached from a replaced DB are dropped."""
+    cache.put('KJV', 'v1', 'lord', 1)
+    cache.put('KJV', 'v1', 'god', 2)
+    
+    assert cache.get('KJV', 'v2', 'lord') is None
+    assert cache.get('KJV', 'v1', 'god') is None
+
+
+def test_evict_least_recently_used(cache):
+    for key in ['a', 'b', 'c']:
+        cache.put('KJV', 'v1', key, 'x' * 28)
+    
+    # Using 'a' makes 'b' the least recently used
+    cache.get('KJV', 'v1', 'a')
+    cache.put('KJV', 'v1', 'd', 'x' * 28)
+    
+    assert cache.get('KJV', 'v1', 'b') is None
+    
+    for key in ['a', 'c', 'd']:
+        assert cache.get('KJV', 'v1', key) is not None
+
+
+def test_put_too_large(cache):
+    cache.put('KJV', 'v1', 'the', 'x' * 200)
+    
+    assert cache.get('KJV', 'v1', 'the') is None
+
+
+def test_invalidate(cache):
+    cache.put('KJV', 'v1', 'lord', 1)
+    cache.put('BSB', 'v1', 'lord', 1)
+    cache.invalidate('KJV')
+    
+    assert cache.get('KJV', 'v1', 'lord') is None
+    assert cache.get('BSB', 'v1', 'lord') == 1
@@ -1,3 +1,4 @@
+import os
 import pytest
 import sys
 
@@ -179,6 +180,35 @@ from berea.utils import get_downloaded_translations
                 "of God with one eye than to have two eyes and be thrown into hell, "
             )
         ),
+        (
+            "Printing a reference string failed",
+            ['John 3:16'],
+            (
+                "For God so loved the world that He gave His one and only Son, that everyone\n"
+                "who believes in Him shall not perish but have eternal life. "
+            )
+        ),
+        (
+            "Printing multiple references failed",
+            ['John 3:16; jn 3:17'],
+            (
+                "John 3:16 BSB\n"
+                "For God so loved the world that He gave His one and only Son, that everyone\n"
+                "who believes in Him shall not perish but have eternal life. \n\n"
+                "John 3:17 BSB\n"
+                "For God did not send His Son into the world to condemn the world, but to save\n"
+                "the world through Him. "
+            )
+        ),
+        (
+            "Comparing translations failed",
+            ['john', '11', '35', '-t', 'KJV,BSB', '-f', 'md'],
+            (
+                "| Reference | KJV | BSB |\n"
+                "| --- | --- | --- |\n"
+                "| John 11:35 | Jesus wept. | Jesus wept. |"
+            )
+        ),
         # Error path tests
         (
             "Failed to validate book input",
@@ -200,6 +230,16 @@ from berea.utils import get_downloaded_translations
             ['acts', '28', '100-200'],
             "Invalid verses: Acts 28:100-200."
         ),
+        (
+            "Failed to validate one of multiple references",
+            ['John 3:16; Acts 29'],
+            "Invalid chapter: Acts 29."
+        ),
+        (
+            "Failed to validate reference syntax",
+            ['John 3:x'],
+            "Invalid reference: 'John 3:x'."
+        ),
     ]
 )
 def test_reference(monkeypatch, capsys, msg, args, output):
@@ -212,6 +252,41 @@ def test_reference(monkeypatch, capsys, msg, args, output):
     assert captured.out == output + '\n', msg
 
 
+def test_reference_startup(monkeypatch, capsys):
+    """Looking up a reference neither lists the translations nor re-reads the config."""
+    def fail(*args):
+        raise AssertionError("Listed the translations directory")
+    
+    reads = []
+    load = CLIConfig.load.__func__
+    
+    def count_reads(cls):
+        reads.append(cls.config is None)
+        return load(cls)
+    
+    monkeypatch.setattr('berea.cli.get_downloaded_translations', fail)
+    monkeypatch.setattr(CLIConfig, 'load', classmethod(count_reads))
+    monkeypatch.setattr(sys, 'argv', ['bible', 'john', '3', '16'])
+    
+    main()
+    
+    captured = capsys.readouterr()
+    assert captured.out and not captured.out.startswith("Error")
+    assert reads.count(True) == 1
+
+
+def test_closed_pipe(monkeypatch):
+    """Output to a reader that stopped early, eg. `bible john 3 | head -1`, is dropped."""
+    read_fd, write_fd = os.pipe()
+    os.close(read_fd)
+    
+    with open(write_fd, 'w') as stdout:
+        monkeypatch.setattr(sys, 'stdout', stdout)
+        monkeypatch.setattr(sys, 'argv', ['bible', 'john', '3'])
+        
+        main()
+
+
 def test_delete(monkeypatch, capsys):
     default_translation = CLIConfig.get_default_translation()
     monkeypatch.setattr(sys, 'argv', ['bible', 'delete', default_translation])
@@ -282,6 +357,26 @@ def test_download(monkeypatch, capsys, translation):
     assert pytest.translation_exists(translation)
 
 
+def test_download_multiple(monkeypatch, capsys):
+    translations = ['KJV', 'ESV', 'BSB']
+    monkeypatch.setattr(sys, 'argv', ['bible', 'download', *translations])
+    
+    main()
+    
+    captured = capsys.readouterr()
+    lines = captured.out.splitlines()
+    
+    msg = "Download results are not in the requested order"
+    assert lines[0].endswith('KJV.db'), msg
+    assert lines[1] == "Translation 'ESV' does not exist.", msg
+    assert lines[4].endswith('BSB.db'), msg
+    
+    assert lines[-1].startswith("Downloaded 2 of 3 translations in ")
+    assert pytest.translation_exists('KJV')
+    assert pytest.translation_exists('BSB')
+    assert not pytest.translation_exists('ESV')
+
+
 def test_download_error(monkeypatch, capsys):
     # The ESV is not public domain
     translation = 'ESV'
@@ -337,6 +432,67 @@ def test_download_error(monkeypatch, capsys):
                 "___\n"
             )
         ),
+        (
+            "Paging search results failed",
+            ['"sheep gate"', '-t', 'BSB', '-l', '2', '--after', '16003001'],
+            (
+                "4 occurrences of '\"sheep gate\"' in the BSB Bible:\n"
+                "___\n\n"
+                "Nehemiah 3:32:\n"
+                "And between the upper room above the corner and the \x1b[1mSheep Gate\x1b[0m, the goldsmiths and merchants made repairs. \n"
+                "___\n\n"
+                "Nehemiah 12:39:\n"
+                "over the Gate of Ephraim, the Jeshanah Gate, the Fish Gate, the Tower of Hananel, and the Tower of the Hundred, as far as the \x1b[1mSheep Gate\x1b[0m. And they stopped at the Gate of the Guard. \n"
+                "___\n"
+                "\nShowing 2 of 4 occurrences. Next page: --after 16012039\n"
+            )
+        ),
+        (
+            "Searching an exact phrase in a scope failed",
+            ['"sheep gate"', '-t', 'BSB', '-s', 'Ezra-Esth'],
+            (
+                "3 occurrences of '\"sheep gate\"' in Ezra-Esth (BSB):\n"
+                "___\n\n"
+                "Nehemiah 3:1:\n"
+                "At the \x1b[1mSheep Gate\x1b[0m, Eliashib the high priest and his fellow priests began rebuilding. They dedicated it and installed its doors. After building as far as the Tower of the Hundred and the Tower of Hananel, they dedicated the wall. \n"
+                "___\n\n"
+                "Nehemiah 3:32:\n"
+                "And between the upper room above the corner and the \x1b[1mSheep Gate\x1b[0m, the goldsmiths and merchants made repairs. \n"
+                "___\n\n"
+                "Nehemiah 12:39:\n"
+                "over the Gate of Ephraim, the Jeshanah Gate, the Fish Gate, the Tower of Hananel, and the Tower of the Hundred, as far as the \x1b[1mSheep Gate\x1b[0m. And they stopped at the Gate of the Guard. \n"
+                "___\n"
+            )
+        ),
+        (
+            "Counting the occurrences of a phrase failed",
+            ['"sheep gate"', '-t', 'BSB', '-c'],
+            "4 occurrences of '\"sheep gate\"' in the BSB Bible."
+        ),
+        (
+            "Counting the occurrences of a phrase by book failed",
+            ['"sheep gate"', '-t', 'BSB', '--histogram'],
+            (
+                "4 occurrences of '\"sheep gate\"' in the BSB Bible, by book:\n"
+                "Nehemiah  3  ########################################\n"
+                "John      1  #############"
+            )
+        ),
+        (
+            "Invalid page failed",
+            ['"sheep gate"', '-p', '1', '--after', '16003001'],
+            "Invalid search: cannot combine '--page' with '--after'."
+        ),
+        (
+            "A zero limit should be invalid rather than the default page",
+            ['"sheep gate"', '-l', '0'],
+            "Invalid search: '--page' and '--limit' must be positive."
+        ),
+        (
+            "A negative limit should be invalid",
+            ['"sheep gate"', '-l', '-3'],
+            "Invalid search: '--page' and '--limit' must be positive."
+        ),
         (
             "Searching an exact phrase in the Old Testament failed",
             ['"holy spirit"', '-OT', '-t', 'BSB'],
@@ -558,6 +714,18 @@ def test_download_error(monkeypatch, capsys):
                 "Invalid search: cannot search a book with the '-OT, --old_testament' flag."
             )
         ),
+        (
+            "Searching a phrase in a book with the scope flag should be invalid",
+            ['martha', 'john', '-s', 'gospels'],
+            (
+                "Invalid search: cannot search a book with the '-s, --scope' flag."
+            )
+        ),
+        (
+            "Searching a phrase in an invalid scope should fail",
+            ['martha', '-s', 'silmarillion'],
+            "Invalid scope: 'silmarillion'."
+        ),
     ]
 )
 def test_search(monkeypatch, capsys, msg, args, output):
@@ -0,0 +1,129 @@
+import os
+import socket
+import stat
+import sys
+import threading
+
+import pytest
+
+from berea import daemon as daemon_module
+from berea.cli import CLISession, main, run_captured
+from berea.daemon import BibleDaemon, forward_request, is_daemon_running, stop_daemon
+
+
+def serve(handler, path):
+    daemon = BibleDaemon(handler, path)
+    daemon.bind()
+    thread = threading.Thread(target=daemon.serve_forever)
+    thread.start()
+    return daemon, thread
+
+
+@pytest.fixture
+def socket_path(tmp_path):
+    return f'{tmp_path}/daemon.sock'
+
+
+def test_forward_request(socket_path):
+    daemon, thread = serve(lambda argv: (' '.join(argv), '', 0), socket_path)
+    
+    try:
+        assert is_daemon_running(socket_path)
+        assert forward_request(['search', 'lord'], socket_path) == ('search lord', '', 0)
+        
+        # A bad request doesn't stop the daemon
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.connect(socket_path)
+            sock.sendall(b'{"argv": "john"}\n')
+            assert sock.recv(1) == b''
+        
+        assert forward_request(['john', '3'], socket_path) == ('john 3', '', 0)
+    finally:
+        assert stop_daemon(socket_path)
+        thread.join()
+        daemon.close()
+    
+    assert not os.path.exists(socket_path)
+    assert not stop_daemon(socket_path)
+
+
+def test_forward_request_no_daemon(socket_path):
+    assert forward_request(['john', '3', '16'], socket_path) is None
+    
+    # Left behind by a daemon that was killed
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(socket_path)
+    
+    assert not is_daemon_running(socket_path)
+    assert forward_request(['john', '3', '16'], socket_path) is None
+
+
+def test_forward_request_stalled_daemon(socket_path, monkeypatch):
+    monkeypatch.setattr(daemon_module, 'REQUEST_TIMEOUT', 0.1)
+    
+    # Accepts connections, but never answers them
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.bind(socket_path)
+        sock.listen()
+        
+        assert forward_request(['john', '3', '16'], socket_path) is None
+
+
+def test_socket_permissions(socket_path):
+    daemon = BibleDaemon(lambda argv: ('', '', 0), socket_path)
+    umask = os.umask(0o022)
+    
+    try:
+        daemon.bind()
+        mode = stat.S_IMODE(os.stat(socket_path).st_mode)
+    finally:
+        restored = os.umask(umask)
+        daemon.close()
+    
+    assert mode == 0o600
+    assert restored == 0o022, "The process's umask wasn't restored"
+
+
+@pytest.mark.parametrize(
+    "args",
+    [
+        ['john', '3', '16'],
+        ['search', '"sheep gate"', '-t', 'KJV'],
+        ['concordance', 'grace', '-b', 'eph'],
+    ]
+)
+def test_run_captured(monkeypatch, capsys, args):
+    """The daemon's output matches the command's in-process output."""
+    session = CLISession()
+    
+    try:
+        assert run_captured(args, session) == run_captured(args, session)
+        stdout, stderr, status = run_captured(args, session)
+    finally:
+        session.close()
+    
+    monkeypatch.setattr(sys, 'argv', ['bible', *args])
+    main()
+    
+    captured = capsys.readouterr()
+    assert (stdout, stderr, status) == (captured.out, captured.err, 0)
+
+
+@pytest.mark.parametrize(
+    "args, stderr, status",
+    [
+        (['delete', 'KJV'], "Error: The daemon only runs the reference, search and concordance commands.\n", 1),
+        (['search', 'lord', '-x'], "bible: error: unrecognized arguments: -x\n", 2),
+    ]
+)
+def test_run_captured_error(args, stderr, status):
+    session = CLISession()
+    
+    try:
+        result = run_captured(args, session)
+    finally:
+        session.close()
+    
+    assert result[0] == ''
+    assert result[1].endswith(stderr)
+    assert result[2] == status
@@ -0,0 +1,75 @@
+import sqlite3
+
+import pytest
+
+from berea.pack import VersePack, build_pack
+
+
+@pytest.fixture
+def pack(tmp_path):
+    conn = sqlite3.connect(':memory:')
+    conn.execute("CREATE TABLE books (id INTEGER PRIMARY KEY, name TEXT);")
+    conn.execute("CREATE TABLE verses (book_id INTEGER, chapter INTEGER, verse INTEGER, text TEXT);")
+    conn.executemany("INSERT INTO books VALUES (?, ?);", [(1, 'Genesis'), (43, 'John')])
+    
+    verses = [(1, 1, verse, f"Genesis 1:{verse}") for verse in range(1, 32)]
+    # Chapter and verse numbers with gaps, eg. verses omitted from a translation
+    verses += [(43, 3, verse, f"John 3:{verse}") for verse in [1, 2, 4, 5, 16]]
+    verses += [(43, 5, 4, None)]
+    conn.executemany("INSERT INTO verses VALUES (?, ?, ?, ?);", verses)
+    
+    path = tmp_path / 'TEST.pack'
+    build_pack(conn.cursor(), path)
+    conn.close()
+    
+    pack = VersePack(path)
+    yield pack
+    pack.close()
+
+
+def texts(records):
+    return [record['text'] for record in records]
+
+
+def test_books(pack):
+    assert pack.books == [(1, 'Genesis'), (43, 'John')]
+
+
+@pytest.mark.parametrize(
+    "args, expected_texts",
+    [
+        ((1, 1, 3), ["Genesis 1:3"]),
+        ((1, 1, 30, 40), ["Genesis 1:30", "Genesis 1:31"]),
+        ((43, 3, 2, 5), ["John 3:2", "John 3:4", "John 3:5"]),
+        ((43, 3, 3), []),
+        ((43, 3), ["John 3:1", "John 3:2", "John 3:4", "John 3:5", "John 3:16"]),
+        ((43, 4), []),
+        ((43, 5), [""]),
+        ((2,), []),
+    ]
+)
+def test_get_verses(pack, args, expected_texts):
+    assert texts(pack.get_verses(*args)) == expected_texts
+
+
+def test_get_verses_by_book(pack):
+    records = pack.get_verses(43)
+    assert [record['verse'] for record in records] == [1, 2, 4, 5, 16, 4]
+
+
+@pytest.mark.parametrize(
+    "start, end, expected_verses",
+    [
+        # John 3:4-5
+        (43003004, 43003005, [4, 5]),
+        # John 3:5-5:4 across chapters
+        (43003005, 43005004, [5, 16, 4]),
+        # John 3-5
+        (43003000, 43005999, [1, 2, 4, 5, 16, 4]),
+        # John 4, missing from the pack
+        (43004000, 43004999, []),
+        (2001000, 2999999, []),
+    ]
+)
+def test_get_range(pack, start, end, expected_verses):
+    assert [record['verse'] for record in pack.get_range(start, end)] == expected_verses
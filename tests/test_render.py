@@ -1,6 +1,14 @@
 import pytest
+from types import SimpleNamespace
 
-from berea.render import list_multiline_verse
+from berea.render import (
+    list_multiline_verse,
+    render_comparison,
+    render_concordance,
+    render_search_histogram,
+    render_search_results,
+    stream_search_results,
+)
 
 
 @pytest.mark.parametrize(
@@ -31,3 +39,126 @@ from berea.render import list_multiline_verse
 )
 def test_list_multiline_verse(verse, verse_list):
     assert list_multiline_verse(verse) == verse_list
+
+
+COMPARED_PASSAGES = [
+    (
+        ('John', '11', '35'),
+        [{'chapter': 11, 'verse': 35, 'texts': ['Jesus wept.', 'Jesus wept.', None]}],
+    ),
+]
+
+
+@pytest.mark.parametrize(
+    "format, columns, output",
+    [
+        (
+            'txt', False,
+            "John 11:35\nKJV: Jesus wept.\nBSB: Jesus wept.\nXYZ: "
+        ),
+        (
+            'txt', True,
+            f"{'KJV':24} | {'BSB':24} | XYZ\n"
+            f"{'-' * 78}\n"
+            "\n"
+            "John 11:35\n"
+            f"{'Jesus wept.':24} | {'Jesus wept.':24} |"
+        ),
+        (
+            'md', False,
+            "| Reference | KJV | BSB | XYZ |\n"
+            "| --- | --- | --- | --- |\n"
+            "| John 11:35 | Jesus wept. | Jesus wept. |  |"
+        ),
+    ]
+)
+def test_render_comparison(format, columns, output):
+    assert render_comparison(['KJV', 'BSB', 'XYZ'], format, COMPARED_PASSAGES, columns) == output
+
+
+def test_stream_search_results():
+    bible_client = SimpleNamespace(translation='KJV')
+    verse_records = [
+        {'book': 'John', 'chapter': 11, 'verse': 35, 'text': 'Jesus <b>wept</b>.'},
+        {'book': 'Luke', 'chapter': 19, 'verse': 41, 'text': 'he beheld the city, and <b>wept</b> over it,'},
+    ]
+    consumed = []
+    
+    def rows():
+        for row in verse_records:
+            consumed.append(row)
+            yield row
+    
+    stream = stream_search_results(bible_client, rows(), 'wept', total=2)
+    
+    assert next(stream) == "2 occurrences of 'wept' in the KJV Bible:\n___\n"
+    assert not consumed, "Rows were read before the header was written."
+    
+    assert next(stream) == "\nJohn 11:35:\nJesus \x1b[1mwept\x1b[0m.\n___\n"
+    assert len(consumed) == 1, "Rows were read ahead of the output."
+    
+    assert ''.join(stream_search_results(bible_client, verse_records, 'wept', total=2)) == (
+        render_search_results(bible_client, verse_records, 'wept')
+    )
+
+
+@pytest.mark.parametrize(
+    "by, counts, output",
+    [
+        (
+            'book',
+            [('John', 2), ('Luke', 1)],
+            (
+                "3 occurrences of 'wept' in gospels (KJV), by book:\n"
+                "John  2  ########################################\n"
+                "Luke  1  ####################"
+            )
+        ),
+        (
+            'chapter',
+            [('John', 11, 1), ('Luke', 19, 1), ('Luke', 22, 1)],
+            (
+                "3 occurrences of 'wept' in gospels (KJV), by chapter:\n"
+                "John 11  1  ########################################\n"
+                "Luke 19  1  ########################################\n"
+                "Luke 22  1  ########################################"
+            )
+        ),
+        ('book', [], "0 occurrences of 'wept' in gospels (KJV), by book:"),
+    ]
+)
+def test_render_search_histogram(by, counts, output):
+    bible_client = SimpleNamespace(translation='KJV')
+    
+    assert render_search_histogram(bible_client, counts, 'wept', by, scope='gospels') == output
+
+
+@pytest.mark.parametrize(
+    "words, terms, output",
+    [
+        (
+            [('glory', 1157, 1183), ('glorified', 1095, 1114)],
+            ['glor*'],
+            (
+                "Concordance of 'glor*' in gospels (KJV):\n"
+                "Word       Verses  Occurrences\n"
+                "glory        1157         1183\n"
+                "glorified    1095         1114"
+            )
+        ),
+        (
+            [('the', 27562, 77703)],
+            [],
+            (
+                "Most frequent words in gospels (KJV):\n"
+                "Word  Verses  Occurrences\n"
+                "the    27562        77703"
+            )
+        ),
+        ([], ['selah'], "Concordance of 'selah' in gospels (KJV):\nNo matching words."),
+    ]
+)
+def test_render_concordance(words, terms, output):
+    bible_client = SimpleNamespace(translation='KJV')
+    
+    assert render_concordance(bible_client, words, terms, scope='gospels') == output
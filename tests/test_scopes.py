@@ -0,0 +1,58 @@
+import pytest
+
+from berea.books import BookResolver, load_book_abbreviations
+from berea.scopes import book_ordinal_ranges, merge_ranges, resolve_scope
+
+
+@pytest.fixture(scope='module')
+def resolver():
+    books = enumerate(load_book_abbreviations().keys(), start=1)
+    return BookResolver(books)
+
+
+@pytest.mark.parametrize(
+    "scope, expected_ranges",
+    [
+        ('gospels', [(40, 43)]),
+        ('Pentateuch', [(1, 5)]),
+        ('pauline epistles', [(45, 57)]),
+        ('Gen-Deut', [(1, 5)]),
+        ('1john - 3john', [(62, 64)]),
+        ('john', [(43, 43)]),
+        # Adjacent and overlapping ranges are merged
+        ('gospels, acts', [(40, 44)]),
+        ('rev, pentateuch, exo-josh', [(1, 6), (66, 66)]),
+        # User-defined scopes can refer to each other
+        ('johannine', [(43, 43), (62, 64), (66, 66)]),
+        ('writings', [(43, 43), (45, 57), (62, 64), (66, 66)]),
+    ]
+)
+def test_resolve_scope(resolver, scope, expected_ranges):
+    user_scopes = {
+        'johannine': 'John, 1John-3John, Rev',
+        'writings': 'johannine, paul',
+    }
+    assert resolve_scope(scope, resolver, user_scopes) == expected_ranges
+
+
+@pytest.mark.parametrize(
+    "scope, error",
+    [
+        ('silmarillion', "Invalid scope: 'silmarillion'."),
+        ('Gen-Foo', "Invalid scope: 'Gen-Foo'."),
+        ('Deut-Gen', "Invalid scope: 'Deut-Gen' is backwards."),
+        ('gospels,', "Invalid scope: 'gospels,'."),
+        ('loop', "Invalid scope: 'loop' refers to itself."),
+    ]
+)
+def test_resolve_scope_invalid(resolver, scope, error):
+    with pytest.raises(ValueError, match=error):
+        resolve_scope(scope, resolver, {'loop': 'gospels, loop'})
+
+
+def test_merge_ranges():
+    assert merge_ranges([(5, 9), (1, 2), (3, 4), (8, 12), (20, 20)]) == [(1, 12), (20, 20)]
+
+
+def test_book_ordinal_ranges():
+    assert book_ordinal_ranges([(40, 43)]) == [(40000000, 43999999)]
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import threading
+from http.client import HTTPConnection
+
+import pytest
+
+from berea.bible import BibleClient
+from berea.server import BibleHTTPServer
+
+
+@pytest.fixture(scope='module')
+def server():
+    http_server = BibleHTTPServer('BSB', max_workers=2)
+    loop = asyncio.new_event_loop()
+    server = loop.run_until_complete(http_server.start('127.0.0.1', 0))
+    thread = threading.Thread(target=loop.run_forever)
+    thread.start()
+    
+    yield server.sockets[0].getsockname()[1]
+    
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    server.close()
+    loop.run_until_complete(server.wait_closed())
+    loop.close()
+    http_server.close()
+
+
+def get(port, path, headers=None):
+    conn = HTTPConnection('127.0.0.1', port)
+    
+    try:
+        conn.request('GET', path, headers=headers or {})
+        response = conn.getresponse()
+        body = response.read()
+        return response, json.loads(body) if body else None
+    finally:
+        conn.close()
+
+
+def get_text(translation, reference):
+    with BibleClient(translation) as bible:
+        (_, verse_records), = bible.get_passages(reference)
+        return verse_records[0]['text']
+
+
+def test_reference(server):
+    response, body = get(server, '/reference?q=John+3:16')
+    
+    assert response.status == 200
+    assert body['translation'] == 'BSB'
+    
+    passage, = body['passages']
+    assert (passage['book'], passage['chapter'], passage['verse']) == ('John', '3', '16')
+    assert passage['verses'][0]['verse'] == 16
+    assert passage['verses'][0]['text'] == get_text('BSB', 'John 3:16')
+
+
+def test_not_modified(server):
+    response, _ = get(server, '/reference?q=John+3:16&t=KJV')
+    etag = response.getheader('ETag')
+    
+    response, body = get(server, '/reference?q=John+3:16&t=KJV', {'If-None-Match': etag})
+    assert response.status == 304
+    assert body is None
+    
+    # Another translation's verses are tagged differently
+    response, _ = get(server, '/reference?q=John+3:16', {'If-None-Match': etag})
+    assert response.status == 200
+
+
+def test_search(server):
+    response, body = get(server, '/search?q=lord&book=ruth&limit=2')
+    
+    assert response.status == 200
+    assert [match['book'] for match in body['matches']] == ['Ruth', 'Ruth']
+    
+    _, next_page = get(server, f"/search?q=lord&book=ruth&limit=2&after={body['after']}")
+    assert next_page['matches'][0]['ordinal'] > body['matches'][-1]['ordinal']
+
+
+def test_count(server):
+    _, body = get(server, '/count?q=lord&book=ruth')
+    _, by_book = get(server, '/count?q=lord&book=ruth&by=book')
+    
+    assert by_book['counts'] == [{'book': 'Ruth', 'count': body['count']}]
+
+
+def test_compare(server):
+    response, body = get(server, '/compare?q=John+3:16&t=KJV,BSB')
+    
+    assert response.status == 200
+    
+    verse, = body['passages'][0]['verses']
+    assert verse['texts'] == {
+        'KJV': get_text('KJV', 'John 3:16'),
+        'BSB': get_text('BSB', 'John 3:16'),
+    }
+
+
+@pytest.mark.parametrize(
+    "path, status, error",
+    [
+        ('/verse?q=John+3:16', 404, "No such endpoint: /verse."),
+        ('/reference', 400, "Specify the query with 'q'."),
+        ('/reference?q=John+3:16&t=XYZ', 400, "Translation 'XYZ' is not downloaded."),
+        ('/reference?q=John+3:16&t=../../victim', 400, "Translation '../../victim' is not downloaded."),
+        ('/compare?q=John+3:16&t=KJV,../KJV', 400, "Translation '../KJV' is not downloaded."),
+        ('/reference?q=John+3:16&t=KJV,BSB', 400, "Only '/compare' takes several translations."),
+        ('/search?q=lord&limit=0', 400, "Invalid limit=0, must be from 1 to 1000."),
+        ('/count?q=lord&by=verse', 400, "Invalid histogram by='verse'."),
+        ('/search?q=lord&chapter=3', 400, "Specify the book of 'chapter' with 'book'."),
+        ('/search?q=lord&testament=nt&book=gen', 400, "Invalid search: cannot combine 'book' with 'testament'."),
+        ('/count?q=lord&testament=ot&scope=gospels', 400, "Invalid search: cannot combine 'testament' with 'scope'."),
+        ('/search?q=lord&mode=fuzzy', 400, "Invalid search mode='fuzzy'."),
+    ]
+)
+def test_error(server, path, status, error):
+    response, body = get(server, path)
+    
+    assert response.status == status
+    assert body == {'error': error}
+
+
+def test_unbuilt_index(server, monkeypatch):
+    monkeypatch.setattr(BibleClient, 'get_search_indexes', lambda self, cursor=None: ['exact'])
+    response, body = get(server, '/search?q=glory&mode=stem')
+    
+    assert response.status == 400
+    assert body == {
+        'error': (
+            "The 'stem' search index of BSB isn't built, "
+            "build it with a search, eg. 'bible search <phrase> -m stem -t BSB'."
+        )
+    }
+
+
+def test_reinstalled_translation(monkeypatch):
+    http_server = BibleHTTPServer('BSB', max_workers=1)
+    
+    try:
+        bible = http_server.get_bible('KJV')
+        assert http_server.get_bible('KJV') is bible
+        
+        # A reinstalled translation is read with a new client
+        monkeypatch.setattr(BibleClient, 'get_database_fingerprint', lambda self: '1:2:3')
+        reinstalled = http_server.get_bible('KJV')
+        
+        assert reinstalled is not bible
+        assert http_server.get_bible('KJV') is reinstalled
+        
+        bible.close()
+    finally:
+        http_server.close()
+
+
+def test_internal_error(server, monkeypatch, capsys):
+    def fail(*args, **kwargs):
+        raise RuntimeError("Something broke")
+    
+    monkeypatch.setattr(BibleClient, 'count_matches', fail)
+    response, body = get(server, '/count?q=lord')
+    
+    assert response.status == 500
+    assert body == {'error': "Internal server error."}
+    assert "RuntimeError: Something broke" in capsys.readouterr().err
+    
+    # The server keeps answering
+    monkeypatch.undo()
+    response, _ = get(server, '/count?q=lord')
+    assert response.status == 200